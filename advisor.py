@@ -0,0 +1,391 @@
+"""Expected-value advisor: which square to open next, or whether to guess the Obstacle.
+
+The round is solved exactly under a SkillModel shared by all four teams:
+square k is answered correctly with its probability from the model, and
+the Obstacle is named with `guess_probability`, which grows with every
+image part shown and every hint unlocked. Scoring follows ObstacleGame:
+10 or 15 points per square, the sliding Obstacle scale on a correct guess
+(which ends the game), a lost turn on a wrong one, and FINAL_GUESS_POINTS
+for the final guess once every square is open. Every team is assumed to
+play to maximize its own points.
+
+A state is (open squares as a bit mask, parts shown, hints unlocked,
+turns played), which pins down whose turn it is and how many turns
+everyone has left. Each state's value is the vector of points the four
+teams can still expect, starting from the team to move.
+
+Two modes:
+
+    Advisor(model).advise(game)         memoized search from the current state;
+                                        fast late in a round, slow from the start
+    Advisor(model).build_table()        every state at once with NumPy, after
+                                        which advise() is a few table lookups
+
+A built table can be saved and memory-mapped back in:
+
+    python advisor.py build advisor.table --p-easy 0.7 --p-medium 0.5
+    python advisor.py advise --table advisor.table
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from engine import DEFAULT_LAYOUT, FINAL_GUESS_POINTS, NUM_TEAMS, GridLayout, SkillModel
+
+GUESS = "guess"
+TABLE_FORMAT = 1
+MAX_SQUARES = 16  # 2^16 reveal masks; larger boards are out of reach for a full table
+
+
+class Advisor:
+    """Expected points of every action for the team to move.
+
+    `model` supplies the success probabilities (a SkillModel; its
+    `guess_threshold` is ignored, since the advisor decides when to guess).
+    """
+
+    def __init__(self, model=None, layout=DEFAULT_LAYOUT):
+        if layout.size > MAX_SQUARES:
+            raise ValueError(f"The advisor supports up to {MAX_SQUARES} squares, "
+                             f"not {layout.size}")
+        self.model = model or SkillModel()
+        self.layout = layout
+        self.size = layout.size
+        self.total_turns = NUM_TEAMS * layout.turns_per_team
+        self.full_mask = (1 << self.size) - 1
+        self.hint_mask = sum(1 << (square - 1) for square in layout.center_squares)
+
+        squares = range(1, self.size + 1)
+        self.square_probs = [self._square_probability(square) for square in squares]
+        self.square_points = [layout.square_points(square) for square in squares]
+        self.obstacle_points = [layout.obstacle_points(c) for c in range(self.size + 1)]
+        self.final_value = self.model.p_final * FINAL_GUESS_POINTS
+
+        self.table = None
+        self._memo = {}
+        self._index_tables()
+
+    def _square_probability(self, square):
+        p = self.model.square_probs.get(square)
+        if p is None:
+            p = self.model.p_medium if square in self.layout.center_squares else self.model.p_easy
+        return p
+
+    def guess_probability(self, correct, hints):
+        """The model's chance of naming the Obstacle with `correct` parts and `hints` hints shown."""
+        model = self.model
+        return min(1.0, model.guess_base + model.guess_per_tile * correct
+                   + model.guess_per_hint * hints)
+
+    @staticmethod
+    def state_of(game):
+        """The (mask, parts shown, hints, turns played) state of an ObstacleGame."""
+        mask = 0
+        for i, row in enumerate(game.revealed):
+            for j, revealed in enumerate(row):
+                if revealed:
+                    mask |= 1 << (game.grid_order[i][j] - 1)
+        return mask, game.revealed_correct_count, len(game.unlocked_hints), sum(game.turns_taken)
+
+    def advise(self, game):
+        """Return [(action, expected points)] for the team to move, best first.
+
+        An action is a square number or GUESS. The points count everything the
+        team can still expect this round, including the action's own.
+        """
+        values = self.action_values(*self.state_of(game))
+        return sorted(((action, vector[0]) for action, vector in values),
+                      key=lambda item: -item[1])
+
+    def best_action(self, game):
+        """The action advise() ranks first."""
+        return self.advise(game)[0][0]
+
+    def action_values(self, mask, correct, hints, turns):
+        """Return [(action, value vector)] for every legal action in a state."""
+        actions = []
+        for k in range(self.size):
+            bit = 1 << k
+            if mask & bit:
+                continue
+            p = self.square_probs[k]
+            right = self.value(mask | bit, correct + 1, hints + bool(bit & self.hint_mask), turns + 1)
+            wrong = self.value(mask | bit, correct, hints, turns + 1)
+            vector = [p * right[(t - 1) % NUM_TEAMS] + (1 - p) * wrong[(t - 1) % NUM_TEAMS]
+                      for t in range(NUM_TEAMS)]
+            vector[0] += p * self.square_points[k]
+            actions.append((k + 1, vector))
+
+        g = self.guess_probability(correct, hints)
+        wrong = self.value(mask, correct, hints, turns + 1)
+        vector = [(1 - g) * wrong[(t - 1) % NUM_TEAMS] for t in range(NUM_TEAMS)]
+        vector[0] += g * self.obstacle_points[correct]
+        actions.append((GUESS, vector))
+        return actions
+
+    def value(self, mask, correct, hints, turns):
+        """Expected points still to come for each team, starting from the team to move."""
+        if mask == self.full_mask:
+            return (self.final_value, 0.0, 0.0, 0.0)
+        if turns >= self.total_turns:
+            return (0.0, 0.0, 0.0, 0.0)
+        if self.table is not None:
+            return self.table[self.index(mask, correct, hints, turns)].tolist()
+
+        key = (mask, correct, hints, turns)
+        vector = self._memo.get(key)
+        if vector is None:
+            # Ties go to the lowest square, then to guessing, as in build_table()
+            best = None
+            for _, candidate in self.action_values(mask, correct, hints, turns):
+                if best is None or candidate[0] > best[0]:
+                    best = candidate
+            vector = self._memo[key] = tuple(best)
+        return vector
+
+    # Table mode
+
+    def _index_tables(self):
+        """Offsets that map a state to its row in the flat value table.
+
+        States are grouped by mask; within a mask, by (parts shown, hints)
+        pair, and within a pair by turns played beyond the number of open
+        squares (that is, wrong Obstacle guesses so far).
+        """
+        size = self.size
+        hint_count = len(self.layout.center_squares)
+        masks = np.arange(1 << size, dtype=np.int64)
+        self.mask_open = _popcount(masks)
+        self.mask_hints = _popcount(masks & self.hint_mask)
+
+        # pair_offset[n, k, c, h]: position of (c, h) among the valid pairs for
+        # n open squares of which k are hint squares
+        self.pair_offset = np.full((size + 1, hint_count + 1, size + 1, hint_count + 1), -1,
+                                   dtype=np.int64)
+        pair_count = np.zeros((size + 1, hint_count + 1), dtype=np.int64)
+        for n in range(size + 1):
+            for k in range(min(n, hint_count) + 1):
+                if n - k > size - hint_count:
+                    continue
+                for c in range(n + 1):
+                    for h in range(max(0, c - (n - k)), min(c, k) + 1):
+                        self.pair_offset[n, k, c, h] = pair_count[n, k]
+                        pair_count[n, k] += 1
+
+        self.turn_width = self.total_turns - np.arange(size + 1, dtype=np.int64) + 1
+        block = pair_count[self.mask_open, self.mask_hints] * self.turn_width[self.mask_open]
+        self.mask_base = np.concatenate(([0], np.cumsum(block)[:-1]))
+        self.table_rows = int(block.sum())
+        # Plain-list copies for single lookups, which NumPy scalars would slow down
+        self._lookup = (self.mask_base.tolist(), self.mask_open.tolist(),
+                        self.mask_hints.tolist(), self.pair_offset.tolist(),
+                        self.turn_width.tolist())
+
+    def index(self, mask, correct, hints, turns):
+        """Row of a state in the value table."""
+        base, opened, hinted, pair_offset, turn_width = self._lookup
+        n = opened[mask]
+        return base[mask] + pair_offset[n][hinted[mask]][correct][hints] * turn_width[n] + turns - n
+
+    def build_table(self):
+        """Solve every state at once and switch advise() to table lookups.
+
+        Works backwards one turn at a time, so each layer only reads the
+        layer after it. Returns the (rows, 4) float32 table.
+        """
+        size = self.size
+        hint_count = len(self.layout.center_squares)
+        # Every (mask, parts shown, hints) combination, with the row its turns start at
+        masks, corrects, hints = [], [], []
+        for n in range(size + 1):
+            for k in range(min(n, hint_count) + 1):
+                group = np.flatnonzero((self.mask_open == n) & (self.mask_hints == k))
+                if not len(group):
+                    continue
+                for c in range(n + 1):
+                    for h in range(max(0, c - (n - k)), min(c, k) + 1):
+                        masks.append(group)
+                        corrects.append(np.full(len(group), c, dtype=np.int64))
+                        hints.append(np.full(len(group), h, dtype=np.int64))
+        masks = np.concatenate(masks)
+        corrects = np.concatenate(corrects)
+        hints = np.concatenate(hints)
+        opened = self.mask_open[masks]
+
+        table = np.zeros((self.table_rows, NUM_TEAMS), dtype=np.float32)
+        full = masks == self.full_mask
+        # A full board goes straight to the final guess, whatever the turn
+        for turns in range(size, self.total_turns + 1):
+            table[self._rows(masks[full], corrects[full], hints[full], opened[full], turns), 0] = \
+                self.final_value
+
+        points = np.asarray(self.obstacle_points, dtype=np.float32)
+        rotate = [(t - 1) % NUM_TEAMS for t in range(NUM_TEAMS)]
+        for turns in range(self.total_turns - 1, -1, -1):
+            live = (opened <= turns) & ~full
+            m, c, h, n = masks[live], corrects[live], hints[live], opened[live]
+            rows = self._rows(m, c, h, n, turns)
+
+            best = np.full((len(rows), NUM_TEAMS), -np.inf, dtype=np.float32)
+            for k in range(size):
+                bit = 1 << k
+                free = (m & bit) == 0
+                if not free.any():
+                    continue
+                p = self.square_probs[k]
+                mf, cf, hf, nf = m[free] | bit, c[free], h[free], n[free] + 1
+                right = table[self._rows(mf, cf + 1, hf + bool(bit & self.hint_mask), nf, turns + 1)]
+                wrong = table[self._rows(mf, cf, hf, nf, turns + 1)]
+                vector = p * right[:, rotate] + (1 - p) * wrong[:, rotate]
+                vector[:, 0] += p * self.square_points[k]
+                _keep_better(best, vector, free)
+
+            g = np.minimum(1.0, self.model.guess_base + self.model.guess_per_tile * c
+                           + self.model.guess_per_hint * h).astype(np.float32)
+            wrong = table[self._rows(m, c, h, n, turns + 1)]
+            vector = (1 - g)[:, None] * wrong[:, rotate]
+            vector[:, 0] += g * points[c]
+            _keep_better(best, vector, np.ones(len(rows), dtype=bool))
+            table[rows] = best
+
+        self.table = table
+        self._memo.clear()
+        return table
+
+    def _rows(self, masks, corrects, hints, opened, turns):
+        return (self.mask_base[masks]
+                + self.pair_offset[opened, self.mask_hints[masks], corrects, hints]
+                * self.turn_width[opened]
+                + turns - opened)
+
+    def save_table(self, path):
+        """Write the built table: one JSON header line, then raw float32 rows."""
+        header = {
+            "format": TABLE_FORMAT,
+            "grid": [self.layout.rows, self.layout.cols],
+            "model": _model_params(self.model),
+            "rows": self.table_rows,
+        }
+        with open(path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(np.ascontiguousarray(self.table, dtype="<f4").tobytes())
+
+    @classmethod
+    def load_table(cls, path):
+        """Return an Advisor reading a saved table through a memory map."""
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            offset = f.tell()
+        if header.get("format") != TABLE_FORMAT:
+            raise ValueError(f"'{path}' is not an advisor table of format {TABLE_FORMAT}.")
+        params = dict(header["model"])
+        params["square_probs"] = {int(k): v for k, v in params["square_probs"].items()}
+        advisor = cls(SkillModel(**params), GridLayout(*header["grid"]))
+        if header["rows"] != advisor.table_rows:
+            raise ValueError(f"'{path}' does not match its grid size.")
+        advisor.table = np.memmap(path, dtype="<f4", mode="r", offset=offset,
+                                  shape=(advisor.table_rows, NUM_TEAMS))
+        return advisor
+
+
+class AdvisedModel(SkillModel):
+    """A SkillModel team that plays the advisor's best action every turn."""
+
+    def __init__(self, advisor):
+        params = _model_params(advisor.model)
+        super().__init__(**params)
+        self.advisor = advisor
+
+    def wants_to_guess(self, game, rng):
+        return self.advisor.best_action(game) == GUESS
+
+    def choose_square(self, game, rng):
+        return game.layout.positions[self.advisor.best_action(game)]
+
+
+def _keep_better(best, vector, where):
+    """Where `vector` beats `best` for the team to move, take it (strictly, so earlier actions win ties)."""
+    current = best[where]
+    better = vector[:, 0] > current[:, 0]
+    current[better] = vector[better]
+    best[where] = current
+
+
+def _popcount(values):
+    count = np.zeros_like(values)
+    while values.any():
+        count += values & 1
+        values = values >> 1
+    return count
+
+
+def _model_params(model):
+    return {
+        "p_easy": model.p_easy,
+        "p_medium": model.p_medium,
+        "square_probs": dict(model.square_probs),
+        "guess_base": model.guess_base,
+        "guess_per_tile": model.guess_per_tile,
+        "guess_per_hint": model.guess_per_hint,
+        "guess_threshold": model.guess_threshold,
+        "p_final": model.p_final,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Expected-value advice for the Obstacle round.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_model_args(cmd):
+        cmd.add_argument("--p-easy", type=float, default=0.7)
+        cmd.add_argument("--p-medium", type=float, default=0.5)
+        cmd.add_argument("--guess-base", type=float, default=0.0)
+        cmd.add_argument("--guess-per-tile", type=float, default=0.05)
+        cmd.add_argument("--guess-per-hint", type=float, default=0.1)
+        cmd.add_argument("--p-final", type=float, default=0.6)
+
+    build_cmd = commands.add_parser("build", help="build and save the full table")
+    build_cmd.add_argument("table")
+    add_model_args(build_cmd)
+
+    advise_cmd = commands.add_parser("advise", help="rank the actions for a position")
+    advise_cmd.add_argument("--table", help="a saved table (its model overrides the options)")
+    advise_cmd.add_argument("--open", default="", help="comma-separated squares already opened")
+    advise_cmd.add_argument("--correct", default="", help="which of those were answered correctly")
+    advise_cmd.add_argument("--wrong-guesses", type=int, default=0)
+    add_model_args(advise_cmd)
+
+    args = parser.parse_args(argv)
+    if args.command == "advise" and args.table:
+        advisor = Advisor.load_table(args.table)
+    else:
+        advisor = Advisor(SkillModel(p_easy=args.p_easy, p_medium=args.p_medium,
+                                     guess_base=args.guess_base, guess_per_tile=args.guess_per_tile,
+                                     guess_per_hint=args.guess_per_hint, p_final=args.p_final))
+
+    if args.command == "build":
+        advisor.build_table()
+        advisor.save_table(args.table)
+        print(f"wrote {advisor.table_rows} states ({advisor.table.nbytes >> 20} MB) to {args.table}")
+        return 0
+
+    opened = [int(s) for s in args.open.split(",") if s]
+    correct = [int(s) for s in args.correct.split(",") if s]
+    mask = sum(1 << (s - 1) for s in opened)
+    hints = sum(1 for s in correct if s in advisor.layout.center_squares)
+    turns = len(opened) + args.wrong_guesses
+    if mask == advisor.full_mask or turns >= advisor.total_turns:
+        print("No actions left in this position.")
+        return 1
+    print(f"Team {turns % NUM_TEAMS + 1} to move")
+    values = advisor.action_values(mask, len(correct), hints, turns)
+    for action, vector in sorted(values, key=lambda item: -item[1][0]):
+        label = "Guess Obstacle" if action == GUESS else f"Square {action}"
+        print(f"{label:<16} {vector[0]:7.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Non-modal answer box with a thinking-time countdown, shown under the board."""
+import math
+import tkinter as tk
+
+from countdown import Countdown
+
+WARNING_SECONDS = 10  # The countdown turns red with this many seconds left
+PROMPT_WIDTH = 420  # Pixels before the question text wraps
+
+
+class AnswerPanel:
+    """Question, answer entry and countdown packed into the game screen.
+
+    Unlike a modal dialog the main loop keeps running while the panel is
+    open, so timers, buzzers and the rest of the window stay live. ask()
+    returns at once; `on_answer(text)` is called on submit, or with None
+    when the time runs out.
+    """
+
+    def __init__(self, parent):
+        self.frame = tk.Frame(parent, bd=1, relief="groove", padx=10, pady=6)
+        self.title_label = tk.Label(self.frame, font=("Arial", 12, "bold"))
+        self.title_label.grid(row=0, column=0, sticky="w")
+        self.time_label = tk.Label(self.frame, font=("Courier", 14, "bold"))
+        self.time_label.grid(row=0, column=1, sticky="e")
+        self.prompt_label = tk.Label(self.frame, font=("Arial", 11), justify="left",
+                                     wraplength=PROMPT_WIDTH)
+        self.prompt_label.grid(row=1, column=0, columnspan=2, sticky="w", pady=4)
+        self.entry = tk.Entry(self.frame, width=40, font=("Arial", 12))
+        self.entry.grid(row=2, column=0, sticky="we")
+        self.entry.bind("<Return>", lambda event: self.submit())
+        self.submit_btn = tk.Button(self.frame, text="Submit", command=self.submit)
+        self.submit_btn.grid(row=2, column=1, padx=(6, 0))
+        self.countdown = None
+        self.on_answer = None
+
+    @property
+    def active(self):
+        return self.on_answer is not None
+
+    def ask(self, title, prompt, seconds, on_answer):
+        """Show a question; `seconds` of None means no time limit."""
+        self.cancel()
+        self.on_answer = on_answer
+        self.title_label.config(text=title)
+        self.prompt_label.config(text=prompt)
+        self.time_label.config(text="", fg="black")
+        self.entry.delete(0, tk.END)
+        self.frame.pack(pady=5, fill="x")
+        self.entry.focus_set()
+        if seconds is not None:
+            self.countdown = Countdown(self.frame, seconds, self._show_time, self._expired).start()
+
+    def submit(self):
+        if self.active:
+            self._finish(self.entry.get())
+
+    def cancel(self):
+        """Close the panel without answering."""
+        if self.countdown is not None:
+            self.countdown.cancel()
+            self.countdown = None
+        self.on_answer = None
+        self.frame.pack_forget()
+
+    def _show_time(self, seconds_left):
+        whole = math.ceil(seconds_left)
+        self.time_label.config(text=f"{whole // 60}:{whole % 60:02d}",
+                               fg="red" if whole <= WARNING_SECONDS else "black")
+
+    def _expired(self):
+        self.time_label.config(text="0:00", fg="red")
+        self._finish(None)
+
+    def _finish(self, answer):
+        on_answer = self.on_answer
+        self.cancel()
+        on_answer(answer)
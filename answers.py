@@ -0,0 +1,221 @@
+"""Answer checking that forgives case, accents, spacing, punctuation and small typos.
+
+An AnswerKey is compiled once per correct answer when a set is loaded.
+Submissions are compared after folding case and accents (including
+Vietnamese đ) and dropping spaces and punctuation, so "carbon dioxide ",
+"Carbon-Dioxide" and "CARBON DIOXIDE" all match "Carbon dioxide". Answers
+that are numbers match by value instead ("4.0", "8/2" and "+4" all match
+"4"), and never by edit distance. Text answers also accept a few typos:
+none for 1-3 letters, one up to 8 letters, and two beyond that. A question
+may list extra accepted spellings as "aliases" in its JSON, and a set may
+list "obstacle_aliases":
+
+    {"square": 6, "question": "...", "answer": "Carbon dioxide", "aliases": ["CO2"]}
+
+AnswerKey.grade() and grade() check thousands of submissions at once,
+running the edit-distance check for every distinct submission in a
+single NumPy pass.
+"""
+import re
+import unicodedata
+from fractions import Fraction
+
+# Letters that Unicode decomposition does not split into a base letter and an accent
+FOLD = str.maketrans({"đ": "d", "ð": "d", "ø": "o", "ł": "l", "ß": "ss", "æ": "ae",
+                      "œ": "oe", "ı": "i"})
+NON_WORD = re.compile(r"[\W_]+")
+NUMBER = re.compile(r"([+-]?(?:\d+(?:\.\d*)?|\.\d+))(?:/(\d+))?")
+THOUSANDS = re.compile(r"[+-]?\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+
+
+def fold(text):
+    """Lower-case `text` and strip its accents."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).translate(FOLD)
+
+
+def compact(text):
+    """The form answers are compared in: folded, with spaces and punctuation removed."""
+    return NON_WORD.sub("", fold(text))
+
+
+def parse_number(text):
+    """Return the value of a number or fraction as a Fraction, or None if `text` is not one.
+
+    "1,000" is a thousand; any other comma is a decimal point ("0,5").
+    """
+    text = "".join(fold(text).split())
+    if THOUSANDS.fullmatch(text):
+        text = text.replace(",", "")
+    else:
+        text = text.replace(",", ".")
+    match = NUMBER.fullmatch(text)
+    if match is None:
+        return None
+    value = Fraction(match.group(1))
+    if match.group(2) is not None:
+        if int(match.group(2)) == 0:
+            return None
+        value /= int(match.group(2))
+    return value
+
+
+def edit_budget(length):
+    """Typos forgiven in a text answer of `length` compact characters."""
+    if length <= 3:
+        return 0
+    if length <= 8:
+        return 1
+    return 2
+
+
+def within_edits(a, b, limit):
+    """Return True if a and b are at most `limit` insertions, deletions or substitutions apart."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+class AnswerKey:
+    """A correct answer and its aliases, normalized once for repeated checking."""
+
+    def __init__(self, answer, aliases=(), max_edits=None):
+        self.answer = answer
+        self.forms = set()
+        self.numbers = set()
+        for text in (answer, *aliases):
+            number = parse_number(text)
+            if number is not None:
+                self.numbers.add(number)
+                continue
+            form = compact(text)
+            if form:
+                self.forms.add(form)
+        # Near misses are only checked against text answers
+        self.fuzzy = []
+        for form in sorted(self.forms):
+            limit = edit_budget(len(form)) if max_edits is None else max_edits
+            if limit:
+                self.fuzzy.append((form, limit))
+
+    def __repr__(self):
+        return f"AnswerKey({self.answer!r})"
+
+    def matches(self, text):
+        """Return True if a submitted answer counts as correct."""
+        if not isinstance(text, str):
+            return False
+        if self.numbers:
+            number = parse_number(text)
+            if number is not None and number in self.numbers:
+                return True
+        form = compact(text)
+        if not form:
+            return False
+        if form in self.forms:
+            return True
+        return any(within_edits(form, target, limit) for target, limit in self.fuzzy)
+
+    def grade(self, submissions):
+        """Return a NumPy bool array saying which of `submissions` are correct.
+
+        Each distinct submission is normalized once, then every one still
+        unmatched is checked for near misses in a single vectorized pass.
+        """
+        import numpy as np
+
+        texts = [text if isinstance(text, str) else "" for text in submissions]
+        if not texts:
+            return np.zeros(0, dtype=bool)
+        unique, inverse = np.unique(np.array(texts, dtype=str), return_inverse=True)
+        correct = np.zeros(len(unique), dtype=bool)
+        pending = []
+        forms = []
+        for index, text in enumerate(unique.tolist()):
+            if self.numbers:
+                number = parse_number(text)
+                if number is not None and number in self.numbers:
+                    correct[index] = True
+                    continue
+            form = compact(text)
+            if form in self.forms:
+                correct[index] = True
+            elif form and self.fuzzy:
+                pending.append(index)
+                forms.append(form)
+        if pending:
+            pending = np.array(pending)
+            codes, lengths = _code_points(forms)
+            near = np.zeros(len(pending), dtype=bool)
+            for target, limit in self.fuzzy:
+                near |= _edit_distances(codes, lengths, target, limit) <= limit
+            correct[pending[near]] = True
+        return correct[inverse.reshape(-1)]
+
+
+def grade(keys, submissions):
+    """Grade parallel sequences of AnswerKeys and submissions; returns a NumPy bool array.
+
+    Submissions are grouped by key, so each question's answers are checked
+    in one AnswerKey.grade() pass.
+    """
+    import numpy as np
+
+    result = np.zeros(len(submissions), dtype=bool)
+    groups = {}
+    for index, key in enumerate(keys):
+        groups.setdefault(id(key), (key, []))[1].append(index)
+    for key, indices in groups.values():
+        result[indices] = key.grade([submissions[i] for i in indices])
+    return result
+
+
+def _code_points(forms):
+    """Pack strings into an (n, longest) array of code points, zero-padded, and their lengths."""
+    import numpy as np
+
+    array = np.array(forms, dtype=str)
+    width = array.dtype.itemsize // 4
+    codes = array.view(np.uint32).reshape(len(forms), width)
+    return codes, np.char.str_len(array)
+
+
+def _edit_distances(codes, lengths, target, limit):
+    """Levenshtein distance from each packed string to `target`, capped at limit + 1.
+
+    One NumPy step per submitted character: substitutions and deletions
+    come from the previous row, and insertions along the row are a
+    running minimum of (row - column) plus the column.
+    """
+    import numpy as np
+
+    count = len(codes)
+    cap = limit + 1
+    target_codes = np.array([ord(c) for c in target], dtype=np.uint32)
+    columns = np.arange(len(target) + 1, dtype=np.int32)
+    distances = np.full(count, cap, dtype=np.int32)
+    close = np.abs(lengths - len(target)) <= limit
+    if not close.any():
+        return distances
+    codes = codes[close]
+    lengths = lengths[close]
+    row = np.broadcast_to(columns, (len(codes), len(columns))).copy()
+    for i in range(int(lengths.max())):
+        current = np.empty_like(row)
+        current[:, 0] = i + 1
+        substituted = row[:, :-1] + (codes[:, i, None] != target_codes)
+        current[:, 1:] = np.minimum(row[:, 1:] + 1, substituted)
+        current = np.minimum.accumulate(current - columns, axis=1) + columns
+        np.minimum(current, cap, out=current)
+        # Strings that have already ended keep their last row
+        row = np.where((lengths > i)[:, None], current, row)
+    distances[close] = np.minimum(row[:, -1], cap)
+    return distances
@@ -0,0 +1,408 @@
+"""SQLite question bank for generating rounds from a large pool of questions.
+
+The bank holds easy and medium questions (mediums need a hint), each with
+an optional topic, plus Obstacles with their final hint and image. Imports
+read JSON Lines or one large JSON array record by record, so a file of any
+size is never loaded whole:
+
+    {"difficulty": "easy", "topic": "algebra", "question": "...", "answer": "4"}
+    {"difficulty": "medium", "question": "...", "answer": "...", "hint": "...", "aliases": ["..."]}
+    {"obstacle_answer": "Binary Search", "final_hint": "...", "image": "img/bs.png"}
+
+A generated round fills the outer squares with easy questions and the
+central ones with mediums (12 and 4 on a 4x4 board), and is written to the
+problems folder as a normal questions_NNN.json and image_NNN.png. Within a
+tournament no question or Obstacle is used twice. Each row carries a random
+key, and sampling seeks an index on (difficulty, topic, key) from random
+points, so a round is drawn in a few index lookups at any bank size.
+
+    python bank.py import questions.jsonl obstacles.json
+    python bank.py import-sets problems
+    python bank.py generate --tournament spring-2025 --rounds 5
+    python bank.py stats
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+
+from engine import DEFAULT_LAYOUT, GridLayout
+from question_set import (PROBLEMS_DIR, QuestionSetError, find_question_ids, load_question_set,
+                          question_set_paths)
+
+BANK_FILE = os.path.join(PROBLEMS_DIR, "bank.sqlite")
+DIFFICULTIES = ("easy", "medium")
+IMPORT_BATCH = 2000  # Rows per executemany() during an import
+READ_CHUNK = 1 << 16  # Characters read at a time from an import file
+RANDOM_KEY_BITS = 62
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    difficulty TEXT NOT NULL,
+    topic TEXT NOT NULL DEFAULT '',
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    hint TEXT,
+    aliases TEXT,
+    rnd INTEGER NOT NULL,
+    UNIQUE (question, answer)
+);
+CREATE INDEX IF NOT EXISTS questions_by_difficulty ON questions (difficulty, rnd);
+CREATE INDEX IF NOT EXISTS questions_by_topic ON questions (difficulty, topic, rnd);
+CREATE TABLE IF NOT EXISTS obstacles (
+    id INTEGER PRIMARY KEY,
+    answer TEXT NOT NULL UNIQUE,
+    final_hint TEXT NOT NULL,
+    image TEXT NOT NULL,
+    topic TEXT NOT NULL DEFAULT '',
+    aliases TEXT,
+    rnd INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS obstacles_by_topic ON obstacles (topic, rnd);
+CREATE TABLE IF NOT EXISTS used_questions (
+    tournament TEXT NOT NULL,
+    question INTEGER NOT NULL,
+    PRIMARY KEY (tournament, question)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS used_obstacles (
+    tournament TEXT NOT NULL,
+    obstacle INTEGER NOT NULL,
+    PRIMARY KEY (tournament, obstacle)
+) WITHOUT ROWID;
+"""
+
+
+class BankError(Exception):
+    """The bank cannot supply a round, or an import file is malformed."""
+
+
+def iter_json_records(f, chunk_size=READ_CHUNK):
+    """Yield the objects of a JSON array or of JSON Lines from a text file, one at a time."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    consumed = 0  # Characters dropped from the front of the buffer so far
+    at_end = False
+    while True:
+        # Skip whitespace and the array's brackets and commas between records
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            position += 1
+        if position == len(buffer) and at_end:
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            if at_end:
+                raise BankError(f"Malformed JSON at character {consumed + position}.")
+        else:
+            if end < len(buffer) or at_end:
+                position = end
+                yield record
+                continue
+            # A number or literal may continue in the next chunk
+        chunk = f.read(chunk_size)
+        at_end = not chunk
+        consumed += position
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+class SampledRound:
+    """Questions and an Obstacle drawn for one round, not yet written out."""
+
+    def __init__(self, layout, questions, obstacle):
+        self.layout = layout
+        self.questions = questions  # square -> (id, question, answer, hint, aliases)
+        self.obstacle = obstacle  # (id, answer, final_hint, image, aliases)
+
+    def to_json(self):
+        """The round as questions_NNN.json data."""
+        questions = []
+        for square in sorted(self.questions):
+            _, question, answer, hint, aliases = self.questions[square]
+            entry = {"square": square, "question": question, "answer": answer}
+            if hint is not None and square in self.layout.center_squares:
+                entry["hint"] = hint
+            if aliases:
+                entry["aliases"] = json.loads(aliases)
+            questions.append(entry)
+        _, answer, final_hint, _, aliases = self.obstacle
+        data = {"questions": questions, "obstacle_answer": answer, "final_hint": final_hint}
+        if aliases:
+            data["obstacle_aliases"] = json.loads(aliases)
+        if self.layout != DEFAULT_LAYOUT:
+            data["grid"] = [self.layout.rows, self.layout.cols]
+        return data
+
+
+class QuestionBank:
+    """A question bank stored in one SQLite file."""
+
+    def __init__(self, path=BANK_FILE, seed=None):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.rng = random.Random(seed)
+
+    def close(self):
+        self.db.close()
+
+    def import_file(self, path):
+        """Stream one JSON or JSON Lines file into the bank; returns (added, skipped) counts.
+
+        Relative image paths are taken from the file's folder. Records that
+        are incomplete, have an unknown difficulty or are mediums without a
+        hint are skipped, as are exact duplicates.
+        """
+        base = os.path.dirname(os.path.abspath(path))
+        with open(path, encoding="utf-8") as f:
+            return self.import_records(iter_json_records(f), base)
+
+    def import_records(self, records, base="."):
+        added = skipped = 0
+        questions, obstacles = [], []
+        for record in records:
+            row = self._row(record, base)
+            if row is None:
+                skipped += 1
+            elif len(row) == 7:
+                questions.append(row)
+            else:
+                obstacles.append(row)
+            if len(questions) + len(obstacles) >= IMPORT_BATCH:
+                batch_added = self._insert(questions, obstacles)
+                added += batch_added
+                skipped += len(questions) + len(obstacles) - batch_added
+                questions, obstacles = [], []
+        batch_added = self._insert(questions, obstacles)
+        added += batch_added
+        skipped += len(questions) + len(obstacles) - batch_added
+        return added, skipped
+
+    def import_sets(self, problems_dir=PROBLEMS_DIR):
+        """Add the questions and Obstacles of existing question sets; returns (added, skipped)."""
+        records = []
+        for question_id in find_question_ids(problems_dir):
+            try:
+                question_set = load_question_set(question_id, problems_dir)
+            except QuestionSetError:
+                continue
+            center = question_set.layout.center_squares
+            for square, question in question_set.questions.items():
+                records.append({
+                    "difficulty": "medium" if square in center else "easy",
+                    "question": question, "answer": question_set.answers[square],
+                    "hint": question_set.hints.get(square),
+                    "aliases": question_set.aliases.get(square)})
+            records.append({"obstacle_answer": question_set.obstacle_answer,
+                            "final_hint": question_set.final_hint,
+                            "image": os.path.abspath(question_set.image_file),
+                            "obstacle_aliases": question_set.obstacle_aliases})
+        return self.import_records(records)
+
+    def sample_round(self, tournament, layout=DEFAULT_LAYOUT, topic=None):
+        """Draw a round's questions and Obstacle and mark them used in `tournament`.
+
+        Mediums go on the central squares and prefer the Obstacle's topic,
+        since their hints point at it. Raises BankError if the bank has run
+        out of unused questions.
+        """
+        with self.db:
+            obstacle = self._sample_obstacle(tournament, topic)
+            mediums = self._sample("medium", len(layout.center_squares), tournament,
+                                   topic or obstacle[5] or None)
+            easy = self._sample("easy", layout.size - len(layout.center_squares), tournament, topic)
+            self.db.executemany("INSERT INTO used_questions VALUES (?, ?)",
+                                [(tournament, row[0]) for row in mediums + easy])
+            self.db.execute("INSERT INTO used_obstacles VALUES (?, ?)", (tournament, obstacle[0]))
+        squares = {}
+        outer = [s for s in range(1, layout.size + 1) if s not in layout.center_squares]
+        for square, row in zip(layout.center_squares, mediums):
+            squares[square] = row
+        for square, row in zip(outer, easy):
+            squares[square] = row
+        return SampledRound(layout, squares, obstacle[:5])
+
+    def generate_round(self, tournament, problems_dir=PROBLEMS_DIR, layout=DEFAULT_LAYOUT,
+                       topic=None, question_id=None):
+        """Sample a round and write it as a question set; returns its ID."""
+        sampled = self.sample_round(tournament, layout, topic)
+        if question_id is None:
+            question_id = next_free_id(problems_dir)
+        questions_file, image_file = question_set_paths(question_id, problems_dir)
+        image = sampled.obstacle[3]
+        if not os.path.exists(image):
+            raise BankError(f"Obstacle image '{image}' not found.")
+        shutil.copyfile(image, image_file)
+        # The questions file goes last, so the set is never seen half-written
+        tmp_path = f"{questions_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sampled.to_json(), f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, questions_file)
+        return question_id
+
+    def stats(self):
+        """Return counts of questions by difficulty and topic, Obstacles and tournaments."""
+        by_difficulty = dict(self.db.execute(
+            "SELECT difficulty, COUNT(*) FROM questions GROUP BY difficulty"))
+        topics = self.db.execute("SELECT COUNT(DISTINCT topic) FROM questions").fetchone()[0]
+        obstacles = self.db.execute("SELECT COUNT(*) FROM obstacles").fetchone()[0]
+        tournaments = dict(self.db.execute(
+            "SELECT tournament, COUNT(*) FROM used_obstacles GROUP BY tournament"))
+        return {"questions": by_difficulty, "topics": topics, "obstacles": obstacles,
+                "rounds_by_tournament": tournaments}
+
+    def _row(self, record, base):
+        if not isinstance(record, dict):
+            return None
+        aliases = record.get("aliases") or record.get("obstacle_aliases")
+        if aliases is not None and (not isinstance(aliases, list)
+                                    or not all(isinstance(a, str) for a in aliases)):
+            return None
+        aliases = json.dumps(aliases, ensure_ascii=False) if aliases else None
+        topic = record.get("topic") or ""
+        if not isinstance(topic, str):
+            return None
+        rnd = self.rng.getrandbits(RANDOM_KEY_BITS)
+        if "obstacle_answer" in record:
+            answer, final_hint, image = (record.get("obstacle_answer"), record.get("final_hint"),
+                                         record.get("image"))
+            if not all(isinstance(v, str) and v.strip() for v in (answer, final_hint, image)):
+                return None
+            return (answer, final_hint, os.path.join(base, image), topic, aliases, rnd)
+        difficulty, question, answer = (record.get("difficulty"), record.get("question"),
+                                        record.get("answer"))
+        hint = record.get("hint")
+        if (difficulty not in DIFFICULTIES
+                or not all(isinstance(v, str) and v.strip() for v in (question, answer))
+                or (hint is not None and not isinstance(hint, str))
+                or (difficulty == "medium" and not hint)):
+            return None
+        return (difficulty, topic, question, answer, hint, aliases, rnd)
+
+    def _insert(self, questions, obstacles):
+        with self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                "INSERT OR IGNORE INTO questions (difficulty, topic, question, answer, hint, "
+                "aliases, rnd) VALUES (?, ?, ?, ?, ?, ?, ?)", questions)
+            self.db.executemany(
+                "INSERT OR IGNORE INTO obstacles (answer, final_hint, image, topic, aliases, rnd) "
+                "VALUES (?, ?, ?, ?, ?, ?)", obstacles)
+            return self.db.total_changes - before
+
+    def _sample(self, difficulty, count, tournament, topic=None):
+        """Pick `count` unused questions, falling back to any topic if `topic` runs short."""
+        rows = self._probe("questions", "used_questions", "question",
+                           "id, question, answer, hint, aliases",
+                           "difficulty = ?" + (" AND topic = ?" if topic else ""),
+                           [difficulty] + ([topic] if topic else []), count, tournament)
+        if len(rows) < count and topic:
+            rows += self._probe("questions", "used_questions", "question",
+                                "id, question, answer, hint, aliases", "difficulty = ?",
+                                [difficulty], count - len(rows), tournament,
+                                exclude=[row[0] for row in rows])
+        if len(rows) < count:
+            raise BankError(f"Only {len(rows)} unused {difficulty} questions left for "
+                            f"tournament '{tournament}', {count} needed.")
+        return rows
+
+    def _sample_obstacle(self, tournament, topic=None):
+        where, params = ("topic = ?", [topic]) if topic else ("1", [])
+        rows = self._probe("obstacles", "used_obstacles", "obstacle",
+                           "id, answer, final_hint, image, aliases, topic", where, params, 1,
+                           tournament)
+        if not rows:
+            raise BankError(f"No unused Obstacles left for tournament '{tournament}'.")
+        return rows[0]
+
+    def _probe(self, table, used_table, used_column, columns, where, params, count, tournament,
+               exclude=()):
+        """Draw rows by seeking to random keys, skipping ones used in the tournament."""
+        picked = list(exclude)
+        rows = []
+        query = (f"SELECT {columns} FROM {table} WHERE {where} AND rnd >= ? "
+                 f"AND NOT EXISTS (SELECT 1 FROM {used_table} "
+                 f"WHERE tournament = ? AND {used_column} = {table}.id) "
+                 "AND id NOT IN (SELECT value FROM json_each(?)) ORDER BY rnd LIMIT 1")
+        while len(rows) < count:
+            start = self.rng.getrandbits(RANDOM_KEY_BITS)
+            row = None
+            # Wrap around to the lowest key if nothing is left above the random one
+            for lowest in (start, 0):
+                row = self.db.execute(query, params + [lowest, tournament,
+                                                       json.dumps(picked)]).fetchone()
+                if row is not None:
+                    break
+            if row is None:
+                break
+            rows.append(row)
+            picked.append(row[0])
+        return rows
+
+
+def next_free_id(problems_dir=PROBLEMS_DIR):
+    """Return the ID after the highest numbered set in a folder (001 if there are none)."""
+    ids = find_question_ids(problems_dir)
+    if not ids:
+        return "001"
+    last = max(ids, key=int)
+    return f"{int(last) + 1:0{len(last)}d}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a question bank and generate rounds from it.")
+    parser.add_argument("--bank", default=BANK_FILE, help=f"bank file (default: {BANK_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = commands.add_parser("import", help="add questions and Obstacles from JSON files")
+    import_cmd.add_argument("files", nargs="+")
+
+    sets_cmd = commands.add_parser("import-sets", help="add the contents of existing question sets")
+    sets_cmd.add_argument("problems_dir", nargs="?", default=PROBLEMS_DIR)
+
+    generate_cmd = commands.add_parser("generate", help="write new question sets from the bank")
+    generate_cmd.add_argument("--tournament", required=True,
+                              help="no question repeats within a tournament")
+    generate_cmd.add_argument("--rounds", type=int, default=1)
+    generate_cmd.add_argument("--topic")
+    generate_cmd.add_argument("--grid", default="4x4", help="rows x columns (default 4x4)")
+    generate_cmd.add_argument("--problems", default=PROBLEMS_DIR)
+
+    commands.add_parser("stats", help="count what is in the bank")
+    args = parser.parse_args(argv)
+
+    bank = QuestionBank(args.bank)
+    try:
+        if args.command == "import":
+            for path in args.files:
+                added, skipped = bank.import_file(path)
+                print(f"{path}: added {added}, skipped {skipped}")
+        elif args.command == "import-sets":
+            added, skipped = bank.import_sets(args.problems_dir)
+            print(f"added {added}, skipped {skipped} (duplicates or incomplete)")
+        elif args.command == "generate":
+            rows, _, cols = args.grid.partition("x")
+            layout = GridLayout(int(rows), int(cols or rows))
+            for _ in range(args.rounds):
+                question_id = bank.generate_round(args.tournament, args.problems, layout,
+                                                  args.topic)
+                print(f"wrote set {question_id}")
+        else:
+            print(json.dumps(bank.stats(), indent=2, ensure_ascii=False))
+    except (BankError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        bank.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Benchmark the expected-value advisor: full-table build time and memory, and query time.
+
+    python benchmarks/bench_advisor.py
+    python benchmarks/bench_advisor.py --rows 3 --cols 3 --games 20000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from advisor import Advisor, AdvisedModel  # noqa: E402
+from engine import GridLayout, ObstacleGame, SkillModel, simulate  # noqa: E402
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def mid_game(layout, model, rng, turns):
+    """A game advanced `turns` turns by random squares and the model's answers."""
+    game = ObstacleGame(layout)
+    for _ in range(turns):
+        i, j = rng.choice(game.unrevealed)
+        game.answer_square(i, j, model.answers_correctly(game, game.grid_order[i][j], rng))
+    return game
+
+
+def time_queries(advisor, games):
+    start = time.perf_counter()
+    for game in games:
+        advisor.advise(game)
+    return (time.perf_counter() - start) / len(games) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=4)
+    parser.add_argument("--cols", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--games", type=int, default=0,
+                        help="also simulate this many advised games and compare with the table")
+    args = parser.parse_args()
+
+    layout = GridLayout(args.rows, args.cols)
+    model = SkillModel()
+    rng = random.Random(1)
+    baseline = peak_rss_mb()
+
+    advisor = Advisor(model, layout)
+    start = time.perf_counter()
+    advisor.build_table()
+    build = time.perf_counter() - start
+    print(f"{layout}: {advisor.table_rows} states, table {advisor.table.nbytes / (1 << 20):.0f} MB")
+    print(f"build          {build:8.2f} s     peak RSS +{peak_rss_mb() - baseline:.0f} MB")
+
+    games = [mid_game(layout, model, rng, rng.randrange(layout.size)) for _ in range(args.queries)]
+    print(f"query (table)  {time_queries(advisor, games):8.1f} us")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "advisor.table")
+        advisor.save_table(path)
+        mapped = Advisor.load_table(path)
+        print(f"query (mmap)   {time_queries(mapped, games):8.1f} us")
+        del mapped
+
+    # Memoized search only pays off late in the round, when few squares are left
+    for remaining in (4, 6, 8):
+        late = mid_game(layout, model, rng, max(0, layout.size - remaining))
+        fresh = Advisor(model, layout)
+        start = time.perf_counter()
+        fresh.advise(late)
+        print(f"memo search, {remaining} squares left {(time.perf_counter() - start) * 1000:9.1f} ms "
+              f"({len(fresh._memo)} states)")
+
+    if args.games:
+        result = simulate([AdvisedModel(advisor)] * 4, games=args.games, seed=2, layout=layout)
+        predicted = ", ".join(f"{v:.2f}" for v in advisor.value(0, 0, 0, 0))
+        simulated = ", ".join(f"{v:.2f}" for v in result.mean_scores())
+        print(f"expected scores: table [{predicted}]  simulated [{simulated}]")
+
+
+if __name__ == "__main__":
+    main()
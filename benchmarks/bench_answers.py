@@ -0,0 +1,90 @@
+"""Benchmark answer grading: plain lower() comparison, AnswerKey.matches() and batch grade().
+
+Submissions are made from the answers in problems/: exact, re-cased,
+re-spaced, accented, misspelled, written as another number, or wrong.
+
+    python benchmarks/bench_answers.py --submissions 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from answers import grade, parse_number  # noqa: E402
+from question_set import PROBLEMS_DIR, find_question_ids, load_question_set  # noqa: E402
+
+ACCENTS = {"a": "á", "e": "é", "i": "í", "o": "ô", "u": "ü"}
+
+
+def variant(answer, wrong, rng):
+    """A plausible submission for `answer`."""
+    kind = rng.random()
+    if kind < 0.3:
+        return answer
+    if kind < 0.45:
+        return answer.upper() if rng.random() < 0.5 else f"  {answer.lower()} "
+    if kind < 0.55:
+        return "".join(ACCENTS.get(c, c) if rng.random() < 0.3 else c for c in answer)
+    if kind < 0.7 and parse_number(answer) is None and len(answer) > 3:
+        chars = list(answer)
+        chars[rng.randrange(len(chars))] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        return "".join(chars)
+    if kind < 0.7:
+        return f"{parse_number(answer)}.0" if parse_number(answer) is not None else answer
+    if kind < 0.9:
+        return wrong
+    return "".join(rng.choice("abcdefghij ") for _ in range(rng.randint(1, 20)))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=200000)
+    parser.add_argument("--problems", default=os.path.join(ROOT, PROBLEMS_DIR))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pool = []
+    for question_id in find_question_ids(args.problems):
+        question_set = load_question_set(question_id, args.problems)
+        for square, answer in question_set.answers.items():
+            pool.append((question_set.answer_keys[square], answer))
+        pool.append((question_set.obstacle_key, question_set.obstacle_answer))
+    rng = random.Random(args.seed)
+    all_answers = [answer for _, answer in pool]
+    keys, expected, submissions = [], [], []
+    for _ in range(args.submissions):
+        key, answer = rng.choice(pool)
+        keys.append(key)
+        expected.append(answer)
+        submissions.append(variant(answer, rng.choice(all_answers), rng))
+    n = len(submissions)
+
+    plain, plain_time = timed(lambda: [s.lower() == a.lower() for s, a in zip(submissions, expected)])
+    single, single_time = timed(lambda: [k.matches(s) for k, s in zip(keys, submissions)])
+    batch, batch_time = timed(lambda: grade(keys, submissions))
+    # Worst case for the batch: every submission distinct, so none are deduplicated
+    distinct = [f"{s} {i}" if not ok else s for i, (s, ok) in enumerate(zip(submissions, batch))]
+    _, distinct_time = timed(lambda: grade(keys, distinct))
+
+    if list(batch) != single:
+        sys.exit("FAIL: batch grading disagrees with AnswerKey.matches()")
+    print(f"{n} submissions against {len(pool)} answers from {args.problems}")
+    print(f"plain lower() ==         {n / plain_time:12,.0f} /s   accepted {sum(plain) / n:6.1%}")
+    print(f"AnswerKey.matches()      {n / single_time:12,.0f} /s   accepted {sum(single) / n:6.1%}")
+    print(f"grade() batch            {n / batch_time:12,.0f} /s   "
+          f"({single_time / batch_time:.1f}x matches())")
+    print(f"grade(), all distinct    {n / distinct_time:12,.0f} /s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark the question bank: streaming import, then round sampling with no repeats.
+
+Writes a synthetic bank as one large JSON array, imports it while tracking
+peak memory, then draws rounds for a tournament and checks that no
+question or Obstacle comes up twice.
+
+    python benchmarks/bench_bank.py --questions 50000 --rounds 1000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bank import QuestionBank  # noqa: E402
+
+TOPICS = ["algebra", "geometry", "algorithms", "physics", "history", "chemistry", "biology",
+          "geography"]
+
+
+def peak_rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def write_bank_file(path, questions, obstacles, image, rng):
+    """Write the records as one JSON array, a record at a time."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for n in range(questions):
+            medium = rng.random() < 0.3
+            record = {"difficulty": "medium" if medium else "easy", "topic": rng.choice(TOPICS),
+                      "question": f"Question {n}: " + "lorem ipsum " * rng.randint(2, 12),
+                      "answer": f"answer {n}"}
+            if medium:
+                record["hint"] = f"Hint {n}"
+            f.write(json.dumps(record) + ",\n")
+        for n in range(obstacles):
+            record = {"obstacle_answer": f"Obstacle {n}", "final_hint": f"Final hint {n}",
+                      "image": image, "topic": rng.choice(TOPICS)}
+            f.write(json.dumps(record) + (",\n" if n < obstacles - 1 else "\n"))
+        f.write("]\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=50000)
+    parser.add_argument("--obstacles", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    image = os.path.join(ROOT, "problems", "image_001.png")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "bank.json")
+        write_bank_file(source, args.questions, args.obstacles, image, rng)
+        size_mb = os.path.getsize(source) / (1 << 20)
+
+        bank = QuestionBank(os.path.join(tmp, "bank.sqlite"), seed=args.seed)
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        added, skipped = bank.import_file(source)
+        elapsed = time.perf_counter() - start
+        print(f"import {size_mb:.1f} MB JSON array: {added} records in {elapsed:.2f} s "
+              f"({added / elapsed:,.0f}/s), peak RSS +{peak_rss_mb() - baseline:.1f} MB, "
+              f"{skipped} skipped")
+
+        times = []
+        seen_questions, seen_obstacles = set(), set()
+        repeats = 0
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            sampled = bank.sample_round("bench")
+            times.append((time.perf_counter() - start) * 1000)
+            ids = [row[0] for row in sampled.questions.values()]
+            repeats += len(seen_questions.intersection(ids)) + (sampled.obstacle[0] in seen_obstacles)
+            seen_questions.update(ids)
+            seen_obstacles.add(sampled.obstacle[0])
+        times.sort()
+        print(f"sample_round x{args.rounds}: median {statistics.median(times):.2f} ms, "
+              f"p99 {times[int(0.99 * (len(times) - 1))]:.2f} ms, max {times[-1]:.2f} ms, "
+              f"{repeats} repeats")
+
+        out = os.path.join(tmp, "problems")
+        os.makedirs(out)
+        start = time.perf_counter()
+        for _ in range(10):
+            bank.generate_round("bench-files", out)
+        print(f"generate_round with files: {(time.perf_counter() - start) * 100:.2f} ms per round")
+        bank.close()
+        if repeats:
+            sys.exit("FAIL: a question or Obstacle repeated within the tournament")
+
+
+if __name__ == "__main__":
+    main()
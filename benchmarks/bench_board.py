@@ -0,0 +1,113 @@
+"""Benchmark square reveals and full-board rebuilds: Canvas board vs. per-square widgets.
+
+Needs a display; without one it re-runs itself under xvfb-run if available.
+
+    python benchmarks/bench_board.py --rounds 50
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk  # noqa: E402
+
+from PIL import Image, ImageTk  # noqa: E402
+
+from board import BoardCanvas  # noqa: E402
+from engine import GRID_ORDER  # noqa: E402
+
+TILE = 100
+
+
+def make_tiles():
+    colors = [(37 * k % 256, 91 * k % 256, 53 * k % 256) for k in range(16)]
+    tiles = [[ImageTk.PhotoImage(Image.new("RGB", (TILE, TILE), colors[i * 4 + j]))
+              for j in range(4)] for i in range(4)]
+    black = ImageTk.PhotoImage(Image.new("RGB", (TILE, TILE), "black"))
+    return tiles, black
+
+
+def bench_widgets(root, tiles, black, rounds):
+    """The previous approach: a Button per square, destroyed and replaced by a Label."""
+    reveal_times, rebuild_times = [], []
+    frame = tk.Frame(root)
+    frame.pack()
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for widget in frame.winfo_children():
+            widget.destroy()
+        buttons = [[None] * 4 for _ in range(4)]
+        for i in range(4):
+            for j in range(4):
+                btn = tk.Button(frame, text=str(GRID_ORDER[i][j]), width=10, height=5)
+                btn.grid(row=i, column=j, padx=2, pady=2)
+                buttons[i][j] = btn
+        root.update()
+        rebuild_times.append(time.perf_counter() - start)
+
+        for k in range(16):
+            i, j = divmod(k, 4)
+            start = time.perf_counter()
+            buttons[i][j].destroy()
+            label = tk.Label(frame, image=tiles[i][j] if k % 3 else black)
+            label.grid(row=i, column=j, padx=2, pady=2)
+            buttons[i][j] = label
+            root.update()
+            reveal_times.append(time.perf_counter() - start)
+    frame.destroy()
+    return reveal_times, rebuild_times
+
+
+def bench_canvas(root, tiles, black, rounds):
+    """The retained-mode board: one canvas, item updates only."""
+    reveal_times, rebuild_times = [], []
+    board = BoardCanvas(root, GRID_ORDER, (TILE, TILE), lambda i, j: None)
+    board.canvas.pack()
+    for _ in range(rounds):
+        start = time.perf_counter()
+        board.reset()
+        root.update()
+        rebuild_times.append(time.perf_counter() - start)
+
+        for k in range(16):
+            i, j = divmod(k, 4)
+            start = time.perf_counter()
+            board.reveal(i, j, tiles[i][j] if k % 3 else black)
+            root.update()
+            reveal_times.append(time.perf_counter() - start)
+    board.canvas.destroy()
+    return reveal_times, rebuild_times
+
+
+def report(name, reveal_times, rebuild_times):
+    ms = 1000
+    reveal_times = sorted(reveal_times)
+    p95 = reveal_times[int(len(reveal_times) * 0.95) - 1]
+    print(f"{name:8s} reveal  p50 {statistics.median(reveal_times) * ms:7.3f} ms  "
+          f"p95 {p95 * ms:7.3f} ms   rebuild p50 {statistics.median(rebuild_times) * ms:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        if shutil.which("xvfb-run") and not os.environ.get("BENCH_UNDER_XVFB"):
+            os.environ["BENCH_UNDER_XVFB"] = "1"
+            os.execvp("xvfb-run", ["xvfb-run", "-a", sys.executable] + sys.argv)
+        sys.exit("No display available (install Xvfb or set DISPLAY).")
+
+    root = tk.Tk()
+    tiles, black = make_tiles()
+    report("widgets", *bench_widgets(root, tiles, black, args.rounds))
+    report("canvas", *bench_canvas(root, tiles, black, args.rounds))
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
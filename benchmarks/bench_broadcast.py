@@ -0,0 +1,146 @@
+"""Benchmark broadcast frames: dirty-rectangle repaints vs full repaints, and the fixed-rate loop.
+
+Plays a simulated round on a loaded set, one move every --move-every
+frames, and renders every frame both ways into raw RGB written to
+/dev/null, reporting frames per second, CPU per frame and how much of
+the frame was repainted. Checks that both ways give identical frames,
+that frames where nothing changed allocate nothing, and that a
+Broadcaster at --fps writes one frame per tick.
+
+    python benchmarks/bench_broadcast.py --frames 1800 --size 1920x1080
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from broadcast import BoardState, Broadcaster, Compositor, RawSink  # noqa: E402
+from engine import NUM_TEAMS, SkillModel, play_game  # noqa: E402
+from loader import QuestionSetLoader  # noqa: E402
+from question_set import PROBLEMS_DIR  # noqa: E402
+from tile_cache import TileCache  # noqa: E402
+
+TEAMS = [f"Team {i+1}" for i in range(NUM_TEAMS)]
+
+
+class StateRecorder:
+    """A play_game() log that keeps the board state before every move."""
+
+    def __init__(self):
+        self.states = []
+
+    def square(self, game, i, j, correct):
+        self.states.append(BoardState.from_game(game, TEAMS))
+
+    def guess(self, game, correct, team=None):
+        self.states.append(BoardState.from_game(game, TEAMS))
+
+    def final(self, game, correct):
+        self.states.append(BoardState.from_game(game, TEAMS))
+
+
+def timeline(states, frames, move_every):
+    """The state shown in each frame: the round's moves in a loop."""
+    return [states[(n // move_every) % len(states)] for n in range(frames)]
+
+
+def run(compositor, states, sink, full):
+    dirty_pixels = 0
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for state in states:
+        for left, top, right, bottom in compositor.render(state, full):
+            dirty_pixels += (right - left) * (bottom - top)
+        sink.write(compositor.frame)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    frame_pixels = compositor.frame.shape[0] * compositor.frame.shape[1]
+    return len(states) / elapsed, cpu / len(states), dirty_pixels / (len(states) * frame_pixels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--set", default="001", dest="question_id")
+    parser.add_argument("--problems", default=os.path.join(ROOT, PROBLEMS_DIR))
+    parser.add_argument("--frames", type=int, default=1800)
+    parser.add_argument("--move-every", type=int, default=15, help="frames between moves")
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--live-seconds", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    width, _, height = args.size.partition("x")
+    size = (int(width), int(height))
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = QuestionSetLoader(TileCache(os.path.join(tmp, "tiles"), max_entries=16),
+                                   args.problems, pyramid=(0.5, 1.0, 1.5, 2.0, 3.0, 4.0))
+        loaded = loader.load(args.question_id).result()
+        loader.shutdown()
+    question_set = loaded.question_set
+    recorder = StateRecorder()
+    final = play_game([SkillModel()] * NUM_TEAMS, random.Random(args.seed),
+                      question_set.layout, log=recorder)
+    round_states = recorder.states + [BoardState.from_game(final, TEAMS)]
+    states = timeline(round_states, args.frames, args.move_every)
+
+    def compositor():
+        return Compositor(loaded.levels, question_set.layout, question_set.hints,
+                          f"Set {args.question_id}", size)
+
+    # Dirty repaints must give exactly the frames full repaints do
+    dirty, full = compositor(), compositor()
+    for state in timeline(round_states, len(round_states) * 2, 1):
+        dirty.render(state)
+        full.render(state, full=True)
+        if not np.array_equal(dirty.frame, full.frame):
+            sys.exit("FAIL: a dirty-rectangle frame differs from the full repaint")
+
+    print(f"{args.frames} frames at {size[0]}x{size[1]}, a move every {args.move_every} frames "
+          f"({len(round_states)} states in the round), raw RGB to {os.devnull}")
+    with open(os.devnull, "wb") as devnull:
+        sink = RawSink(devnull)
+        for name, full_repaint in (("dirty rectangles", False), ("full repaint", True)):
+            fps, cpu, repainted = run(compositor(), states, sink, full_repaint)
+            print(f"{name:18s} {fps:8.0f} fps   CPU {cpu * 1000:6.3f} ms/frame   "
+                  f"repainted {repainted:6.1%} of the frame")
+
+        # Frames where nothing changed should not allocate at all
+        idle = compositor()
+        idle.render(round_states[-1])
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for _ in range(100):
+            idle.render(round_states[-1])
+            sink.write(idle.frame)
+        peak = tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        print(f"unchanged frames: peak {peak} bytes allocated over 100 frames")
+
+        broadcaster = Broadcaster(sink, size, args.fps)
+        broadcaster.set_round(loaded.levels, question_set.layout, question_set.hints,
+                              f"Set {args.question_id}")
+        broadcaster.start()
+        start = time.monotonic()
+        while time.monotonic() - start < args.live_seconds:
+            elapsed_frames = int((time.monotonic() - start) * args.fps)
+            broadcaster.publish(states[elapsed_frames % len(states)])
+            time.sleep(1 / (args.fps * 2))
+        broadcaster.stop()
+        elapsed = time.monotonic() - start
+        print(f"Broadcaster at {args.fps} fps for {elapsed:.1f} s: {broadcaster.frames} frames "
+              f"written (expected ~{elapsed * args.fps:.0f}), {broadcaster.rendered} rendered, "
+              f"CPU {broadcaster.cpu_seconds / max(broadcaster.rendered, 1) * 1000:.3f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Stress-test buzzer arbitration: latency, and how often the true first press wins.
+
+Simulated clients get random clock offsets and one-way network delays
+(plus per-message jitter) and buzz at random moments a few milliseconds
+apart. Each round's decision is checked against the press that really
+came first, and compared with simply taking the first buzz to arrive.
+
+    python benchmarks/bench_buzzer.py --clients 200 --rounds 300
+"""
+import argparse
+import asyncio
+import os
+import queue
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buzzer import (CALIBRATION_PINGS, CALIBRATION_SPACING, RESOLUTION,  # noqa: E402
+                    BuzzerClient, BuzzerServer)
+from engine import NUM_TEAMS  # noqa: E402
+
+
+class SimulatedClient(BuzzerClient):
+    """A buzzer whose clock is offset and whose datagrams are delayed both ways."""
+
+    def __init__(self, client, team, offset, delay, jitter, rng):
+        super().__init__(client, team, clock=lambda: time.monotonic() + offset)
+        self.delay = delay
+        self.jitter = jitter
+        self.rng = rng
+        self.pressed = None
+
+    def _latency(self):
+        return self.delay + self.rng.uniform(0, self.jitter)
+
+    def datagram_received(self, data, addr):
+        loop = asyncio.get_running_loop()
+        loop.call_later(self._latency(), BuzzerClient.datagram_received, self, data, addr)
+
+    def send(self, message):
+        loop = asyncio.get_running_loop()
+        loop.call_later(self._latency(), BuzzerClient.send, self, message)
+
+    def press(self):
+        self.pressed = time.monotonic()
+        self.buzz()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(name, seconds):
+    ms = [s * 1000 for s in seconds]
+    print(f"{name:42s} p50 {statistics.median(ms):7.2f} ms   p99 {percentile(ms, 0.99):7.2f} ms"
+          f"   max {max(ms):7.2f} ms")
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    server = BuzzerServer("127.0.0.1", 0, window=args.window / 1000)
+    host, port = server.start()
+    loop = asyncio.get_running_loop()
+
+    clients = []
+    for n in range(args.clients):
+        client = SimulatedClient(f"c{n}", n % NUM_TEAMS, rng.uniform(-5, 5),
+                                 rng.uniform(0, args.max_delay / 1000), args.jitter / 1000,
+                                 random.Random(rng.random()))
+        await loop.create_datagram_endpoint(lambda c=client: c, remote_addr=(host, port))
+        clients.append(client)
+    # Let every client finish its calibration pings
+    await asyncio.sleep(CALIBRATION_PINGS * CALIBRATION_SPACING
+                        + 4 * (args.max_delay + args.jitter) / 1000 + 0.2)
+    calibrated = sum(1 for c in server.arbiter.clocks.values() if c.offset is not None)
+
+    fair = by_receipt = 0
+    wins = [0] * NUM_TEAMS
+    end_to_end, overhead = [], []
+    for _ in range(args.rounds):
+        contenders = rng.sample(clients, rng.randint(2, args.contenders))
+        start = loop.time() + 0.01
+        for client in contenders:
+            loop.call_at(start + rng.uniform(0, args.spread / 1000), client.press)
+
+        while True:
+            try:
+                decision = server.decisions.get_nowait()
+                break
+            except queue.Empty:
+                await asyncio.sleep(0.001)
+
+        by_name = {c.client: c for c in contenders}
+        first = min(c.pressed for c in contenders)
+        winner = by_name[decision.winner.client]
+        fair += winner.pressed - first < RESOLUTION
+        arrived_first = by_name[min(decision.buzzes, key=lambda b: b.received).client]
+        by_receipt += arrived_first.pressed - first < RESOLUTION
+        wins[decision.team] += 1
+        end_to_end.append(decision.decided - first)
+        opened = min(b.received for b in decision.buzzes)
+        overhead.append(decision.decided - opened - server.arbiter.window)
+
+        # Let stragglers and repeats land before the next round
+        await asyncio.sleep((args.max_delay + args.jitter) / 1000 * 2 + 0.005)
+        for client in contenders:
+            client.pressed = None
+        server.release()
+        await asyncio.sleep(0.002)
+
+    server.stop()
+    print(f"{args.clients} clients ({calibrated} calibrated), {args.rounds} rounds, "
+          f"presses within {args.spread:g} ms, delay up to {args.max_delay:g} "
+          f"+ {args.jitter:g} ms jitter")
+    report("press to decision (incl. window)", end_to_end)
+    report("decision overhead past the window", overhead)
+    print(f"{'true first press wins':42s} {fair / args.rounds:7.1%}   "
+          f"(first arrival would win {by_receipt / args.rounds:.1%})")
+    shares = "  ".join(f"team {t + 1} {w / args.rounds:5.1%}" for t, w in enumerate(wins))
+    print(f"{'wins by team':42s} {shares}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=300)
+    parser.add_argument("--contenders", type=int, default=8, help="most buzzes per round")
+    parser.add_argument("--spread", type=float, default=10.0, help="ms between presses, at most")
+    parser.add_argument("--max-delay", type=float, default=15.0, help="one-way network delay, ms")
+    parser.add_argument("--jitter", type=float, default=1.0, help="per-message jitter, ms")
+    parser.add_argument("--window", type=float, default=50.0, help="arbitration window, ms")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark round analytics: NumPy over the columnar history vs a Python loop over JSON logs.
+
+Simulates rounds into a history store and, side by side, into one JSON
+line per round (the way per-round logs would be kept), then computes
+success per square, the points distribution and squares open at a
+correct Obstacle guess both ways and checks that they agree.
+
+    python benchmarks/bench_history.py --games 300000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import DEFAULT_LAYOUT, NUM_TEAMS, SkillModel, play_game  # noqa: E402
+from history import SIMULATED, GameLog, HistoryStore, analyze  # noqa: E402
+
+
+def python_analyze(path):
+    """The same aggregates as history.analyze(), from JSON lines with a plain loop."""
+    attempts, correct, points, open_at_guess = Counter(), Counter(), Counter(), Counter()
+    with open(path) as f:
+        for line in f:
+            round_data = json.loads(line)
+            for square in round_data["squares"]:
+                attempts[square["square"]] += 1
+                correct[square["square"]] += square["correct"]
+            for score in round_data["scores"]:
+                points[score] += 1
+            for guess in round_data["guesses"]:
+                if guess["correct"] and not guess["final"]:
+                    open_at_guess[guess["revealed"]] += 1
+    return attempts, correct, points, open_at_guess
+
+
+def folder_mb(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=300000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    models = [SkillModel(0.7, 0.5)] * NUM_TEAMS
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history"))
+        json_path = os.path.join(tmp, "rounds.jsonl")
+        start = time.perf_counter()
+        with open(json_path, "w") as f:
+            for number in range(args.games):
+                log = GameLog(DEFAULT_LAYOUT, clock=None)
+                game = play_game(models, rng, DEFAULT_LAYOUT, log=log)
+                store.add(log, game, SIMULATED)
+                if (number + 1) % 10000 == 0:
+                    store.flush()
+                f.write(json.dumps({
+                    "squares": [{"square": s[2], "correct": s[3]} for s in log.squares],
+                    "guesses": [{"correct": g[2], "final": g[3], "revealed": g[5]}
+                                for g in log.guesses],
+                    "scores": game.scores}) + "\n")
+        store.flush()
+        print(f"simulated {args.games} rounds in {time.perf_counter() - start:.1f} s; "
+              f"history {folder_mb(store.directory):.1f} MB, "
+              f"JSON {os.path.getsize(json_path) / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        report = analyze(*HistoryStore(store.directory).load())
+        numpy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        attempts, correct, points, open_at_guess = python_analyze(json_path)
+        python_time = time.perf_counter() - start
+
+    agree = ([row["attempts"] for row in report["squares"]] == [attempts[s] for s in range(1, 17)]
+             and [round(correct[s] / attempts[s], 4) for s in range(1, 17)]
+             == [row["success_rate"] for row in report["squares"]]
+             and report["points"]["distribution"] == dict(sorted(points.items()))
+             and report["obstacle"]["open_at_correct_guess"] == dict(sorted(open_at_guess.items())))
+    print(f"NumPy over columns (load + analyze): {numpy_time:6.2f} s")
+    print(f"Python loop over JSON lines:         {python_time:6.2f} s   "
+          f"({python_time / numpy_time:.0f}x slower)")
+    if not agree:
+        sys.exit("FAIL: the two analyses disagree")
+    print("ok: both give the same aggregates")
+
+
+if __name__ == "__main__":
+    main()
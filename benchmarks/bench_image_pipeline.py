@@ -0,0 +1,117 @@
+"""Benchmark peak memory and load time of board-image decoding across image sizes.
+
+Writes synthetic JPEG, PNG and uncompressed TIFF images of each size, then
+loads each one in a fresh process, both the old way (decode whole, then
+resize) and through imaging.load_board_image, and reports how far the load
+raised the process's peak RSS, and the load time:
+
+    python benchmarks/bench_image_pipeline.py --sizes 2000 5000 10000 --limit-mb 64
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+BOARD_SIZE = (400, 400)
+FORMATS = {"jpg": {"quality": 90}, "png": {}, "tif": {}}
+
+
+def peak_rss_mb():
+    # On Linux ru_maxrss survives exec and would include the parent's peak,
+    # so prefer this process's own high-water mark
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def make_image(path, size, fmt):
+    """A smooth gradient with some noise, so it compresses like a photo rather than a flat fill."""
+    rng = np.random.default_rng(size)
+    y = np.linspace(0, 255, size, dtype=np.float32)[:, None]
+    x = np.linspace(0, 255, size, dtype=np.float32)[None, :]
+    pixels = np.empty((size, size, 3), dtype=np.uint8)
+    pixels[..., 0] = x
+    pixels[..., 1] = y
+    pixels[..., 2] = (x + y) / 2
+    pixels += rng.integers(0, 16, size=(size, size, 1), dtype=np.uint8)
+    Image.fromarray(pixels).save(path, **FORMATS[fmt])
+
+
+def child(method, path, limit_mb):
+    import imaging
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if method == "naive":
+        Image.MAX_IMAGE_PIXELS = None
+        img = Image.open(path).convert("RGB").resize(BOARD_SIZE, Image.LANCZOS)
+    else:
+        img = imaging.load_board_image(path, BOARD_SIZE, limit_mb << 20)
+    elapsed = time.perf_counter() - start
+    assert img.size == BOARD_SIZE
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_rss_mb(), "baseline_mb": baseline}))
+
+
+def run_child(method, path, limit_mb):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", method, path,
+         "--limit-mb", str(limit_mb)],
+        capture_output=True, text=True)
+    if out.returncode != 0:
+        return None, out.stderr.strip().splitlines()[-1]
+    return json.loads(out.stdout), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 5000, 10000])
+    parser.add_argument("--formats", nargs="+", default=sorted(FORMATS), choices=sorted(FORMATS))
+    parser.add_argument("--limit-mb", type=int, default=64, help="memory ceiling for the pipeline")
+    parser.add_argument("--work-dir", help="where to keep the generated images (default: a temp dir)")
+    parser.add_argument("--child", nargs=2, metavar=("METHOD", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.limit_mb)
+        return
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="mobius-images-")
+    os.makedirs(work_dir, exist_ok=True)
+    print(f"images in {work_dir}, pipeline ceiling {args.limit_mb} MB")
+    print(f"{'image':>16s} {'file MB':>8s}  {'naive':>22s}  {'pipeline':>22s}")
+    for size in args.sizes:
+        for fmt in args.formats:
+            path = os.path.join(work_dir, f"bench_{size}.{fmt}")
+            if not os.path.exists(path):
+                make_image(path, size, fmt)
+            cells = []
+            for method in ("naive", "pipeline"):
+                result, error = run_child(method, path, args.limit_mb)
+                if result is None:
+                    cells.append(f"{'failed':>22s}")
+                    print(f"  {method} {size} {fmt}: {error}", file=sys.stderr)
+                else:
+                    cells.append(f"{result['peak_mb'] - result['baseline_mb']:7.0f} MB "
+                                 f"{result['seconds'] * 1000:8.0f} ms")
+            label = f"{size}x{size} {fmt}"
+            print(f"{label:>16s} {os.path.getsize(path) / (1 << 20):8.1f}  {cells[0]}  {cells[1]}")
+
+
+if __name__ == "__main__":
+    main()
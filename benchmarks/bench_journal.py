@@ -0,0 +1,89 @@
+"""Benchmark round journals: writing simulated rounds, then replaying them all for an audit.
+
+    python benchmarks/bench_journal.py --rounds 5000 --jobs 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import FINAL_GUESS, PLAYING, ObstacleGame, SkillModel  # noqa: E402
+from journal import RoundJournal, find_journals, recover, replay_all  # noqa: E402
+
+
+def play_journaled(models, rng, journal_dir, question_id, stop_after=None):
+    """play_game() with every move journaled; stops early after `stop_after` moves, as a crash would."""
+    game = ObstacleGame()
+    journal = RoundJournal.create(question_id, game, journal_dir)
+    moves = 0
+    while game.phase == PLAYING:
+        if stop_after is not None and moves >= stop_after:
+            journal.close()
+            return journal.path, game
+        model = models[game.current_team]
+        if model.wants_to_guess(game, rng):
+            correct = model.guesses_correctly(game, rng)
+            game.guess_obstacle(correct)
+            journal.guessed(correct)
+        else:
+            i, j = model.choose_square(game, rng)
+            square = game.grid_order[i][j]
+            journal.chose(square)
+            correct = model.answers_correctly(game, square, rng)
+            game.answer_square(i, j, correct)
+            journal.answered(i, j, correct)
+        moves += 1
+    if game.phase == FINAL_GUESS:
+        journal.final_hint()
+        correct = models[game.current_team].final_guess_correct(game, rng)
+        game.final_guess(correct)
+        journal.final_guessed(correct)
+    journal.finish()
+    return journal.path, game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5000)
+    parser.add_argument("--jobs", type=int, default=None)
+    parser.add_argument("--crash-rate", type=float, default=0.1,
+                        help="fraction of rounds cut off mid-round")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    models = [SkillModel(guess_threshold=0.6)] * 4
+    with tempfile.TemporaryDirectory() as journal_dir:
+        start = time.perf_counter()
+        crashed = []
+        for n in range(args.rounds):
+            stop_after = rng.randrange(16) if rng.random() < args.crash_rate else None
+            path, game = play_journaled(models, rng, journal_dir, f"{n:05d}", stop_after)
+            if stop_after is not None:
+                crashed.append((path, game))
+        written = time.perf_counter() - start
+        paths = find_journals([journal_dir])
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"wrote {len(paths)} journals in {written:.2f} s "
+              f"({written / len(paths) * 1000:.2f} ms per round, {size / len(paths):.0f} bytes each)")
+
+        start = time.perf_counter()
+        mismatched = sum(1 for path, game in crashed if recover(path).game.to_dict() != game.to_dict())
+        elapsed = time.perf_counter() - start
+        print(f"recovered {len(crashed)} interrupted rounds in {elapsed * 1000:.1f} ms, "
+              f"{mismatched} differing from the live game")
+
+        for jobs in (1, args.jobs):
+            start = time.perf_counter()
+            results = replay_all(paths, jobs)
+            elapsed = time.perf_counter() - start
+            failed = sum(1 for r in results if r["errors"])
+            label = "serial" if jobs == 1 else f"pool ({jobs or os.cpu_count()} workers)"
+            print(f"replay {label:<20s} {len(paths) / elapsed:10.0f} journals/s   {failed} with errors")
+
+
+if __name__ == "__main__":
+    main()
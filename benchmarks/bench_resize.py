@@ -0,0 +1,127 @@
+"""Benchmark resize-to-repaint latency: tile pyramid levels vs re-decoding at the new size.
+
+Loads a set with its tile pyramid, reveals half the board, then walks the
+board through a series of window sizes. The pyramid path picks the level
+that fits and swaps images (making a level's Tk images on its first
+visit only); the naive path decodes the image file again at the fitted
+size, slices it and builds new Tk images every time. The debounce delay
+(RESIZE_DEBOUNCE_MS in challenge.py) is not included.
+
+With no display it re-runs itself under xvfb-run if that is installed;
+otherwise only the UI-thread work outside Tk is timed.
+
+    python benchmarks/bench_resize.py --set 001 --resizes 60
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from board import BoardCanvas, BoardImages, board_size, fit_level  # noqa: E402
+from imaging import load_board_image  # noqa: E402
+from loader import QuestionSetLoader  # noqa: E402
+from question_set import PROBLEMS_DIR  # noqa: E402
+from tile_cache import TileCache, slice_image  # noqa: E402
+
+IMAGE_SIZE = (400, 400)
+PYRAMID_SCALES = (0.75, 1.0, 1.5, 2.0, 3.0, 4.0)
+GAP = 4
+
+
+def report(name, times):
+    ms = sorted(t * 1000 for t in times)
+    print(f"{name:34s} median {statistics.median(ms):8.2f} ms   "
+          f"p99 {ms[int(0.99 * (len(ms) - 1))]:8.2f} ms   max {ms[-1]:8.2f} ms")
+
+
+def run(loaded, sizes, root=None):
+    """Time both paths over `sizes`; returns (pyramid times, naive times)."""
+    layout = loaded.question_set.layout
+    rows, cols = layout.rows, layout.cols
+    image_file = loaded.question_set.image_file
+    revealed = [(i, j) for i in range(rows) for j in range(cols) if (i + j) % 2 == 0]
+    images = BoardImages(root, loaded.levels) if root is not None else None
+    tile_sizes = [(tiles.shape[3], tiles.shape[2]) for _, tiles in loaded.levels]
+    board = None
+    if root is not None:
+        level = fit_level(tile_sizes, rows, cols, sizes[0], GAP)
+        board = BoardCanvas(root, layout.order, tile_sizes[level], lambda i, j: None, gap=GAP)
+        board.canvas.pack()
+
+    def repaint(parts, black, tile_size):
+        board.resize(tile_size)
+        for i, j in revealed:
+            board.reveal(i, j, parts[i][j] if (i * cols + j) % 3 else black)
+        root.update()
+
+    pyramid_times, naive_times = [], []
+    for available in sizes:
+        start = time.perf_counter()
+        level = fit_level(tile_sizes, rows, cols, available, GAP)
+        if root is not None:
+            repaint(*images.photos(level), tile_sizes[level])
+        pyramid_times.append(time.perf_counter() - start)
+
+        # Same fitted size, re-decoded from the file every time
+        start = time.perf_counter()
+        tile_width, tile_height = tile_sizes[level]
+        img = load_board_image(image_file, (tile_width * cols, tile_height * rows))
+        tiles = slice_image(img, (rows, cols))
+        if root is not None:
+            repaint(*BoardImages(root, [(img, tiles)]).photos(0), (tile_width, tile_height))
+        naive_times.append(time.perf_counter() - start)
+    return pyramid_times, naive_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--set", default="001", dest="question_id")
+    parser.add_argument("--problems", default=os.path.join(ROOT, PROBLEMS_DIR))
+    parser.add_argument("--resizes", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    use_tk = bool(os.environ.get("DISPLAY")) or not sys.platform.startswith("linux")
+    if not use_tk and shutil.which("xvfb-run") and not os.environ.get("BENCH_UNDER_XVFB"):
+        os.environ["BENCH_UNDER_XVFB"] = "1"
+        os.execvp("xvfb-run", ["xvfb-run", "-a", sys.executable] + sys.argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = QuestionSetLoader(TileCache(os.path.join(tmp, "tiles"), max_entries=16),
+                                   args.problems, image_size=IMAGE_SIZE, pyramid=PYRAMID_SCALES)
+        start = time.perf_counter()
+        loaded = loader.load(args.question_id).result()
+        print(f"set {args.question_id}: pyramid of {len(loaded.levels)} levels built on the "
+              f"loader thread in {(time.perf_counter() - start) * 1000:.0f} ms (cold cache)")
+        loader.shutdown()
+
+    rng = random.Random(args.seed)
+    layout = loaded.question_set.layout
+    smallest = board_size((loaded.levels[0][1].shape[3], loaded.levels[0][1].shape[2]),
+                          layout.rows, layout.cols, GAP)
+    sizes = [(rng.randint(smallest[0], 1800), rng.randint(smallest[1], 1800))
+             for _ in range(args.resizes)]
+
+    if use_tk:
+        import tkinter as tk
+
+        root = tk.Tk()
+        pyramid_times, naive_times = run(loaded, sizes, root)
+        root.destroy()
+        print(f"{args.resizes} resizes, Tk repaint included")
+    else:
+        pyramid_times, naive_times = run(loaded, sizes)
+        print(f"{args.resizes} resizes, no display: UI-thread work outside Tk only")
+    report("pyramid level switch", pyramid_times)
+    report("re-decode at the new size", naive_times)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark the tournament scoreboard: recording rounds and ranked leaderboard queries.
+
+Plays many four-team rounds drawn from a large field of teams, then times
+the leaderboard's top page, a deep page and single-team rank lookups
+against the same ranking computed by summing round_scores on every query.
+
+    python benchmarks/bench_scoreboard.py --teams 20000 --rounds 50000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tournament import Scoreboard  # noqa: E402
+
+NAIVE_LEADERBOARD = """
+SELECT teams.name, SUM(round_scores.score) AS total FROM round_scores
+JOIN rounds ON rounds.id = round_scores.round
+JOIN teams ON teams.id = round_scores.team
+WHERE rounds.tournament = (SELECT id FROM tournaments WHERE name = ?)
+GROUP BY round_scores.team ORDER BY total DESC LIMIT ?
+"""
+
+
+def timed_ms(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(0.99 * (len(times) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = [f"Team {n:05d}" for n in range(args.teams)]
+    with tempfile.TemporaryDirectory() as tmp:
+        scoreboard = Scoreboard(os.path.join(tmp, "scoreboard.sqlite"))
+        played = set()
+        start = time.perf_counter()
+        for number in range(args.rounds):
+            teams = rng.sample(names, 4)
+            played.update(teams)
+            scores = {team: rng.choice((0, 0, 10, 20, 30, 40, 60, 80)) for team in teams}
+            scoreboard.record_round("bench", f"{number % 999 + 1:03d}", scores)
+        elapsed = time.perf_counter() - start
+        print(f"record_round x{args.rounds} over {args.teams} teams: "
+              f"{elapsed / args.rounds * 1000:.3f} ms per round")
+
+        top = scoreboard.leaderboard("bench", 10)
+        naive = scoreboard.db.execute(NAIVE_LEADERBOARD, ("bench", 10)).fetchall()
+        if [s.total for s in top] != [total for _, total in naive]:
+            sys.exit("FAIL: the standings disagree with the summed round scores")
+
+        median, p99 = timed_ms(lambda: scoreboard.leaderboard("bench", 10), args.queries)
+        print(f"leaderboard top 10:         median {median:7.3f} ms   p99 {p99:7.3f} ms")
+        middle = args.teams // 2
+        median, p99 = timed_ms(lambda: scoreboard.leaderboard("bench", 10, middle), args.queries)
+        print(f"leaderboard page at {middle:<7d} median {median:7.3f} ms   p99 {p99:7.3f} ms")
+        played = sorted(played)
+        median, p99 = timed_ms(lambda: scoreboard.standing("bench", rng.choice(played)),
+                               args.queries)
+        print(f"standing() of a random team median {median:7.3f} ms   p99 {p99:7.3f} ms")
+        median, p99 = timed_ms(
+            lambda: scoreboard.db.execute(NAIVE_LEADERBOARD, ("bench", 10)).fetchall(),
+            max(args.queries // 20, 3))
+        print(f"summing every round:        median {median:7.3f} ms   p99 {p99:7.3f} ms")
+        scoreboard.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Load-test the multi-room server: sessions supported, move latency percentiles and memory per room.
+
+Starts server.py in a child process, then for each room count opens one
+client per room, joins every client to its own room and plays rounds
+through the protocol until the time is up. Server memory is read from
+/proc/<pid>/status.
+
+    python benchmarks/bench_server.py --rooms 50,200,800 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from question_set import PROBLEMS_DIR, find_question_ids, load_question_set  # noqa: E402
+
+
+def server_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Client:
+    """One connection speaking the line protocol, timing every request."""
+
+    def __init__(self, reader, writer, latencies):
+        self.reader = reader
+        self.writer = writer
+        self.latencies = latencies
+
+    async def request(self, **message):
+        start = time.perf_counter()
+        self.writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        while True:
+            reply = json.loads(await self.reader.readline())
+            if "event" not in reply:
+                break
+        self.latencies.append(time.perf_counter() - start)
+        return reply
+
+
+async def play_round(client, answers, rng, p_correct):
+    """Play one round as every team in turn until it is over."""
+    state = (await client.request(op="state"))["state"]
+    order = [square for row in answers["order"] for square in row]
+    while state["phase"] == "playing":
+        if rng.random() < 0.05:
+            guess = answers["obstacle"] if rng.random() < 0.3 else "?"
+            reply = await client.request(op="guess", answer=guess)
+        else:
+            open_squares = [s for s in order if not _revealed(state, answers, s)]
+            square = rng.choice(open_squares)
+            await client.request(op="question", square=square)
+            answer = answers["answers"][square] if rng.random() < p_correct else "?"
+            reply = await client.request(op="answer", square=square, answer=answer)
+            if reply.get("correct"):
+                await client.request(op="tile", square=square)
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        state = reply["state"]
+    if state["phase"] == "final_guess":
+        await client.request(op="final", answer=answers["obstacle"])
+
+
+def _revealed(state, answers, square):
+    i, j = answers["positions"][square]
+    return state["revealed"][i][j]
+
+
+async def run_level(host, port, rooms, duration, sets, rng, p_correct, level, pid):
+    """Open `rooms` clients, one room each, and play until `duration` runs out.
+
+    Returns the request latencies, rounds played, seconds spent joining and
+    the server's RSS with every room open.
+    """
+    latencies = []
+    clients = []
+    for n in range(rooms):
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 22)
+        clients.append(Client(reader, writer, latencies))
+    join_start = time.perf_counter()
+    for n, client in enumerate(clients):
+        question_id = sets[n % len(sets)]
+        reply = await client.request(op="join", room=f"{level}-{n}-0", set=question_id)
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+    joined = time.perf_counter() - join_start
+    rss = server_rss_mb(pid)
+    latencies.clear()
+
+    deadline = time.perf_counter() + duration
+    rounds = [0]
+
+    async def session(n, client):
+        question_id = sets[n % len(sets)]
+        while time.perf_counter() < deadline:
+            await play_round(client, ANSWERS[question_id], random.Random(rng.random()), p_correct)
+            rounds[0] += 1
+            await client.request(op="join", room=f"{level}-{n}-{rounds[0]}", set=question_id)
+
+    await asyncio.gather(*(session(n, client) for n, client in enumerate(clients)))
+    for client in clients:
+        client.writer.close()
+    return latencies, rounds[0], joined, rss
+
+
+ANSWERS = {}
+
+
+def load_answers(problems_dir):
+    for question_id in find_question_ids(problems_dir):
+        question_set = load_question_set(question_id, problems_dir)
+        layout = question_set.layout
+        ANSWERS[question_id] = {"answers": question_set.answers,
+                                "obstacle": question_set.obstacle_answer,
+                                "order": layout.order, "positions": layout.positions}
+    return sorted(ANSWERS)
+
+
+async def measure(args, pid, host, port, sets):
+    rng = random.Random(1)
+    # Load every set once so per-room memory leaves out the shared sets and tiles
+    await run_level(host, port, len(sets), 0, sets, rng, args.p_correct, "warm", pid)
+    await asyncio.sleep(0.2)
+    print(f"{'rooms':>6s} {'rounds/s':>9s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} "
+          f"{'p99 ms':>8s} {'KB/room':>8s}")
+    supported = 0
+    for rooms in args.rooms:
+        baseline = server_rss_mb(pid)
+        start = time.perf_counter()
+        latencies, rounds, joined, rss = await run_level(host, port, rooms, args.duration, sets,
+                                                         rng, args.p_correct, rooms, pid)
+        elapsed = time.perf_counter() - start - joined
+        ms = [v * 1000 for v in latencies]
+        p99 = percentile(ms, 0.99)
+        print(f"{rooms:6d} {rounds / elapsed:9.1f} {len(ms) / elapsed:8.0f} "
+              f"{statistics.median(ms):8.2f} {percentile(ms, 0.95):8.2f} {p99:8.2f} "
+              f"{max(0.0, rss - baseline) * 1024 / rooms:8.1f}")
+        if p99 <= args.target_p99_ms:
+            supported = rooms
+    print(f"largest room count with p99 <= {args.target_p99_ms:g} ms: {supported or 'none'} "
+          f"(client and server share {os.cpu_count()} CPU(s))")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=lambda s: [int(n) for n in s.split(",")],
+                        default=[50, 200, 800])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per room count")
+    parser.add_argument("--p-correct", type=float, default=0.6)
+    parser.add_argument("--target-p99-ms", type=float, default=50.0)
+    parser.add_argument("--problems", default=os.path.join(ROOT, PROBLEMS_DIR))
+    args = parser.parse_args()
+
+    # One socket per room on each side
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    sets = load_answers(args.problems)
+    server = subprocess.Popen([sys.executable, "server.py", "--port", "0",
+                               "--problems", args.problems],
+                              cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    try:
+        line = server.stdout.readline()
+        if not line.startswith("listening on "):
+            sys.exit("server did not start")
+        host, port = line.split()[-1].rsplit(":", 1)
+        asyncio.run(measure(args, server.pid, host, int(port), sets))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
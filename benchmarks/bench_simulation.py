@@ -0,0 +1,49 @@
+"""Benchmark simulated games per second, single-process and with a process pool.
+
+Run from the repository root:
+
+    python benchmarks/bench_simulation.py --games 200000 --processes 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import SkillModel, simulate, simulate_parallel  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    models = [SkillModel(p_easy=0.8, p_medium=0.6, guess_threshold=0.55),
+              SkillModel(p_easy=0.7, p_medium=0.5),
+              SkillModel(p_easy=0.6, p_medium=0.4, guess_threshold=0.4),
+              SkillModel(p_easy=0.5, p_medium=0.3, guess_threshold=0.7)]
+
+    start = time.perf_counter()
+    single = simulate(models, args.games, seed=args.seed)
+    single_elapsed = time.perf_counter() - start
+    print(f"single process : {args.games / single_elapsed:12,.0f} games/s "
+          f"({single_elapsed:.2f}s)")
+
+    start = time.perf_counter()
+    pooled = simulate_parallel(models, args.games, processes=args.processes, seed=args.seed)
+    pool_elapsed = time.perf_counter() - start
+    print(f"{args.processes:2d} processes   : {args.games / pool_elapsed:12,.0f} games/s "
+          f"({pool_elapsed:.2f}s)")
+
+    summary = pooled.summary()
+    print("mean scores    :", ", ".join(f"{s:.1f}" for s in summary["mean_scores"]))
+    print(f"obstacle found : {summary['obstacle_guess_rate']:.1%} early, "
+          f"{summary['final_hint_rate']:.1%} reached the final hint")
+    assert single.games == pooled.games == args.games
+
+
+if __name__ == "__main__":
+    main()
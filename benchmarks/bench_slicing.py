@@ -0,0 +1,58 @@
+"""Benchmark tile slicing for large grids against the cost of one decode.
+
+Compares one `img.crop` per tile with the array-view slicing used by the
+tile cache, for a few grid sizes:
+
+    python benchmarks/bench_slicing.py --image problems/image_001.png
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image  # noqa: E402
+
+from tile_cache import slice_image  # noqa: E402
+
+
+def crop_tiles(img, grid_size):
+    rows, cols = grid_size
+    part_width, part_height = img.width // cols, img.height // rows
+    return [[img.crop((j * part_width, i * part_height,
+                       (j + 1) * part_width, (i + 1) * part_height))
+             for j in range(cols)] for i in range(rows)]
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", default=os.path.join("problems", "image_001.png"))
+    parser.add_argument("--size", type=int, default=1600, help="board size in pixels")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    def decode():
+        with Image.open(args.image) as img:
+            img.load()
+
+    decode_ms = best_of(decode, args.repeat)
+    img = Image.open(args.image).convert("RGB").resize((args.size, args.size), Image.LANCZOS)
+    print(f"decode {args.image}: {decode_ms:8.2f} ms")
+    for n in (4, 10, 16, 32):
+        crop_ms = best_of(lambda: crop_tiles(img, (n, n)), args.repeat)
+        view_ms = best_of(lambda: slice_image(img, (n, n)), args.repeat)
+        print(f"{n:2d}x{n:<2d} crop per tile {crop_ms:8.2f} ms   array views {view_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark cold start: module import time and launch-to-first-window time.
+
+Each run is a fresh interpreter. The window measurement needs a display;
+without one it re-runs itself under xvfb-run if available.
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --imports-only
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("numpy", "PIL.Image", "PIL.ImageTk", "multiprocessing")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import challenge
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed,
+                  "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def window_child(launched, eager):
+    """Run in the child: open the game window and time the first frame and the warm-up."""
+    if eager:
+        # What startup cost before the image stack was deferred
+        import numpy  # noqa: F401
+        from PIL import Image, ImageTk  # noqa: F401
+        import tile_cache  # noqa: F401
+    import tkinter as tk
+    from challenge import ObstacleCourse
+
+    root = tk.Tk()
+    app = ObstacleCourse(root)
+    root.wait_visibility(app.select_frame)
+    root.update_idletasks()
+    first_window = time.monotonic() - launched
+    while app.warm_up_thread is None or app.warm_up_thread.is_alive():
+        root.update()
+        time.sleep(0.001)
+    warm = time.monotonic() - launched
+    root.destroy()
+    print(json.dumps({"first_window": first_window, "warm": warm}))
+
+
+def run(args):
+    out = subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True, text=True)
+    if out.returncode != 0:
+        sys.exit(out.stderr)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def report(name, values):
+    ms = [v * 1000 for v in values]
+    print(f"{name:46s} median {statistics.median(ms):7.1f} ms   min {min(ms):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--imports-only", action="store_true", help="skip the window measurement")
+    parser.add_argument("--child-window", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_window is not None:
+        sys.path.insert(0, ROOT)
+        window_child(args.child_window, args.eager)
+        return
+
+    if (not args.imports_only and not os.environ.get("DISPLAY")
+            and sys.platform.startswith("linux")):
+        if shutil.which("xvfb-run") and not os.environ.get("BENCH_UNDER_XVFB"):
+            os.environ["BENCH_UNDER_XVFB"] = "1"
+            os.execvp("xvfb-run", ["xvfb-run", "-a", sys.executable] + sys.argv)
+        sys.exit("No display available for the window measurement "
+                 "(install Xvfb, set DISPLAY or pass --imports-only).")
+
+    results = [run(["-c", IMPORT_SCRIPT]) for _ in range(args.runs)]
+    report("import challenge", [r["seconds"] for r in results])
+    print(f"{'':46s} heavy modules loaded: {', '.join(results[0]['heavy']) or 'none'}")
+    if args.imports_only:
+        return
+
+    script = os.path.abspath(__file__)
+    for eager in (False, True):
+        first, warm = [], []
+        for _ in range(args.runs):
+            extra = ["--eager"] if eager else []
+            # CLOCK_MONOTONIC is shared between processes, so this includes interpreter start-up
+            r = run([script, "--child-window", repr(time.monotonic())] + extra)
+            first.append(r["first_window"])
+            warm.append(r["warm"])
+        label = "eager imports" if eager else "deferred image stack"
+        report(f"launch to first window ({label})", first)
+        if not eager:
+            report("launch to image stack warm", warm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Check countdown expiry error with many timers running under simulated UI load.
+
+Starts many Countdowns at once alongside a callback that keeps the loop
+busy for a few milliseconds at a time, the way a board redraw would, and
+measures how late each expiry fires. The run fails if any expiry is later
+than --bound-ms. For comparison it also times the naive approach of
+re-arming after(tick) a fixed number of times, whose error grows with
+every late tick.
+
+It runs on a real Tk loop when there is a display (re-running itself
+under xvfb-run if that is installed); otherwise it drives the same
+after()/after_cancel() calls from an asyncio loop.
+
+    python benchmarks/bench_timers.py --timers 1000 --bound-ms 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from countdown import Countdown  # noqa: E402
+
+
+class LoopScheduler:
+    """Tk's after()/after_cancel() on an asyncio loop, for machines without a display."""
+
+    def __init__(self, loop):
+        self.loop = loop
+
+    def after(self, ms, func):
+        return self.loop.call_later(ms / 1000, func)
+
+    def after_cancel(self, handle):
+        handle.cancel()
+
+
+class NaiveTimer:
+    """Counts down by re-arming after(tick) until enough ticks have run."""
+
+    def __init__(self, scheduler, seconds, tick, on_expire):
+        self.scheduler = scheduler
+        self.ticks_left = round(seconds / tick)
+        self.tick_ms = round(tick * 1000)
+        self.on_expire = on_expire
+        self.deadline = time.monotonic() + seconds
+        self.expired_at = None
+
+    def start(self):
+        self.scheduler.after(self.tick_ms, self._fire)
+        return self
+
+    def _fire(self):
+        self.ticks_left -= 1
+        if self.ticks_left > 0:
+            self.scheduler.after(self.tick_ms, self._fire)
+        else:
+            self.expired_at = time.monotonic()
+            self.on_expire()
+
+
+def run(scheduler, quit, args):
+    """Start every timer and the load on `scheduler`; returns lists filled in as they expire."""
+    rng = random.Random(args.seed)
+    pending = [args.timers * 2]
+    countdowns, naive = [], []
+    tick = args.tick / 1000
+
+    def expired():
+        pending[0] -= 1
+        if pending[0] == 0:
+            quit()
+
+    def load():
+        if pending[0] == 0:
+            return
+        # Busy the loop like a redraw would
+        end = time.perf_counter() + rng.uniform(0, args.load_ms) / 1000
+        while time.perf_counter() < end:
+            pass
+        scheduler.after(args.load_interval, load)
+
+    for _ in range(args.timers):
+        seconds = round(rng.uniform(1, args.max_seconds) / tick) * tick
+        countdowns.append(Countdown(scheduler, seconds, lambda left: None, expired,
+                                    tick=tick).start())
+        naive.append(NaiveTimer(scheduler, seconds, tick, expired).start())
+    scheduler.after(args.load_interval, load)
+    return countdowns, naive
+
+
+def report(name, errors):
+    ms = sorted(e * 1000 for e in errors)
+    print(f"{name:28s} median {statistics.median(ms):7.2f} ms   "
+          f"p99 {ms[int(0.99 * (len(ms) - 1))]:7.2f} ms   max {ms[-1]:7.2f} ms")
+    return ms[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--timers", type=int, default=1000)
+    parser.add_argument("--max-seconds", type=float, default=5.0, help="longest timer, s")
+    parser.add_argument("--tick", type=float, default=100.0, help="countdown tick, ms")
+    parser.add_argument("--load-ms", type=float, default=2.0, help="longest busy spell, ms")
+    parser.add_argument("--load-interval", type=int, default=10, help="ms between busy spells")
+    parser.add_argument("--bound-ms", type=float, default=5.0, help="largest expiry error allowed")
+    parser.add_argument("--no-tk", action="store_true", help="use the asyncio loop even with a display")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    use_tk = not args.no_tk and (os.environ.get("DISPLAY") or not sys.platform.startswith("linux"))
+    if (not use_tk and not args.no_tk and shutil.which("xvfb-run")
+            and not os.environ.get("BENCH_UNDER_XVFB")):
+        os.environ["BENCH_UNDER_XVFB"] = "1"
+        os.execvp("xvfb-run", ["xvfb-run", "-a", sys.executable] + sys.argv)
+
+    if use_tk:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        countdowns, naive = run(root, root.quit, args)
+        root.mainloop()
+        root.destroy()
+        loop_name = "Tk"
+    else:
+        loop = asyncio.new_event_loop()
+        countdowns, naive = run(LoopScheduler(loop), loop.stop, args)
+        loop.run_forever()
+        loop.close()
+        loop_name = "asyncio (no display)"
+
+    print(f"{args.timers} countdowns on the {loop_name} loop, up to {args.max_seconds:g} s, "
+          f"{args.tick:g} ms ticks, busy up to {args.load_ms:g} ms every {args.load_interval} ms")
+    worst = report("countdown expiry error", [c.expired_at - c.deadline for c in countdowns])
+    report("naive after() chain error", [n.expired_at - n.deadline for n in naive])
+    if worst > args.bound_ms:
+        sys.exit(f"FAIL: a countdown expired {worst:.2f} ms late (bound {args.bound_ms:g} ms)")
+    print(f"ok: every countdown expired within {args.bound_ms:g} ms of its deadline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Retained-mode board renderer drawn on a single Tk canvas."""
+import tkinter as tk
+
+import tracing
+
+COVER_FILL = "#d9d9d9"
+COVER_OUTLINE = "#a3a3a3"
+NUMBER_FONT = "Arial"
+
+
+def board_size(tile_size, rows, cols, gap):
+    """Canvas size of a rows x cols board of `tile_size` tiles."""
+    return cols * (tile_size[0] + gap) + gap, rows * (tile_size[1] + gap) + gap
+
+
+def fit_level(tile_sizes, rows, cols, available, gap):
+    """Index of the largest tile size whose board fits in `available` (width, height).
+
+    `tile_sizes` is ordered smallest first; if even the smallest does not
+    fit, it is used anyway.
+    """
+    width, height = available
+    best = 0
+    for index, tile_size in enumerate(tile_sizes):
+        board_width, board_height = board_size(tile_size, rows, cols, gap)
+        if board_width <= width and board_height <= height:
+            best = index
+    return best
+
+
+def nearest_level(tile_sizes, target):
+    """Index of the tile size whose width is nearest `target` pixels."""
+    return min(range(len(tile_sizes)), key=lambda index: abs(tile_sizes[index][0] - target))
+
+
+class BoardImages:
+    """Tk images for each level of a LoadedSet's tile pyramid, made on first use.
+
+    A level's images are built once, from tiles already resized on a loader
+    thread, and kept so that going back to a level costs nothing.
+    """
+
+    def __init__(self, master, levels):
+        self.master = master
+        self.levels = levels
+        self.tile_sizes = [(tiles.shape[3], tiles.shape[2]) for _, tiles in levels]
+        self._photos = {}
+
+    def photos(self, level):
+        """Return (parts, black tile) for a level; parts[i][j] is a PhotoImage."""
+        photos = self._photos.get(level)
+        if photos is None:
+            photos = self._photos[level] = self._build(level, *self.levels[level])
+        return photos
+
+    @tracing.traced()
+    def _build(self, level, image, tiles):
+        # Already imported by the loader thread by the time a set arrives
+        from PIL import Image, ImageTk
+
+        rows, cols, part_height, part_width = tiles.shape[:4]
+        black = tk.PhotoImage(master=self.master, width=part_width, height=part_height)
+        black.put("black", to=(0, 0, part_width, part_height))
+
+        # Hand the whole board to Tk once and let Tk copy each part out of it,
+        # rather than converting every part from PIL separately
+        if image is None:
+            import numpy as np
+            from tile_cache import assemble_tiles
+
+            with tracing.span("assemble_tiles"):
+                image = Image.fromarray(np.ascontiguousarray(assemble_tiles(tiles)))
+        with tracing.span("photo_image", what="board", level=level):
+            board_photo = ImageTk.PhotoImage(image, master=self.master)
+        parts = []
+        for i in range(rows):
+            row = []
+            for j in range(cols):
+                with tracing.span("crop_tile", row=i, col=j, level=level):
+                    left, top = j * part_width, i * part_height
+                    part = tk.PhotoImage(master=self.master, width=part_width, height=part_height)
+                    part.tk.call(part.name, "copy", str(board_photo), "-from",
+                                 left, top, left + part_width, top + part_height)
+                row.append(part)
+            parts.append(row)
+        return parts, black
+
+
+class BoardCanvas:
+    """The grid of squares as persistent canvas items.
+
+    Each cell owns a cover rectangle, a number and an image item, all
+    created once. Revealing a square and starting a new set only change item
+    options; clicks are mapped to cells by coordinates.
+    """
+
+    def __init__(self, parent, grid_order, tile_size, on_click, gap=4):
+        self.grid_order = grid_order
+        self.rows = len(grid_order)
+        self.cols = len(grid_order[0])
+        self.tile_width, self.tile_height = tile_size
+        self.gap = gap
+        self.on_click = on_click
+
+        width, height = board_size(tile_size, self.rows, self.cols, gap)
+        self.canvas = tk.Canvas(parent, width=width, height=height, highlightthickness=0)
+        self.canvas.bind("<Button-1>", self._clicked)
+        font = self._font()
+
+        self.covers = []
+        self.numbers = []
+        self.images = []
+        for i in range(self.rows):
+            cover_row, number_row, image_row = [], [], []
+            for j in range(self.cols):
+                left, top = self.cell_origin(i, j)
+                right, bottom = left + self.tile_width, top + self.tile_height
+                cover_row.append(self.canvas.create_rectangle(
+                    left, top, right, bottom, fill=COVER_FILL, outline=COVER_OUTLINE))
+                number_row.append(self.canvas.create_text(
+                    (left + right) // 2, (top + bottom) // 2,
+                    text=str(grid_order[i][j]), font=font))
+                image_row.append(self.canvas.create_image(
+                    left, top, anchor="nw", state="hidden"))
+            self.covers.append(cover_row)
+            self.numbers.append(number_row)
+            self.images.append(image_row)
+
+    def _font(self):
+        return (NUMBER_FONT, max(7, min(self.tile_width, self.tile_height) // 6), "bold")
+
+    def resize(self, tile_size, gap=None):
+        """Move every item for a new tile size; revealed squares need new images after this."""
+        self.tile_width, self.tile_height = tile_size
+        if gap is not None:
+            self.gap = gap
+        width, height = board_size(tile_size, self.rows, self.cols, self.gap)
+        self.canvas.config(width=width, height=height)
+        font = self._font()
+        for i in range(self.rows):
+            for j in range(self.cols):
+                left, top = self.cell_origin(i, j)
+                right, bottom = left + self.tile_width, top + self.tile_height
+                self.canvas.coords(self.covers[i][j], left, top, right, bottom)
+                self.canvas.coords(self.numbers[i][j], (left + right) // 2, (top + bottom) // 2)
+                self.canvas.itemconfigure(self.numbers[i][j], font=font)
+                self.canvas.coords(self.images[i][j], left, top)
+
+    def cell_origin(self, i, j):
+        """Top-left canvas coordinate of cell (i, j)."""
+        return (self.gap + j * (self.tile_width + self.gap),
+                self.gap + i * (self.tile_height + self.gap))
+
+    def cell_at(self, x, y):
+        """Return the (i, j) cell under canvas point (x, y), or None in a gap."""
+        step_x = self.tile_width + self.gap
+        step_y = self.tile_height + self.gap
+        j, offset_x = divmod(x - self.gap, step_x)
+        i, offset_y = divmod(y - self.gap, step_y)
+        if (0 <= i < self.rows and 0 <= j < self.cols
+                and offset_x < self.tile_width and offset_y < self.tile_height):
+            return int(i), int(j)
+        return None
+
+    def reset(self):
+        """Cover every square again, ready for a new round."""
+        for i in range(self.rows):
+            for j in range(self.cols):
+                self.canvas.itemconfigure(self.images[i][j], image="", state="hidden")
+                self.canvas.itemconfigure(self.covers[i][j], state="normal")
+                self.canvas.itemconfigure(self.numbers[i][j], state="normal")
+
+    def reveal(self, i, j, image):
+        """Show `image` (a PhotoImage) in place of square (i, j)'s cover."""
+        self.canvas.itemconfigure(self.images[i][j], image=image, state="normal")
+        self.canvas.itemconfigure(self.covers[i][j], state="hidden")
+        self.canvas.itemconfigure(self.numbers[i][j], state="hidden")
+
+    def _clicked(self, event):
+        cell = self.cell_at(event.x, event.y)
+        if cell is not None:
+            self.on_click(*cell)
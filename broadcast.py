@@ -0,0 +1,481 @@
+"""Off-screen broadcast frames of the board, for livestreaming without screen capture.
+
+A Compositor draws the board (image parts, black tiles, covers), the
+teams' names and scores, the unlocked hints and a status line into one
+RGB frame buffer that is reused for every frame. Each region remembers
+what it last showed, so a frame repaints only the regions whose state
+changed since the previous one; a frame where nothing changed costs a
+handful of comparisons.
+
+A Broadcaster renders the latest published BoardState at a fixed frame
+rate on its own thread and hands each frame to a sink: raw RGB on stdout
+for a local encoder, or a numbered file sequence (.ppm written straight
+from the buffer, or anything Pillow can save). If rendering falls behind,
+the last frame is repeated so the frame count keeps pace with the clock.
+
+challenge.py streams its rounds when MOBIUS_BROADCAST is set to "-" or
+to a file pattern; a journaled round can also be rendered afterwards:
+
+    MOBIUS_BROADCAST=- python challenge.py | ffmpeg -f rawvideo -pix_fmt rgb24 \\
+        -s 1280x720 -r 30 -i - round.mp4
+    python broadcast.py replay journals/20250301-101500-001.journal --out frames/%05d.ppm
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+from board import board_size, fit_level
+from engine import FINAL_GUESS, GAME_OVER, NUM_TEAMS
+
+FRAME_SIZE = (1280, 720)
+FPS = 30
+BACKGROUND = (24, 26, 33)
+PANEL = (38, 41, 51)
+COVER = (217, 217, 217)
+COVER_TEXT = (60, 60, 60)
+TEXT = (235, 235, 235)
+DIM_TEXT = (140, 144, 156)
+TEAM_COLORS = ("red", "blue", "green", "purple")  # As on the game screen
+TILE_GAP = 4
+HOLD_SECONDS = 3.0  # How long the final board stays up after a replayed round ends
+
+COVERED = 0
+CORRECT = 1
+INCORRECT = 2
+
+
+def load_font(size):
+    """A scalable font if Pillow has FreeType, else its fixed bitmap font."""
+    try:
+        return ImageFont.load_default(size)
+    except (TypeError, OSError, ImportError):
+        return ImageFont.load_default()
+
+
+class BoardState:
+    """What one frame shows; built on the Tk thread and read by the Broadcaster's."""
+
+    def __init__(self, cells, scores, current_team, team_names, unlocked, status=""):
+        self.cells = cells  # Tuple of rows of COVERED, CORRECT or INCORRECT
+        self.scores = scores
+        self.current_team = current_team  # -1 once the round is over
+        self.team_names = team_names
+        self.unlocked = unlocked  # Hint squares answered correctly
+        self.status = status
+
+    @classmethod
+    def from_game(cls, game, team_names, status=""):
+        cells = tuple(tuple(CORRECT if game.correct_answers[i][j]
+                            else INCORRECT if game.revealed[i][j] else COVERED
+                            for j in range(game.layout.cols))
+                      for i in range(game.layout.rows))
+        if not status:
+            if game.phase == FINAL_GUESS:
+                status = "Final hint"
+            elif game.phase == GAME_OVER:
+                status = "Obstacle found!" if game.obstacle_found else "Round over"
+        current = -1 if game.phase == GAME_OVER else game.current_team
+        return cls(cells, tuple(game.scores), current, tuple(team_names),
+                   frozenset(game.unlocked_hints), status)
+
+
+class Compositor:
+    """Paints BoardStates into one reused (height, width, 3) uint8 frame.
+
+    The board is drawn from the largest pyramid level (see LoadedSet.levels)
+    that fits the left of the frame; alpha in the tiles is flattened onto
+    the background once, up front. Pass the previous round's `frame` to
+    keep using its buffer.
+    """
+
+    def __init__(self, levels, layout, hints=None, title="", size=FRAME_SIZE, frame=None):
+        width, height = size
+        self.layout = layout
+        self.hints = dict(hints or {})
+        self.title = title
+        if frame is None or frame.shape != (height, width, 3):
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+        self.frame = frame
+        self.shown = {}  # Region -> what it last showed; empty until the first frame
+        self.rects = {}  # Region -> (left, top, right, bottom)
+        self.scratch = {}  # Region -> (Image, ImageDraw) reused for its text
+
+        margin = height // 24
+        rows, cols = layout.rows, layout.cols
+        tile_sizes = [(tiles.shape[3], tiles.shape[2]) for _, tiles in levels]
+        space = (int(width * 0.6), height - 2 * margin)
+        level = fit_level(tile_sizes, rows, cols, space, TILE_GAP)
+        tiles = levels[level][1]
+        board_width, board_height = board_size(tile_sizes[level], rows, cols, TILE_GAP)
+        if board_width > space[0] or board_height > space[1]:
+            # Smaller than the smallest level: shrink it once, here
+            tiles = _shrink(tiles, ((space[0] - TILE_GAP) // cols - TILE_GAP,
+                                    (space[1] - TILE_GAP) // rows - TILE_GAP))
+        self.tile_width, self.tile_height = tiles.shape[3], tiles.shape[2]
+        board_width, board_height = board_size((self.tile_width, self.tile_height), rows, cols,
+                                               TILE_GAP)
+        self.board_left, self.board_top = margin, (height - board_height) // 2
+
+        # Everything a cell can show, ready to copy in
+        self.parts = _flatten(tiles, BACKGROUND)
+        self.black = np.zeros((self.tile_height, self.tile_width, 3), dtype=np.uint8)
+        number_font = load_font(max(10, min(self.tile_width, self.tile_height) // 3))
+        self.covers = [[self._cover(layout.order[i][j], number_font) for j in range(cols)]
+                       for i in range(rows)]
+        for i in range(rows):
+            for j in range(cols):
+                left, top = self.cell_origin(i, j)
+                self.rects[("cell", i, j)] = (left, top, left + self.tile_width,
+                                              top + self.tile_height)
+
+        # Right-hand panel: title, one row per team, the hints, then the status line
+        panel_left = self.board_left + board_width + margin
+        panel_right = width - margin
+        row = height // 12
+        self.font = load_font(row * 2 // 5)
+        self.small_font = load_font(row // 3)
+        y = margin
+        self.rects["title"] = (panel_left, y, panel_right, y + row)
+        y += row + margin // 2
+        for team in range(NUM_TEAMS):
+            self.rects[("team", team)] = (panel_left, y, panel_right, y + row - 6)
+            y += row
+        y += margin // 2
+        hint_row = row * 2 // 3
+        for square in layout.center_squares:
+            self.rects[("hint", square)] = (panel_left, y, panel_right, y + hint_row - 4)
+            y += hint_row
+        self.rects["status"] = (panel_left, height - margin - row, panel_right, height - margin)
+
+    def cell_origin(self, i, j):
+        return (self.board_left + TILE_GAP + j * (self.tile_width + TILE_GAP),
+                self.board_top + TILE_GAP + i * (self.tile_height + TILE_GAP))
+
+    def render(self, state, full=False):
+        """Bring the frame up to date with `state`; returns the repainted rectangles.
+
+        With `full`, every region is repainted whether it changed or not.
+        """
+        if full or not self.shown:
+            self.frame[:] = BACKGROUND
+            self.shown = {}
+        dirty = []
+        for i, row in enumerate(state.cells):
+            for j, cell in enumerate(row):
+                if self._changed(("cell", i, j), cell):
+                    left, top, right, bottom = rect = self.rects[("cell", i, j)]
+                    if cell == CORRECT:
+                        source = self.parts[i, j]
+                    elif cell == INCORRECT:
+                        source = self.black
+                    else:
+                        source = self.covers[i][j]
+                    self.frame[top:bottom, left:right] = source
+                    dirty.append(rect)
+        if self._changed("title", self.title):
+            dirty.append(self._text("title", [(self.title, TEXT, self.font)]))
+        for team in range(NUM_TEAMS):
+            current = team == state.current_team
+            view = (state.team_names[team], state.scores[team], current)
+            if self._changed(("team", team), view):
+                dirty.append(self._team(team, *view))
+        for square in self.layout.center_squares:
+            hint = self.hints.get(square) if square in state.unlocked else None
+            if self._changed(("hint", square), hint):
+                text = f"Hint {square}: {hint}" if hint is not None else f"Hint {square}: -"
+                dirty.append(self._text(("hint", square),
+                                        [(text, TEXT if hint else DIM_TEXT, self.small_font)]))
+        if self._changed("status", state.status):
+            dirty.append(self._text("status", [(state.status, TEXT, self.font)]))
+        return dirty
+
+    def _changed(self, region, value):
+        if region in self.shown and self.shown[region] == value:
+            return False
+        self.shown[region] = value
+        return True
+
+    def _canvas(self, region, fill):
+        """The region's reusable scratch image, cleared to `fill`."""
+        left, top, right, bottom = self.rects[region]
+        entry = self.scratch.get(region)
+        if entry is None:
+            image = Image.new("RGB", (right - left, bottom - top))
+            entry = self.scratch[region] = (image, ImageDraw.Draw(image))
+        image, draw = entry
+        draw.rectangle((0, 0, image.width, image.height), fill=fill)
+        return image, draw
+
+    def _blit(self, region, image):
+        left, top, right, bottom = rect = self.rects[region]
+        self.frame[top:bottom, left:right] = np.asarray(image)
+        return rect
+
+    def _text(self, region, lines, fill=BACKGROUND):
+        image, draw = self._canvas(region, fill)
+        y = 0
+        for text, color, font in lines:
+            draw.text((4, y), _fit(draw, text, font, image.width - 8), fill=color, font=font)
+            y += image.height
+        return self._blit(region, image)
+
+    def _team(self, team, name, score, current):
+        image, draw = self._canvas(("team", team), PANEL if current else BACKGROUND)
+        color = ImageColor.getrgb(TEAM_COLORS[team])
+        draw.rectangle((0, 0, 7, image.height), fill=color)
+        score_text = str(score)
+        score_width = draw.textlength(score_text, font=self.font)
+        y = (image.height - self.font.size) // 2 if hasattr(self.font, "size") else 4
+        draw.text((18, y), _fit(draw, name, self.font, image.width - score_width - 40),
+                  fill=TEXT, font=self.font)
+        draw.text((image.width - score_width - 10, y), score_text, fill=TEXT, font=self.font)
+        return self._blit(("team", team), image)
+
+    def _cover(self, number, font):
+        image = Image.new("RGB", (self.tile_width, self.tile_height), COVER)
+        draw = ImageDraw.Draw(image)
+        draw.text((self.tile_width / 2, self.tile_height / 2), str(number), fill=COVER_TEXT,
+                  font=font, anchor="mm")
+        return np.asarray(image)
+
+
+def _flatten(tiles, background):
+    """RGB copies of a tile grid, with any alpha blended onto `background`."""
+    if tiles.shape[-1] == 3:
+        return np.ascontiguousarray(tiles)
+    rgb = tiles[..., :3].astype(np.uint16)
+    alpha = tiles[..., 3:].astype(np.uint16)
+    back = np.array(background, dtype=np.uint16)
+    return ((rgb * alpha + back * (255 - alpha) + 127) // 255).astype(np.uint8)
+
+
+def _shrink(tiles, tile_size):
+    """Resize a tile grid so each tile is at most `tile_size`, keeping its aspect ratio."""
+    from tile_cache import assemble_tiles, slice_image
+
+    rows, cols, part_height, part_width = tiles.shape[:4]
+    scale = min(tile_size[0] / part_width, tile_size[1] / part_height)
+    width, height = max(1, int(part_width * scale)), max(1, int(part_height * scale))
+    image = Image.fromarray(np.ascontiguousarray(assemble_tiles(tiles)))
+    return slice_image(image.resize((width * cols, height * rows), Image.LANCZOS), (rows, cols))
+
+
+def _fit(draw, text, font, width):
+    """`text`, cut short with an ellipsis if it is wider than `width` pixels."""
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "...", font=font) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+class RawSink:
+    """Writes each frame's bytes straight from its buffer to a binary stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, frame):
+        self.stream.write(frame.data)
+
+    def close(self):
+        self.stream.flush()
+
+
+class FileSequenceSink:
+    """Saves frame n to `pattern % n`; .ppm is written straight from the buffer."""
+
+    def __init__(self, pattern, start=0):
+        self.pattern = pattern
+        self.number = start
+        directory = os.path.dirname(pattern % start)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, frame):
+        path = self.pattern % self.number
+        self.number += 1
+        if path.endswith(".ppm"):
+            height, width = frame.shape[:2]
+            with open(path, "wb") as f:
+                f.write(b"P6\n%d %d\n255\n" % (width, height))
+                f.write(frame.data)
+        else:
+            Image.fromarray(frame).save(path)
+
+    def close(self):
+        pass
+
+
+def open_sink(target):
+    """A RawSink on stdout for "-", else a FileSequenceSink for the pattern."""
+    if target == "-":
+        return RawSink(sys.stdout.buffer)
+    if "%" not in target:
+        target = os.path.join(target, "%06d.ppm")
+    return FileSequenceSink(target)
+
+
+class Broadcaster:
+    """Renders the latest published BoardState at a fixed rate on its own thread.
+
+    `frames` counts frames written, `rendered` those that were rendered
+    rather than repeated to catch up, and `cpu_seconds` the thread's CPU
+    time spent rendering and writing.
+    """
+
+    def __init__(self, sink, size=FRAME_SIZE, fps=FPS, clock=time.monotonic):
+        self.sink = sink
+        self.size = size
+        self.fps = fps
+        self.clock = clock
+        self.compositor = None  # Only used on the broadcast thread
+        self._round = None  # set_round() arguments waiting for the next frame
+        self._state = None
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.rendered = 0
+        self.dirty_pixels = 0
+        self.cpu_seconds = 0.0
+        self._idle = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self._idle[:] = BACKGROUND
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="broadcast", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.sink.close()
+
+    def set_round(self, levels, layout, hints=None, title=""):
+        """Start drawing a new set's board from the next frame on."""
+        with self._lock:
+            self._round = (levels, layout, hints, title)
+            self._state = None
+
+    def publish(self, state):
+        """Make `state` the one the next frame shows."""
+        with self._lock:
+            self._state = state
+
+    def _render(self):
+        with self._lock:
+            new_round, self._round = self._round, None
+            state = self._state
+        if new_round is not None:
+            # Swapped in here, between frames, so the reused buffer never changes threads
+            previous = self.compositor.frame if self.compositor is not None else None
+            self.compositor = Compositor(*new_round, self.size, previous)
+        if self.compositor is None:
+            return self._idle
+        if state is None:
+            return self.compositor.frame
+        for left, top, right, bottom in self.compositor.render(state):
+            self.dirty_pixels += (right - left) * (bottom - top)
+        return self.compositor.frame
+
+    def _run(self):
+        start = self.clock()
+        frame = None
+        while not self._stop.is_set():
+            due = int((self.clock() - start) * self.fps) + 1
+            if self.frames >= due:
+                self._stop.wait((self.frames / self.fps) - (self.clock() - start))
+                continue
+            cpu = time.thread_time()
+            frame = self._render()
+            self.rendered += 1
+            try:
+                # Frames missed while rendering are repeated so the stream keeps time
+                while self.frames < due:
+                    self.sink.write(frame)
+                    self.frames += 1
+            except (BrokenPipeError, OSError):
+                self._stop.set()  # The encoder went away
+            self.cpu_seconds += time.thread_time() - cpu
+
+
+def replay_frames(records, compositor, team_names, fps=FPS, hold=HOLD_SECONDS):
+    """Yield the frames of a journaled round, `fps` per second of its recorded time."""
+    from engine import GridLayout, ObstacleGame
+    from journal import apply_record
+
+    _, _, _, rows, cols = records[0][:5]
+    game = ObstacleGame(GridLayout(rows, cols))
+    moves = [record for record in records if record[0] in ("A", "G", "F")]
+    end_ms = records[-1][1] + hold * 1000
+    applied = 0
+    number = 0
+    while number * 1000 / fps <= end_ms:
+        now_ms = number * 1000 / fps
+        while applied < len(moves) and moves[applied][1] <= now_ms:
+            apply_record(game, moves[applied])
+            applied += 1
+        compositor.render(BoardState.from_game(game, team_names))
+        yield compositor.frame
+        number += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render broadcast frames of a journaled round.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay_cmd = commands.add_parser("replay", help="render a round from its journal")
+    replay_cmd.add_argument("journal")
+    replay_cmd.add_argument("--out", default="-",
+                            help='"-" for raw RGB on stdout (default) or a pattern like frames/%%05d.ppm')
+    replay_cmd.add_argument("--fps", type=int, default=FPS)
+    replay_cmd.add_argument("--size", default=f"{FRAME_SIZE[0]}x{FRAME_SIZE[1]}")
+    replay_cmd.add_argument("--teams", nargs=NUM_TEAMS, metavar="NAME",
+                            default=[f"Team {i+1}" for i in range(NUM_TEAMS)])
+    replay_cmd.add_argument("--problems", default=None, help="folder the set was loaded from")
+    args = parser.parse_args(argv)
+
+    from journal import JournalError, read_journal
+    from loader import QuestionSetLoader
+    from question_set import PROBLEMS_DIR, QuestionSetError
+    from tile_cache import TileCache
+
+    width, _, height = args.size.partition("x")
+    size = (int(width), int(height))
+    try:
+        records = read_journal(args.journal)
+        question_id = records[0][2]
+        loader = QuestionSetLoader(TileCache(), args.problems or PROBLEMS_DIR,
+                                   pyramid=(0.5, 1.0, 1.5, 2.0, 3.0))
+        loaded = loader.load(question_id).result()
+        loader.shutdown()
+    except (OSError, JournalError, QuestionSetError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    question_set = loaded.question_set
+    compositor = Compositor(loaded.levels, question_set.layout, question_set.hints,
+                            f"Set {question_id}", size)
+    sink = open_sink(args.out)
+    start = time.perf_counter()
+    frames = 0
+    try:
+        for frame in replay_frames(records, compositor, args.teams, args.fps):
+            sink.write(frame)
+            frames += 1
+    except BrokenPipeError:
+        return 1
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - start
+    print(f"{frames} frames ({frames / args.fps:.1f} s at {args.fps} fps) in {elapsed:.2f} s, "
+          f"{frames / elapsed:.0f} fps", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+"""Networked buzzers for guessing the Obstacle out of turn, with fair arbitration.
+
+Teams buzz from their own devices over UDP on the local network. Every
+datagram is stamped with time.monotonic() as soon as it is read. The
+server measures each client's clock offset with round-trip pings, keeping
+the sample with the shortest round trip, so a buzz can be dated by when
+it was pressed rather than when it happened to arrive. The first buzz
+opens a short window. When the window closes, the earliest press wins.
+Ties go to the earlier receipt and then to the lower team number. A press
+is never dated after its receipt, or earlier than the client's measured
+round trip allows, so a client cannot claim a head start by lying about
+its clock.
+
+Messages are JSON, one per datagram:
+
+    client -> server   {"op": "hello", "client": "c1", "team": 2}
+                       {"op": "pong", "s": <echoed>, "c": <client clock>}
+                       {"op": "buzz", "client": "c1", "seq": 7, "c": <client clock>}
+    server -> client   {"op": "ping", "s": <server clock>}
+                       {"op": "ack", "seq": 7, "accepted": true}
+                       {"op": "won"} / {"op": "lost", "team": 1}
+                       {"op": "error", "error": "..."}   (a hello that was refused)
+
+Teams are numbered from 0. Clocks are in seconds. Clients may resend a buzz; repeats of a seq are
+acknowledged and otherwise ignored. To try it from a terminal:
+
+    python buzzer.py client --host 192.168.1.20 --team 2
+"""
+import argparse
+import asyncio
+import collections
+import json
+import queue
+import sys
+import threading
+import time
+
+from engine import NUM_TEAMS
+
+DEFAULT_PORT = 8766
+WINDOW = 0.050  # Seconds after the first buzz before a winner is picked
+RESOLUTION = 0.001  # Presses closer together than this are a tie
+SKEW_MARGIN = 0.005  # Slack on the earliest press a client's round trip allows
+CALIBRATION_PINGS = 8  # Pings sent when a client says hello
+CALIBRATION_SPACING = 0.02  # Seconds between those pings
+RECALIBRATE_EVERY = 10.0  # Seconds between pings that follow clock drift
+CLOCK_SAMPLES = 16  # Round trips kept per client
+
+
+class ClientClock:
+    """Offset of a client's clock from ours, from its fastest recent round trip."""
+
+    def __init__(self):
+        self.samples = collections.deque(maxlen=CLOCK_SAMPLES)
+        self.offset = None
+        self.rtt = None
+
+    def add(self, sent, client_time, received):
+        """Add a ping sent at `sent` and answered at `client_time`, read back at `received`."""
+        rtt = received - sent
+        if rtt < 0:
+            return
+        self.samples.append((rtt, client_time - (sent + received) / 2))
+        self.rtt, self.offset = min(self.samples)
+
+    def to_local(self, client_time, received):
+        """Date a client timestamp on our clock, bounded by what the round trip allows."""
+        if self.offset is None:
+            return received
+        pressed = client_time - self.offset
+        return max(received - self.rtt - SKEW_MARGIN, min(pressed, received))
+
+
+class Buzz:
+    """One buzz, dated on the server's monotonic clock."""
+
+    def __init__(self, team, client, pressed, received):
+        self.team = team
+        self.client = client
+        self.pressed = pressed
+        self.received = received
+
+    def key(self):
+        return (int(self.pressed / RESOLUTION), self.received, self.team, self.client)
+
+
+class Decision:
+    """The winning buzz, every buzz that took part, and when the window closed."""
+
+    def __init__(self, winner, buzzes, decided):
+        self.winner = winner
+        self.buzzes = buzzes
+        self.decided = decided
+
+    @property
+    def team(self):
+        return self.winner.team
+
+
+class Arbiter:
+    """Decides which team buzzed first; no networking, so it can be driven directly.
+
+    The arbiter is open until a decision is made, then locked until
+    release(). Teams that guessed wrong can be locked out for the round.
+    """
+
+    def __init__(self, window=WINDOW, teams=NUM_TEAMS):
+        self.window = window
+        self.team_count = teams
+        self.clocks = {}
+        self.teams = {}
+        self.locked_out = set()
+        self.locked = False
+        self.buzzes = []
+        self.seen = set()
+
+    def register(self, client, team):
+        """Let `client` buzz for `team`; raises ValueError for a team that is not playing."""
+        if type(team) is not int or not 0 <= team < self.team_count:
+            raise ValueError(f"team must be a number from 0 to {self.team_count - 1}, got {team!r}")
+        self.teams[client] = team
+        self.clocks.setdefault(client, ClientClock())
+
+    def buzz(self, client, seq, client_time, received):
+        """Record a buzz; returns the time the window closes if this one opened it.
+
+        Returns False if the buzz is not accepted (unknown client, locked,
+        locked-out team or a repeat), and None if it joined an open window.
+        """
+        team = self.teams.get(client)
+        if team is None or (client, seq) in self.seen:
+            return False
+        self.seen.add((client, seq))
+        if self.locked or team in self.locked_out:
+            return False
+        pressed = self.clocks[client].to_local(client_time, received)
+        self.buzzes.append(Buzz(team, client, pressed, received))
+        if len(self.buzzes) == 1:
+            return received + self.window
+        return None
+
+    def decide(self, now):
+        """Close the window, lock the arbiter and return the Decision (None if no buzzes)."""
+        if not self.buzzes:
+            return None
+        buzzes = sorted(self.buzzes, key=Buzz.key)
+        self.buzzes = []
+        self.locked = True
+        return Decision(buzzes[0], buzzes, now)
+
+    def release(self):
+        """Open for buzzes again after a guess has been dealt with."""
+        self.locked = False
+        self.buzzes = []
+
+    def lock_out(self, team):
+        self.locked_out.add(team)
+
+    def reset(self):
+        """Start a new round: everyone may buzz again."""
+        self.locked_out.clear()
+        self.seen.clear()
+        self.release()
+
+
+class _BuzzerProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def connection_made(self, transport):
+        self.server.transport = transport
+
+    def datagram_received(self, data, addr):
+        received = time.monotonic()
+        try:
+            message = json.loads(data)
+            self.server.handle(message, addr, received)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            pass
+
+
+class BuzzerServer:
+    """Runs the UDP listener on its own asyncio thread and queues Decisions for the UI.
+
+    The Tk main loop polls `decisions` with after(). release(), lock_out()
+    and reset() may be called from any thread.
+    """
+
+    def __init__(self, host="0.0.0.0", port=DEFAULT_PORT, window=WINDOW):
+        self.host = host
+        self.port = port
+        self.arbiter = Arbiter(window)
+        self.decisions = queue.Queue()
+        self.addresses = {}
+        self.address = None
+        self.transport = None
+        self.loop = None
+        self._thread = None
+        self._window = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self):
+        """Start listening; returns once the socket is bound."""
+        self._thread = threading.Thread(target=self._run, name="buzzer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self.address
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+
+    def release(self):
+        self._call(self._cancel_window, self.arbiter.release)
+
+    def lock_out(self, team):
+        self._call(self.arbiter.lock_out, team)
+
+    def reset(self):
+        self._call(self._cancel_window, self.arbiter.reset)
+
+    def handle(self, message, addr, received):
+        op = message["op"]
+        if op == "buzz":
+            client = str(message["client"])
+            seq = message["seq"]
+            closes = self.arbiter.buzz(client, seq, float(message["c"]), received)
+            self.send({"op": "ack", "seq": seq, "accepted": closes is not False}, addr)
+            if closes:
+                self._window = self.loop.call_at(closes, self._decide)
+        elif op == "pong":
+            client = self.addresses.get(addr)
+            if client is not None:
+                self.arbiter.clocks[client].add(float(message["s"]), float(message["c"]), received)
+        elif op == "hello":
+            client = str(message["client"])
+            try:
+                self.arbiter.register(client, message.get("team"))
+            except ValueError as e:
+                self.send({"op": "error", "error": str(e)}, addr)
+                return
+            self.addresses[addr] = client
+            for n in range(CALIBRATION_PINGS):
+                self.loop.call_later(n * CALIBRATION_SPACING, self.ping, addr)
+
+    def ping(self, addr):
+        self.send({"op": "ping", "s": time.monotonic()}, addr)
+
+    def send(self, message, addr):
+        self.transport.sendto(json.dumps(message, separators=(",", ":")).encode("utf-8"), addr)
+
+    def _decide(self):
+        self._window = None
+        decision = self.arbiter.decide(time.monotonic())
+        if decision is None:
+            return
+        self.decisions.put(decision)
+        by_client = {client: addr for addr, client in self.addresses.items()}
+        for buzz in decision.buzzes:
+            addr = by_client.get(buzz.client)
+            if addr is not None:
+                won = buzz is decision.winner
+                self.send({"op": "won"} if won else {"op": "lost", "team": decision.team}, addr)
+
+    def _recalibrate(self):
+        for addr in list(self.addresses):
+            self.ping(addr)
+        self.loop.call_later(RECALIBRATE_EVERY, self._recalibrate)
+
+    def _cancel_window(self, then):
+        if self._window is not None:
+            self._window.cancel()
+            self._window = None
+        then()
+
+    def _call(self, func, *args):
+        if self.loop is None:
+            func(*args)
+        else:
+            self.loop.call_soon_threadsafe(func, *args)
+
+    def _run(self):
+        # The default event loop's clock is time.monotonic(), so call_at() and
+        # receipt stamps share one timeline
+        self.loop = asyncio.new_event_loop()
+        try:
+            transport, _ = self.loop.run_until_complete(self.loop.create_datagram_endpoint(
+                lambda: _BuzzerProtocol(self), local_addr=(self.host, self.port)))
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+        self.address = transport.get_extra_info("sockname")[:2]
+        self.loop.call_later(RECALIBRATE_EVERY, self._recalibrate)
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            transport.close()
+            self.loop.close()
+
+
+class BuzzerClient(asyncio.DatagramProtocol):
+    """A team's buzzer: answers pings and sends buzzes stamped with its own clock.
+
+    `clock` returns the client's time in seconds; `on_message` sees every
+    other message from the server.
+    """
+
+    def __init__(self, client, team, clock=time.monotonic, on_message=None):
+        self.client = client
+        self.team = team
+        self.clock = clock
+        self.on_message = on_message
+        self.transport = None
+        self.seq = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.send({"op": "hello", "client": self.client, "team": self.team})
+
+    def datagram_received(self, data, addr):
+        message = json.loads(data)
+        if message["op"] == "ping":
+            self.send({"op": "pong", "s": message["s"], "c": self.clock()})
+        elif self.on_message is not None:
+            self.on_message(message)
+
+    def buzz(self, repeats=2):
+        """Buzz now; the datagram is sent `repeats` times in case one is lost."""
+        self.seq += 1
+        message = {"op": "buzz", "client": self.client, "seq": self.seq, "c": self.clock()}
+        for _ in range(repeats):
+            self.send(message)
+
+    def send(self, message):
+        self.transport.sendto(json.dumps(message, separators=(",", ":")).encode("utf-8"))
+
+
+async def _client(args):
+    loop = asyncio.get_running_loop()
+    _, protocol = await loop.create_datagram_endpoint(
+        lambda: BuzzerClient(args.name or f"team{args.team}", args.team - 1,
+                             on_message=lambda m: print(m, flush=True)),
+        remote_addr=(args.host, args.port))
+    print(f"Team {args.team}: press Enter to buzz, Ctrl-D to quit.")
+    while await loop.run_in_executor(None, sys.stdin.readline):
+        protocol.buzz()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buzzers for guessing the Obstacle.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    client = commands.add_parser("client", help="buzz from this terminal")
+    client.add_argument("--host", default="127.0.0.1")
+    client.add_argument("--port", type=int, default=DEFAULT_PORT)
+    client.add_argument("--team", type=int, required=True, help="team number, 1 to 4")
+    client.add_argument("--name", help="client name (default: team<N>)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_client(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
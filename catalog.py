@@ -0,0 +1,168 @@
+"""Persistent index of the question sets available in the problems folder."""
+import json
+import os
+
+from question_set import (PROBLEMS_DIR, QuestionSetError, find_question_ids, load_question_set,
+                          question_set_paths)
+
+CATALOG_FILE = os.path.join(PROBLEMS_DIR, ".catalog.json")
+CATALOG_VERSION = 1
+
+
+class CatalogEntry:
+    """What the selection screen needs to know about one set."""
+
+    def __init__(self, question_id, obstacle_answer="", question_count=0, image_size=None,
+                 error=None, signature=None):
+        self.question_id = question_id
+        self.obstacle_answer = obstacle_answer
+        self.question_count = question_count
+        self.image_size = image_size
+        self.error = error  # None when the set is valid
+        self.signature = signature  # (mtime, size) of the questions and image files
+
+    @property
+    def valid(self):
+        return self.error is None
+
+    def to_dict(self):
+        return {
+            "obstacle_answer": self.obstacle_answer,
+            "question_count": self.question_count,
+            "image_size": self.image_size,
+            "error": self.error,
+            "signature": self.signature,
+        }
+
+    @classmethod
+    def from_dict(cls, question_id, data):
+        return cls(question_id, data["obstacle_answer"], data["question_count"],
+                   data["image_size"], data["error"], data["signature"])
+
+
+class Catalog:
+    """Scans the problems folder once and keeps the results in a JSON index.
+
+    `refresh()` only re-checks sets whose questions or image file changed
+    size or mtime since the index was written. Sets in a packed archive are
+    listed too and, as in the loader, take precedence over loose files with
+    the same ID.
+    """
+
+    def __init__(self, problems_dir=PROBLEMS_DIR, index_file=None, archive=None):
+        self.problems_dir = problems_dir
+        self.index_file = index_file or os.path.join(problems_dir, os.path.basename(CATALOG_FILE))
+        self.archive = archive
+        self._entries = {}
+        self._load_index()
+
+    def refresh(self):
+        """Bring the index up to date with the folder and return how many sets were re-checked."""
+        entries = {}
+        rechecked = 0
+        indexed_ids = {question_id for question_id, entry in self._entries.items()
+                       if entry.signature is not None}
+        disk_ids = find_question_ids(self.problems_dir)
+        if self.archive is not None:
+            # The loader serves these from the archive, so that is what is listed
+            packed = set(self.archive.ids())
+            disk_ids = [question_id for question_id in disk_ids if question_id not in packed]
+        for question_id in disk_ids:
+            signature = self._signature(question_id)
+            entry = self._entries.get(question_id)
+            if entry is None or entry.signature != signature:
+                entry = self._check(question_id, signature)
+                rechecked += 1
+            entries[question_id] = entry
+
+        if self.archive is not None:
+            for question_id in self.archive.ids():
+                entries[question_id] = self._check_packed(question_id)
+
+        changed = rechecked or set(disk_ids) != indexed_ids
+        self._entries = entries
+        if changed:
+            self._save_index()
+        return rechecked
+
+    def entries(self):
+        """Return all entries sorted by ID."""
+        # refresh() may swap in new entries from another thread meanwhile
+        entries = self._entries
+        return [entries[question_id] for question_id in sorted(entries)]
+
+    def get(self, question_id):
+        return self._entries.get(question_id)
+
+    def search(self, text):
+        """Return entries whose ID or Obstacle answer contains `text` (case-insensitive)."""
+        needle = text.strip().casefold()
+        if not needle:
+            return self.entries()
+        return [entry for entry in self.entries()
+                if needle in entry.question_id or needle in entry.obstacle_answer.casefold()]
+
+    def _signature(self, question_id):
+        signature = []
+        for path in question_set_paths(question_id, self.problems_dir):
+            try:
+                st = os.stat(path)
+                signature.extend([st.st_mtime_ns, st.st_size])
+            except OSError:
+                signature.extend([None, None])
+        return signature
+
+    def _check(self, question_id, signature):
+        # Pillow is only needed for sets that changed, not on every startup
+        from PIL import Image
+
+        try:
+            question_set = load_question_set(question_id, self.problems_dir)
+        except QuestionSetError as e:
+            return CatalogEntry(question_id, error=str(e), signature=signature)
+
+        entry = CatalogEntry(question_id, question_set.obstacle_answer,
+                             len(question_set.questions), signature=signature)
+        try:
+            # Only the header is read here; the full decode happens at load time
+            with Image.open(question_set.image_file) as img:
+                entry.image_size = list(img.size)
+        except Exception as e:
+            entry.error = f"Failed to load image: {str(e)}"
+        return entry
+
+    def _check_packed(self, question_id):
+        try:
+            question_set = self.archive.question_set(question_id)
+        except QuestionSetError as e:
+            return CatalogEntry(question_id, error=str(e))
+        packed = self.archive.index[question_id]
+        image_size = [packed["tile_size"][0] * packed["grid_size"][1],
+                      packed["tile_size"][1] * packed["grid_size"][0]]
+        return CatalogEntry(question_id, question_set.obstacle_answer,
+                            len(question_set.questions), image_size)
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CATALOG_VERSION:
+                return
+            self._entries = {question_id: CatalogEntry.from_dict(question_id, entry)
+                             for question_id, entry in data["entries"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            self._entries = {}  # Missing or unreadable index: rebuild on refresh
+
+    def _save_index(self):
+        data = {
+            "version": CATALOG_VERSION,
+            "entries": {entry.question_id: entry.to_dict() for entry in self.entries()
+                        if entry.signature is not None},
+        }
+        tmp_path = f"{self.index_file}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.index_file)
+        except OSError:
+            pass  # A read-only problems folder just means rescanning next time
@@ -1,179 +1,580 @@
 import tkinter as tk
-from tkinter import messagebox, simpledialog, Entry, Button, Label
-from PIL import Image, ImageTk, ImageDraw
-import json
+from tkinter import ttk, messagebox, Entry, Button, Label
 import os
+import threading
+
+import tracing
+from answer_panel import AnswerPanel
+from board import BoardCanvas, BoardImages, fit_level, nearest_level
+from catalog import Catalog
+from engine import NUM_TEAMS, ObstacleGame, PLAYING, FINAL_GUESS, GAME_OVER, FINAL_THINKING_TIME
+from history import GameLog, HistoryStore
+from journal import SYNC_INTERVAL, RoundJournal, abandon, find_unfinished, read_journal
+from loader import QuestionSetLoader, BUILDING
+from pack import PACK_FILE, PackedArchive
+from question_set import QuestionSetError, next_question_id
+
+LOAD_POLL_MS = 20  # How often the main loop checks on a background load
+BUZZER_POLL_MS = 10  # How often the main loop checks for a buzzer decision
+BUZZER_ENV = "MOBIUS_BUZZER"  # Port, or host:port, to listen on for team buzzers
+TOURNAMENT_ENV = "MOBIUS_TOURNAMENT"  # Name of the tournament whose rounds are being played
+BROADCAST_ENV = "MOBIUS_BROADCAST"  # "-" for raw RGB frames on stdout, or a file pattern
+BROADCAST_POLL_MS = 33  # How often the board state is handed to the broadcast thread
+LEADERBOARD_ROWS = 10  # Teams shown on the leaderboard between rounds
+IMAGE_SIZE = (400, 400)  # The hidden image is resized to this before splitting
+PYRAMID_SCALES = (0.75, 1.0, 1.5, 2.0, 3.0, 4.0)  # Board sizes built per set, times IMAGE_SIZE
+RESIZE_DEBOUNCE_MS = 150  # Quiet time after the last resize before the board is re-rendered
+BASE_DPI = 96  # IMAGE_SIZE is meant for a display of this many dots per inch
+BOARD_GAP = 4  # Pixels between squares at BASE_DPI
+
+
+def warm_up_images():
+    """Import Pillow, NumPy and the tile cache and run one small resize.
+    
+    Runs on a background thread once the first screen is drawn, so the
+    window appears before the image stack has loaded.
+    """
+    from PIL import Image, ImageTk  # noqa: F401
+    import tile_cache  # noqa: F401
+    Image.new("RGB", (64, 64)).resize((16, 16), Image.LANCZOS)
+
+
+def make_tile_cache():
+    """The tile cache, made on the loader's thread the first time a set loads."""
+    from tile_cache import TileCache
+    
+    # Resized images and tiles survive "Change Question Set"; room for
+    # every level of the current, previous and prefetched sets
+    return TileCache(max_entries=3 * len(PYRAMID_SCALES))
+
+
+def start_buzzer():
+    """Start the LAN buzzer listener if MOBIUS_BUZZER is set, else return None."""
+    setting = os.environ.get(BUZZER_ENV)
+    if not setting:
+        return None
+    from buzzer import BuzzerServer
+    
+    host, _, port = setting.rpartition(":")
+    server = BuzzerServer(host or "0.0.0.0", int(port))
+    server.start()
+    return server
+
+
+def open_scoreboard():
+    """Open the tournament scoreboard if MOBIUS_TOURNAMENT is set, else return None."""
+    if not os.environ.get(TOURNAMENT_ENV):
+        return None
+    from tournament import Scoreboard
+    
+    return Scoreboard()
+
+
+def start_broadcast():
+    """Start rendering broadcast frames if MOBIUS_BROADCAST is set, else return None."""
+    target = os.environ.get(BROADCAST_ENV)
+    if not target:
+        return None
+    from broadcast import Broadcaster, open_sink
+    
+    return Broadcaster(open_sink(target)).start()
 
 class ObstacleCourse:
     def __init__(self, root):
         self.root = root
         self.root.title("Obstacle Course Round - Math Competition Practice")
         
-        # Grid arrangement as per the rules
-        self.grid_order = [
-            [1, 2, 3, 4],
-            [12, 13, 14, 5],
-            [11, 16, 15, 6],
-            [10, 9, 8, 7]
-        ]
+        # Grid arrangement for the loaded set; the board is built for it on load
+        self.layout = None
+        self.grid_order = None
+        # The board is drawn from the pyramid level that fits the window; see apply_board_size()
+        self.dpi_scale = root.winfo_fpixels("1i") / BASE_DPI
+        self.board_images = None
+        self.level = None
+        self.resize_job = None
+        
+        # A packed archive, when present, serves sets without decoding any PNGs
+        self.archive = PackedArchive(PACK_FILE) if os.path.exists(PACK_FILE) else None
+        self.catalog = Catalog(archive=self.archive)
+        # The loader's threads also rescan the catalog; see refresh_catalog()
+        self.loader = None
+        self.catalog_job = None
+        self.warm_up_thread = None
+        self.pending_load = None
+        # Every move of the current round is journaled; see offer_resume()
+        self.journal = None
+        self.resume = None
+        # Finished rounds' moves go to the history store for analytics; see end_round()
+        self.game_log = None
+        self.history = None
+        self.game = None
+        self.buzzer = start_buzzer()
+        # Off-screen frames of the board for a livestream; see poll_broadcast()
+        self.broadcaster = start_broadcast()
+        # In a tournament each round's scores are added to the scoreboard; see round_over()
+        self.tournament = os.environ.get(TOURNAMENT_ENV)
+        self.scoreboard = open_scoreboard()
+        self.question_id = None
+        self.next_round_id = None
+        self.team_names = [f"Team {i+1}" for i in range(NUM_TEAMS)]
+        self.team_colors = ["red", "blue", "green", "purple"]  # Colors for each team
         
-        # Create ID selection UI first
+        # Both screens are built once and swapped on set changes
+        self.create_selection_screen()
+        self.create_game_screen()
+        
+        # Show ID selection UI first, and load the image stack once it is drawn
+        self.select_frame.bind("<Map>", self.schedule_warm_up)
         self.setup_id_selection()
+        self.root.after_idle(self.offer_resume)
+        self.sync_journal()
+        if self.buzzer is not None:
+            self.poll_buzzer()
+        if self.broadcaster is not None:
+            self.poll_broadcast()
     
-    def setup_id_selection(self):
-        """Create UI for selecting the question set ID."""
-        # Clear any existing widgets
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        
-        # Create frame for ID selection
-        select_frame = tk.Frame(self.root)
-        select_frame.pack(pady=20, padx=20)
-        
-        # Label
-        label = Label(select_frame, text="Enter Question Set ID (e.g., 001):", font=("Arial", 12))
-        label.grid(row=0, column=0, padx=5, pady=10)
-        
-        # Entry for ID input
-        self.id_entry = Entry(select_frame, width=10, font=("Arial", 12))
+    def offer_resume(self):
+        """Offer to carry on with a round a crash or power cut interrupted."""
+        recovered = find_unfinished()
+        if recovered is None:
+            return
+        if recovered.game.phase == GAME_OVER:
+            # Only the closing line was lost
+            self.game_log = GameLog.from_journal(read_journal(recovered.path))
+            self.game = recovered.game
+            abandon(recovered, completed=True)
+            self.end_round()
+            return
+        scores = ", ".join(str(score) for score in recovered.game.scores)
+        if messagebox.askyesno("Resume Round",
+                               f"Set {recovered.question_id} was interrupted "
+                               f"(scores {scores}). Resume it?"):
+            self.resume = recovered
+            self.start_load(recovered.question_id)
+        else:
+            abandon(recovered)
+    
+    def sync_journal(self):
+        """Flush the journal's batched fsync while the player is thinking."""
+        if self.journal is not None:
+            self.journal.sync_if_due()
+        self.root.after(int(SYNC_INTERVAL * 1000), self.sync_journal)
+    
+    def poll_buzzer(self):
+        """Hand the team that buzzed first to guess_obstacle() once the board is idle."""
+        # A buzz waits while a question or guess is open in the answer panel
+        if not self.panel.active and not self.buzzer.decisions.empty():
+            decision = self.buzzer.decisions.get()
+            if self.journal is not None and self.game.phase == PLAYING:
+                self.guess_obstacle(team=decision.team)
+            else:
+                self.buzzer.release()
+        self.root.after(BUZZER_POLL_MS, self.poll_buzzer)
+    
+    def poll_broadcast(self):
+        """Hand the current board to the broadcast thread, which repaints only what changed."""
+        if self.game is not None:
+            from broadcast import BoardState
+            
+            self.broadcaster.publish(BoardState.from_game(
+                self.game, self.team_names, self.status_label.cget("text")))
+        self.root.after(BROADCAST_POLL_MS, self.poll_broadcast)
+    
+    def end_round(self, completed=True):
+        """Close the current round's journal with its final scores and add it to the history."""
+        if self.journal is not None:
+            self.journal.finish(completed)
+            self.journal = None
+        if completed and self.game_log is not None:
+            if self.history is None:
+                self.history = HistoryStore()
+            self.history.record(self.game_log, self.game)
+        self.game_log = None
+    
+    def schedule_warm_up(self, event=None):
+        """Start warm_up_images() after the selection screen's first frame."""
+        if self.warm_up_thread is None:
+            self.warm_up_thread = threading.Thread(target=warm_up_images, name="warm-up",
+                                                   daemon=True)
+            self.root.after_idle(self.warm_up_thread.start)
+    
+    def get_loader(self):
+        """Return the question set loader, creating it on first use."""
+        if self.loader is None:
+            # The tile cache needs the image stack, so the loader makes it on its own thread
+            self.loader = QuestionSetLoader(make_tile_cache, image_size=IMAGE_SIZE,
+                                            archive=self.archive, pyramid=PYRAMID_SCALES)
+        return self.loader
+    
+    def create_selection_screen(self):
+        """Create UI for picking a question set from the catalog."""
+        self.select_frame = select_frame = tk.Frame(self.root)
+        
+        # Search box filters the list by ID or Obstacle answer
+        label = Label(select_frame, text="Search Question Sets:", font=("Arial", 12))
+        label.grid(row=0, column=0, padx=5, pady=10, sticky="w")
+        
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.update_set_list())
+        self.id_entry = Entry(select_frame, width=25, font=("Arial", 12),
+                              textvariable=self.search_var)
         self.id_entry.grid(row=0, column=1, padx=5, pady=10)
-        self.id_entry.insert(0, "001")  # Default value
+        self.id_entry.bind("<Return>", lambda event: self.load_question_set())
+        
+        # List of sets; broken ones are shown in red with the reason
+        list_frame = tk.Frame(select_frame)
+        list_frame.grid(row=1, column=0, columnspan=2)
+        self.set_list = tk.Listbox(list_frame, width=60, height=12, font=("Courier", 10),
+                                   exportselection=False)
+        scrollbar = tk.Scrollbar(list_frame, command=self.set_list.yview)
+        self.set_list.config(yscrollcommand=scrollbar.set)
+        self.set_list.pack(side="left")
+        scrollbar.pack(side="right", fill="y")
+        self.set_list.bind("<Double-Button-1>", lambda event: self.load_question_set())
         
         # Load button
-        load_btn = Button(select_frame, text="Load Question Set", 
-                         command=self.load_question_set, font=("Arial", 12))
-        load_btn.grid(row=1, column=0, columnspan=2, pady=10)
+        self.load_btn = Button(select_frame, text="Load Question Set", 
+                               command=self.load_question_set, font=("Arial", 12))
+        self.load_btn.grid(row=2, column=0, columnspan=2, pady=10)
+        
+        # Progress indicator for the background load
+        self.progress_label = Label(select_frame, text="", font=("Arial", 10))
+        self.progress_label.grid(row=3, column=0, columnspan=2)
+        self.progress_bar = ttk.Progressbar(select_frame, length=250, maximum=1.0)
+        self.progress_bar.grid(row=4, column=0, columnspan=2, pady=5)
+        
+        if self.scoreboard is not None:
+            self.create_tournament_widgets(select_frame)
+    
+    def create_tournament_widgets(self, select_frame):
+        """Add the team names and the leaderboard to the selection screen."""
+        teams_frame = tk.Frame(select_frame)
+        teams_frame.grid(row=5, column=0, columnspan=2, pady=5)
+        Label(teams_frame, text="Teams:", font=("Arial", 12)).grid(row=0, column=0, padx=5)
+        self.team_entries = []
+        for i, name in enumerate(self.team_names):
+            entry = Entry(teams_frame, width=12, font=("Arial", 11), fg=self.team_colors[i])
+            entry.insert(0, name)
+            entry.grid(row=0, column=i + 1, padx=3)
+            self.team_entries.append(entry)
+        
+        Label(select_frame, text=f"Leaderboard - {self.tournament}",
+              font=("Arial", 12, "bold")).grid(row=6, column=0, columnspan=2, pady=(10, 0))
+        self.leaderboard_list = tk.Listbox(select_frame, width=60, height=LEADERBOARD_ROWS,
+                                           font=("Courier", 10))
+        self.leaderboard_list.grid(row=7, column=0, columnspan=2)
+    
+    def update_leaderboard(self):
+        """Refill the leaderboard from the scoreboard's ranked index."""
+        from tournament import format_standings
+        
+        self.leaderboard_list.delete(0, tk.END)
+        standings = self.scoreboard.leaderboard(self.tournament, LEADERBOARD_ROWS)
+        for line in format_standings(standings):
+            self.leaderboard_list.insert(tk.END, line)
+    
+    def setup_id_selection(self, status=""):
+        """Show the question set selection screen."""
+        self.game_frame.pack_forget()
+        self.panel.cancel()
+        self.end_round(completed=False)
+        
+        # The list shows the last scan at once and is refilled when the rescan finishes
+        self.update_set_list()
+        self.refresh_catalog()
+        if self.scoreboard is not None:
+            self.update_leaderboard()
+            self.select_set(self.next_round_id)
+        
+        self.load_btn.config(state="normal")
+        self.progress_label.config(text=status)
+        self.progress_bar["value"] = 0
+        self.select_frame.pack(pady=20, padx=20)
+        self.id_entry.focus_set()
+    
+    def refresh_catalog(self):
+        """Re-check the sets whose files changed since the last scan, on the loader's threads."""
+        if self.catalog_job is None:
+            self.catalog_job = self.get_loader().run(self.catalog.refresh)
+            self.poll_catalog()
+    
+    def poll_catalog(self):
+        """Refill the set list once the catalog rescan is done, keeping the selected set."""
+        if not self.catalog_job.done():
+            self.root.after(LOAD_POLL_MS, self.poll_catalog)
+            return
+        job, self.catalog_job = self.catalog_job, None
+        try:
+            job.result()
+        except Exception as e:
+            # The list keeps showing the last scan
+            self.progress_label.config(text=f"Could not rescan the question sets: {e}")
+            return
+        selection = self.set_list.curselection()
+        selected = self.listed_sets[selection[0]].question_id if selection else None
+        self.update_set_list()
+        if any(entry.question_id == selected for entry in self.listed_sets):
+            self.select_set(selected)
+    
+    def update_set_list(self):
+        """Refill the set list from the catalog using the current search text."""
+        self.listed_sets = self.catalog.search(self.search_var.get())
+        self.set_list.delete(0, tk.END)
+        for index, entry in enumerate(self.listed_sets):
+            if entry.valid:
+                width, height = entry.image_size
+                text = (f"{entry.question_id}  {entry.obstacle_answer[:28]:<28} "
+                        f"{entry.question_count:>2}q {width}x{height}")
+            else:
+                text = f"{entry.question_id}  BROKEN: {entry.error}"
+            self.set_list.insert(tk.END, text)
+            if not entry.valid:
+                self.set_list.itemconfig(index, fg="red")
+        if self.listed_sets:
+            self.set_list.selection_set(0)
+    
+    def select_set(self, question_id):
+        """Select a set in the list, clearing the search if it hides it."""
+        if question_id is None:
+            return
+        if not any(entry.question_id == question_id for entry in self.listed_sets):
+            self.search_var.set("")
+        for index, entry in enumerate(self.listed_sets):
+            if entry.question_id == question_id:
+                self.set_list.selection_clear(0, tk.END)
+                self.set_list.selection_set(index)
+                self.set_list.see(index)
+                return
     
     def load_question_set(self):
-        """Load the question set with the specified ID."""
-        question_id = self.id_entry.get().strip()
-        
-        # Validate ID format
-        if not question_id.isdigit():
-            messagebox.showerror("Invalid ID", "Please enter a valid numeric ID.")
+        """Start loading the selected question set in the background."""
+        selection = self.set_list.curselection()
+        if not selection:
+            messagebox.showerror("No Set", "Please pick a question set from the list.")
             return
-        
-        # Define file paths with the ID
-        questions_file = os.path.join("problems", f"questions_{question_id}.json")
-        image_file = os.path.join("problems", f"image_{question_id}.png")
-        
-        # Check if files exist
-        if not os.path.exists(questions_file):
-            messagebox.showerror("Error", f"Questions file '{questions_file}' not found.")
+        entry = self.listed_sets[selection[0]]
+        if not entry.valid:
+            messagebox.showerror("Broken Set", f"Set {entry.question_id}: {entry.error}")
             return
-            
-        if not os.path.exists(image_file):
-            messagebox.showerror("Error", f"Image file '{image_file}' not found.")
+        if self.scoreboard is not None and not self.read_team_names():
             return
         
-        # Load questions, answers, hints, obstacle answer, and final hint from JSON
-        try:
-            with open(questions_file, encoding='utf-8') as f:
-                data = json.load(f)
-                questions_data = data['questions']
-                self.obstacle_answer = data['obstacle_answer']
-                self.final_hint = data['final_hint']
-        except KeyError:
-            messagebox.showerror("Error", "Invalid format in questions file.")
+        self.start_load(entry.question_id)
+    
+    def read_team_names(self):
+        """Take this round's team names from the selection screen; False if they are unusable."""
+        names = [entry.get().strip() for entry in self.team_entries]
+        if not all(names) or len(set(names)) != len(names):
+            messagebox.showerror("Team Names", "Every team needs a different name.")
+            return False
+        self.team_names = names
+        return True
+    
+    def start_load(self, question_id):
+        """Load a set on the loader's threads, then start the round."""
+        # JSON parsing, validation and image decoding run on the loader's threads
+        self.load_btn.config(state="disabled")
+        self.pending_load = self.get_loader().load(question_id)
+        self.poll_load()
+    
+    def poll_load(self):
+        """Track the pending load from the Tk main loop until it finishes."""
+        job = self.pending_load
+        if not job.done():
+            text, fraction = job.stage
+            self.progress_label.config(text=text)
+            self.progress_bar["value"] = fraction
+            self.root.after(LOAD_POLL_MS, self.poll_load)
             return
         
-        # Populate questions, answers, and hints from the loaded data
-        self.questions = {}
-        self.answers = {}
-        self.hints = {}
-        for q in questions_data:
-            square = q['square']
-            self.questions[square] = q['question']
-            self.answers[square] = q['answer']
-            if 'hint' in q:
-                self.hints[square] = q['hint']
-        
-        # Ensure all 16 squares are present
-        if set(self.questions.keys()) != set(range(1, 17)):
-            messagebox.showerror("Error", "Questions file must contain exactly squares 1 to 16.")
+        self.pending_load = None
+        try:
+            loaded = job.result()
+        except QuestionSetError as e:
+            self.resume = None
+            messagebox.showerror("Error", str(e))
+            self.load_btn.config(state="normal")
+            self.progress_label.config(text="")
+            self.progress_bar["value"] = 0
             return
         
-        # Save the image path for loading later
-        self.image_file = image_file
+        self.progress_label.config(text=BUILDING[0])
+        self.progress_bar["value"] = BUILDING[1]
+        
+        question_set = loaded.question_set
+        self.questions = question_set.questions
+        self.answers = question_set.answers
+        self.answer_keys = question_set.answer_keys
+        self.obstacle_key = question_set.obstacle_key
+        self.hints = question_set.hints
+        self.obstacle_answer = question_set.obstacle_answer
+        self.final_hint = question_set.final_hint
+        self.image_file = question_set.image_file
         
         # Initialize the game after successful loading
-        self.initialize_game()
+        self.initialize_game(loaded)
+        
+        # Decode the following round's set and tiles while this one is played
+        self.question_id = question_set.question_id
+        self.next_round_id = self.find_next_round(self.question_id)
+        if self.next_round_id is not None:
+            self.loader.prefetch(self.next_round_id)
     
-    def initialize_game(self):
+    def find_next_round(self, question_id):
+        """Return the set played after `question_id`: the next unplayed one in a tournament."""
+        if self.scoreboard is None:
+            # Consecutive sets are usually played next
+            return next_question_id(question_id)
+        played = self.scoreboard.played_sets(self.tournament)
+        for entry in self.catalog.entries():
+            if (entry.valid and int(entry.question_id) > int(question_id)
+                    and entry.question_id not in played):
+                return entry.question_id
+        return None
+    
+    def initialize_game(self, loaded):
         """Initialize the game after loading questions and image."""
-        # Game state
-        self.revealed = [[False for _ in range(4)] for _ in range(4)]
-        self.correct_answers = [[False for _ in range(4)] for _ in range(4)]  # Track correct vs incorrect
-        self.current_team = 0  # 0 = Team 1, 1 = Team 2, 2 = Team 3, 3 = Team 4
-        self.turns_taken = [0, 0, 0, 0]  # Turns per team
-        self.scores = [0, 0, 0, 0]  # Scores per team
-        self.team_colors = ["red", "blue", "green", "purple"]  # Colors for each team
-        
-        # Clear existing widgets
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        
-        # Load and split the image
-        self.load_image()
-        
-        # Create GUI components
-        self.create_grid()
-        self.create_ui_elements()
+        # Game state (scores, turns and reveals live in the rules engine)
+        layout = loaded.question_set.layout
+        resume, self.resume = self.resume, None
+        self.end_round(completed=False)
+        if resume is not None and resume.game.layout != layout:
+            # The set's grid changed since the round was played
+            abandon(resume)
+            resume = None
+        if resume is not None:
+            self.game = resume.game
+            self.game_log = GameLog.from_journal(read_journal(resume.path))
+            self.journal = RoundJournal.reopen(resume)
+        else:
+            self.game = ObstacleGame(layout)
+            self.game_log = GameLog(layout, loaded.question_set.question_id)
+            self.journal = RoundJournal.create(loaded.question_set.question_id, self.game)
+        
+        # Tk images are made from the pyramid, a level at a time as the board needs them
+        self.board_images = BoardImages(self.root, loaded.levels)
+        layout_changed = layout != self.layout
+        self.layout = layout
+        self.grid_order = layout.order
+        self.set_level(self.pick_level())
+        
+        # Reuse the board unless this set has a different grid
+        if layout_changed:
+            self.create_grid()
+            self.create_hint_boxes()
+        else:
+            self.board.resize(self.tile_size, self.board_gap())
+            self.board.reset()
+        
+        # Reset the existing GUI components for the new round
+        self.team_label.config(text=f"{self.team_names[0]}'s Turn", fg=self.team_colors[0])
+        self.show_status("")
+        self.update_score()
+        for entry in self.hint_entries.values():
+            entry.config(state="normal")
+            entry.delete(0, tk.END)
+            entry.config(state="readonly")
+        
+        self.select_frame.pack_forget()
+        self.game_frame.pack(fill="both", expand=True)
+        if self.buzzer is not None:
+            self.buzzer.reset()
+        if self.broadcaster is not None:
+            question_set = loaded.question_set
+            self.broadcaster.set_round(loaded.levels, layout, question_set.hints,
+                                       f"Set {question_set.question_id}")
+        if resume is not None:
+            self.restore_board()
     
-    def load_image(self):
-        """Load and split the hidden image into 16 parts."""
-        try:
-            img = Image.open(self.image_file)
-            
-            # Resize the image to a fixed size (400x400 pixels)
-            img = img.resize((400, 400), Image.LANCZOS)
-            
-            width, height = img.size
-            part_width = width // 4
-            part_height = height // 4
-            
-            # Create a black image for incorrect answers
-            black_img = Image.new('RGB', (part_width, part_height), color='black')
-            self.black_tile = ImageTk.PhotoImage(black_img)
-            
-            self.image_parts = []
-            for i in range(4):
-                row = []
-                for j in range(4):
-                    left = j * part_width
-                    top = i * part_height
-                    right = left + part_width
-                    bottom = top + part_height
-                    part = img.crop((left, top, right, bottom))
-                    row.append(ImageTk.PhotoImage(part))
-                self.image_parts.append(row)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load image: {str(e)}")
-            self.setup_id_selection()  # Return to ID selection
+    def restore_board(self):
+        """Redraw a resumed round's reveals, hints and scores, then carry on."""
+        self.show_revealed()
+        self.display_hint(None)
+        self.update_score()
+        self.next_turn()
+    
+    def show_revealed(self):
+        """Show the current level's image or black tile on every revealed square."""
+        for i in range(self.layout.rows):
+            for j in range(self.layout.cols):
+                if not self.game.revealed[i][j]:
+                    continue
+                if self.game.correct_answers[i][j]:
+                    self.reveal_correct_square(i, j)
+                else:
+                    self.reveal_incorrect_square(i, j)
+    
+    def board_gap(self):
+        """Gap between squares, in pixels for this display's DPI."""
+        return max(2, round(BOARD_GAP * self.dpi_scale))
+    
+    def pick_level(self):
+        """Choose the pyramid level that best fills the space the board has."""
+        tile_sizes = self.board_images.tile_sizes
+        rows, cols = self.layout.rows, self.layout.cols
+        width, height = self.board_frame.winfo_width(), self.board_frame.winfo_height()
+        if width <= 1 or height <= 1:
+            # Not laid out yet: the base size, scaled for the display's DPI
+            return nearest_level(tile_sizes, IMAGE_SIZE[0] * self.dpi_scale / cols)
+        return fit_level(tile_sizes, rows, cols, (width, height), self.board_gap())
+    
+    @tracing.traced()
+    def set_level(self, level):
+        """Draw the board with one pyramid level's images from now on."""
+        self.level = level
+        self.image_parts, self.black_tile = self.board_images.photos(level)
+        self.tile_size = self.board_images.tile_sizes[level]
+    
+    def board_resized(self, event=None):
+        """Re-render the board once the window has stopped changing size."""
+        if self.resize_job is not None:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(RESIZE_DEBOUNCE_MS, self.apply_board_size)
+    
+    @tracing.traced()
+    def apply_board_size(self):
+        """Switch to the level that fits the board's new space, if it changed."""
+        self.resize_job = None
+        if self.board is None or self.board_images is None:
+            return
+        level = self.pick_level()
+        if level != self.level:
+            self.set_level(level)
+            self.board.resize(self.tile_size, self.board_gap())
+            self.show_revealed()
+    
+    def create_game_screen(self):
+        """Create the game screen (board and controls), initially hidden."""
+        self.game_frame = tk.Frame(self.root)
+        # The board frame takes whatever room the window has spare
+        self.board_frame = tk.Frame(self.game_frame)
+        self.board_frame.pack(pady=10, fill="both", expand=True)
+        self.board_frame.bind("<Configure>", self.board_resized)
+        self.board = None
+        self.tile_size = None
+        self.create_ui_elements()
     
+    @tracing.traced()
     def create_grid(self):
-        """Create the 4x4 grid of buttons."""
-        self.grid_frame = tk.Frame(self.root)
-        self.grid_frame.pack(pady=10)
-        
-        self.buttons = [[None for _ in range(4)] for _ in range(4)]
-        for i in range(4):
-            for j in range(4):
-                num = self.grid_order[i][j]
-                btn = tk.Button(self.grid_frame, text=str(num), width=10, height=5,
-                                command=lambda x=i, y=j: self.square_clicked(x, y))
-                btn.grid(row=i, column=j, padx=2, pady=2)
-                self.buttons[i][j] = btn
+        """Create the board for the current layout as a single canvas."""
+        if self.board is not None:
+            self.board.canvas.destroy()
+        self.board = BoardCanvas(self.board_frame, self.grid_order, self.tile_size,
+                                 self.square_clicked, gap=self.board_gap())
+        self.board.canvas.pack(expand=True)
     
+    @tracing.traced()
     def create_ui_elements(self):
         """Create additional UI elements."""
         # Team and turn info
-        self.team_label = tk.Label(self.root, text="Team 1's Turn", 
+        self.team_label = tk.Label(self.game_frame, text="Team 1's Turn", 
                                   font=("Arial", 12), fg=self.team_colors[0])
         self.team_label.pack()
+        self.status_label = tk.Label(self.game_frame, text="", font=("Arial", 11))
+        self.status_label.pack()
         
         # Score display frame
-        score_frame = tk.Frame(self.root)
+        score_frame = tk.Frame(self.game_frame)
         score_frame.pack(pady=5)
         
         # Score labels for each team
@@ -185,7 +586,7 @@ class ObstacleCourse:
             self.score_labels.append(label)
         
         # Button frame
-        button_frame = tk.Frame(self.root)
+        button_frame = tk.Frame(self.game_frame)
         button_frame.pack(pady=5)
         
         # Guess Obstacle button
@@ -197,80 +598,88 @@ class ObstacleCourse:
                               command=self.setup_id_selection)
         change_btn.grid(row=0, column=1, padx=10)
         
-        # Create hint boxes frame
-        hints_frame = tk.Frame(self.root)
-        hints_frame.pack(pady=10)
+        # Questions and guesses are answered here while the clock runs
+        panel_frame = tk.Frame(self.game_frame)
+        panel_frame.pack(fill="x", padx=10)
+        self.panel = AnswerPanel(panel_frame)
         
-        # Create labeled hint boxes for squares 13-16
+        # Create hint boxes frame; the boxes depend on the layout
+        self.hints_frame = tk.Frame(self.game_frame)
+        self.hints_frame.pack(pady=10)
         self.hint_entries = {}
-        for i, square in enumerate([13, 14, 15, 16]):
+    
+    def create_hint_boxes(self):
+        """Create labeled hint boxes for the central squares (13-16 on a 4x4 board)."""
+        for widget in self.hints_frame.winfo_children():
+            widget.destroy()
+        
+        self.hint_entries = {}
+        for i, square in enumerate(self.layout.center_squares):
             # Label for the hint
-            label = tk.Label(hints_frame, text=f"Hint {square}:", font=("Arial", 10, "bold"))
+            label = tk.Label(self.hints_frame, text=f"Hint {square}:", font=("Arial", 10, "bold"))
             label.grid(row=0, column=i, padx=5, sticky="w")
             
             # Entry widget to display the hint
-            entry = tk.Entry(hints_frame, width=20, state="readonly")
+            entry = tk.Entry(self.hints_frame, width=20, state="readonly")
             entry.grid(row=1, column=i, padx=5, pady=2)
             self.hint_entries[square] = entry
     
+    @tracing.traced()
     def square_clicked(self, i, j):
-        """Handle a square being clicked."""
-        if self.revealed[i][j] or self.turns_taken[self.current_team] >= 4:
-            return  # Square already revealed or team out of turns
+        """Open the answer panel for a clicked square, with its thinking time."""
+        if self.panel.active or not self.game.can_choose(i, j):
+            return  # Already answering, square revealed or team out of turns
         
         num = self.grid_order[i][j]
-        question = self.questions[num]
-        correct_answer = self.answers[num]
-        
-        # Simulate thinking time (no timer implemented for simplicity)
-        answer = simpledialog.askstring(f"Square {num}", question,
-                                        parent=self.root)
-        
-        # Mark square as revealed regardless of answer correctness
-        self.revealed[i][j] = True
+        self.journal.chose(num)
+        self.game_log.chose()
+        self.show_status("")
+        self.panel.ask(f"Square {num}", self.questions[num], self.layout.thinking_time(num),
+                       lambda answer: self.square_answered(i, j, answer))
+    
+    @tracing.traced()
+    def square_answered(self, i, j, answer):
+        """Score an answer to square (i, j); running out of time (None) counts as incorrect."""
+        num = self.grid_order[i][j]
+        correct = self.answer_keys[num].matches(answer)
+        self.game_log.square(self.game, i, j, correct)
+        points = self.game.answer_square(i, j, correct)
+        self.journal.answered(i, j, correct)
         
-        if answer and answer.lower() == correct_answer.lower():
+        if correct:
             self.reveal_correct_square(i, j)
-            points = 15 if num >= 13 else 10
-            self.scores[self.current_team] += points
             self.update_score()
-            if num in self.hints and num in [13, 14, 15, 16]:
+            if num in self.hints and num in self.layout.center_squares:
                 # Update the specific hint box
                 entry = self.hint_entries[num]
                 entry.config(state="normal")
                 entry.delete(0, tk.END)
                 entry.insert(0, self.hints[num])
                 entry.config(state="readonly")
-            messagebox.showinfo("Correct", f"Correct! You earned {points} points.")
+            self.show_status(f"Correct! You earned {points} points.", "dark green")
         else:
             self.reveal_incorrect_square(i, j)
-            messagebox.showinfo("Incorrect", "Incorrect answer. Square revealed as black.")
+            reason = "Time's up." if answer is None else "Incorrect answer."
+            self.show_status(f"{reason} Square revealed as black.", "red")
         
         self.next_turn()
     
     def reveal_correct_square(self, i, j):
         """Reveal the image part for a correctly answered square."""
-        self.correct_answers[i][j] = True
-        self.buttons[i][j].destroy()
-        label = tk.Label(self.grid_frame, image=self.image_parts[i][j])
-        label.grid(row=i, column=j, padx=2, pady=2)
-        self.buttons[i][j] = label
+        self.board.reveal(i, j, self.image_parts[i][j])
     
     def reveal_incorrect_square(self, i, j):
         """Reveal a black square for an incorrectly answered square."""
-        self.buttons[i][j].destroy()
-        label = tk.Label(self.grid_frame, image=self.black_tile)
-        label.grid(row=i, column=j, padx=2, pady=2)
-        self.buttons[i][j] = label
+        self.board.reveal(i, j, self.black_tile)
     
     def display_hint(self, hint):
-        """Display a hint when a square 13-16 is revealed."""
+        """Display a hint when a central square (13-16 on 4x4) is revealed."""
         # Extract the square number from the surrounding code
-        for i in range(4):
-            for j in range(4):
-                if self.revealed[i][j] and self.correct_answers[i][j]:
+        for i in range(self.layout.rows):
+            for j in range(self.layout.cols):
+                if self.game.revealed[i][j] and self.game.correct_answers[i][j]:
                     square = self.grid_order[i][j]
-                    if square in [13, 14, 15, 16] and square in self.hints:
+                    if square in self.layout.center_squares and square in self.hints:
                         # Enable the entry, set the hint, then make it readonly again
                         entry = self.hint_entries[square]
                         entry.config(state="normal")
@@ -278,59 +687,115 @@ class ObstacleCourse:
                         entry.insert(0, self.hints[square])
                         entry.config(state="readonly")
     
-    def guess_obstacle(self):
-        """Allow the current team to guess the Obstacle."""
-        if self.turns_taken[self.current_team] >= 4:
-            messagebox.showinfo("No Turns", "Your team has no turns left.")
+    def guess_obstacle(self, team=None):
+        """Allow the current team, or `team` after it buzzed in first, to guess the Obstacle."""
+        if self.panel.active:
+            return  # The open question comes first
+        buzzed = team
+        if team == self.game.current_team:
+            team = None  # Buzzing in on your own turn is an ordinary guess
+        if team is None and not self.game.has_turns_left():
+            self.show_status("Your team has no turns left.", "red")
+            if buzzed is not None:
+                self.buzzer.release()
             return
         
-        guess = simpledialog.askstring("Guess Obstacle", "What is the Obstacle?",
-                                       parent=self.root)
-        if guess and guess.lower() == self.obstacle_answer.lower():
-            # Count only correctly revealed squares for points calculation
-            revealed_correct_count = sum(sum(row) for row in self.correct_answers)
-            points = max(10, 90 - (revealed_correct_count * 5))  # Minimum 10 points
-            self.scores[self.current_team] += points
+        title = "Guess Obstacle" if buzzed is None else f"{self.team_names[buzzed]} Buzzed In"
+        self.panel.ask(title, "What is the Obstacle?", None,
+                       lambda guess: self.obstacle_guessed(guess, team, buzzed))
+    
+    def obstacle_guessed(self, guess, team, buzzed):
+        """Score an Obstacle guess made through guess_obstacle()."""
+        correct = self.obstacle_key.matches(guess)
+        self.game_log.guess(self.game, correct, team)
+        points = self.game.guess_obstacle(correct, team)
+        self.journal.guessed(correct, team)
+        if correct:
+            self.end_round()
             self.update_score()
             messagebox.showinfo("Correct!", f"Correct! You earned {points} points.")
-            self.root.quit()  # End game on correct guess
-        else:
-            messagebox.showinfo("Incorrect", "Incorrect guess.")
+            self.round_over()  # End game on correct guess
+            return
+        
+        self.show_status("Incorrect guess.", "red")
+        if buzzed is not None:
+            # One wrong buzz per team per round
+            self.buzzer.lock_out(buzzed)
+            self.buzzer.release()
+        if team is None:
             self.next_turn()
     
+    @tracing.traced()
     def next_turn(self):
-        """Switch to the next team's turn."""
-        self.turns_taken[self.current_team] += 1
-        self.current_team = (self.current_team + 1) % 4  # Cycle through 4 teams
-        self.team_label.config(text=f"Team {self.current_team + 1}'s Turn", 
-                              fg=self.team_colors[self.current_team])
+        """Show the next team's turn once the engine has advanced it."""
+        current_team = self.game.current_team
+        self.team_label.config(text=f"{self.team_names[current_team]}'s Turn",
+                              fg=self.team_colors[current_team])
         
         # Check if game should end or trigger final hint
-        if all(all(row) for row in self.revealed):
+        if self.game.phase == FINAL_GUESS:
             self.final_guess()
-        elif all(t >= 4 for t in self.turns_taken):
+        elif self.game.phase == GAME_OVER:
+            self.end_round()
             messagebox.showinfo("Game Over", "All turns used. Game ends.")
-            self.root.quit()
+            self.round_over()
     
     def final_guess(self):
-        """Provide final hint if all squares are revealed."""
-        messagebox.showinfo("Final Hint", self.final_hint)
-        guess = simpledialog.askstring("Final Guess", "What is the Obstacle?",
-                                       parent=self.root)
-        if guess and guess.lower() == self.obstacle_answer.lower():
-            self.scores[self.current_team] += 5
+        """Show the final hint once every square is revealed, with time for one last guess."""
+        self.journal.final_hint()
+        self.panel.ask("Final Hint", f"{self.final_hint}\n\nWhat is the Obstacle?",
+                       FINAL_THINKING_TIME, self.final_answered)
+    
+    def final_answered(self, guess):
+        """Score the guess after the final hint and end the game."""
+        correct = self.obstacle_key.matches(guess)
+        self.game_log.final(self.game, correct)
+        self.game.final_guess(correct)
+        self.journal.final_guessed(correct)
+        self.end_round()
+        if correct:
             self.update_score()
             messagebox.showinfo("Correct!", "Correct! You earned 5 points.")
+        elif guess is None:
+            messagebox.showinfo("Time's Up", "Time's up.")
         else:
             messagebox.showinfo("Incorrect", "Incorrect guess.")
-        self.root.quit()
+        self.round_over()
+    
+    def round_over(self):
+        """Quit after a single round; in a tournament, bank the scores and set up the next one."""
+        if self.scoreboard is None:
+            self.root.quit()
+            return
+        scores = dict(zip(self.team_names, self.game.scores))
+        number = self.scoreboard.record_round(self.tournament, self.question_id, scores)
+        if self.next_round_id is None:
+            status = f"Round {number} recorded. No unplayed sets are left."
+        else:
+            status = f"Round {number} recorded. Next up: set {self.next_round_id}."
+        self.setup_id_selection(status)
+    
+    def show_status(self, text, color="black"):
+        """Show the result of the last move under the team label."""
+        self.status_label.config(text=text, fg=color)
     
     def update_score(self):
         """Update the score display."""
         for i, label in enumerate(self.score_labels):
-            label.config(text=f"Team {i+1}: {self.scores[i]}")
+            label.config(text=f"{self.team_names[i]}: {self.game.scores[i]}")
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = ObstacleCourse(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    # Closing the window mid-round leaves the round open for resuming
+    if app.journal is not None:
+        app.journal.close()
+    if app.buzzer is not None:
+        app.buzzer.stop()
+    if app.broadcaster is not None:
+        app.broadcaster.stop()
+    if app.loader is not None:
+        app.loader.shutdown()
+    if app.scoreboard is not None:
+        app.scoreboard.close()
\ No newline at end of file
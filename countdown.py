@@ -0,0 +1,70 @@
+"""Countdowns driven by a Tk-style after() loop without accumulating drift."""
+import math
+import time
+
+
+class Countdown:
+    """A deadline on a monotonic clock, checked from `scheduler.after()` callbacks.
+
+    Each callback works out the time left from the clock rather than
+    counting the callbacks that have run, and schedules the next one for
+    the next whole `tick` before the deadline. A late callback therefore
+    only delays that one tick, never the ones after it or the expiry.
+    `on_tick(seconds_left)` runs at the start and on every tick;
+    `on_expire()` runs once the deadline has passed. `scheduler` is any
+    object with Tk's after() and after_cancel(), usually a widget.
+    """
+
+    def __init__(self, scheduler, seconds, on_tick=None, on_expire=None, tick=1.0,
+                 clock=time.monotonic):
+        self.scheduler = scheduler
+        self.seconds = seconds
+        self.on_tick = on_tick
+        self.on_expire = on_expire
+        self.tick = tick
+        self.clock = clock
+        self.deadline = None
+        self.expired_at = None
+        self._job = None
+
+    def start(self):
+        self.deadline = self.clock() + self.seconds
+        if self.on_tick is not None:
+            self.on_tick(self.seconds)
+        self._schedule()
+        return self
+
+    def remaining(self):
+        """Seconds left, or 0 once the deadline has passed."""
+        if self.deadline is None:
+            return self.seconds
+        return max(0.0, self.deadline - self.clock())
+
+    @property
+    def running(self):
+        return self._job is not None
+
+    def cancel(self):
+        if self._job is not None:
+            self.scheduler.after_cancel(self._job)
+            self._job = None
+
+    def _schedule(self):
+        left = self.deadline - self.clock()
+        if left <= 0:
+            self._job = None
+            self.expired_at = self.clock()
+            if self.on_expire is not None:
+                self.on_expire()
+            return
+        # The next tick lands on a whole number of ticks before the deadline
+        delay = left % self.tick or self.tick
+        # Rounding up means a callback is never early, so the expiry never is
+        self._job = self.scheduler.after(max(1, math.ceil(delay * 1000)), self._fire)
+
+    def _fire(self):
+        self._job = None
+        left = self.deadline - self.clock()
+        if left > 0 and self.on_tick is not None:
+            self.on_tick(left)
+        self._schedule()
@@ -0,0 +1,396 @@
+"""Display-free rules engine and batch simulator for the Obstacle Course round."""
+import random
+
+NUM_TEAMS = 4
+FINAL_GUESS_POINTS = 5
+
+# Thinking time in seconds (rules.md)
+EASY_THINKING_TIME = 60
+MEDIUM_THINKING_TIME = 90
+FINAL_THINKING_TIME = 60
+
+# Game phases
+PLAYING = "playing"
+FINAL_GUESS = "final_guess"
+GAME_OVER = "game_over"
+
+
+def spiral_order(rows, cols):
+    """Number a rows x cols grid clockwise from the top-left corner inwards."""
+    order = [[0] * cols for _ in range(rows)]
+    top, bottom, left, right = 0, rows - 1, 0, cols - 1
+    num = 1
+    while top <= bottom and left <= right:
+        for j in range(left, right + 1):
+            order[top][j] = num
+            num += 1
+        for i in range(top + 1, bottom + 1):
+            order[i][right] = num
+            num += 1
+        if top < bottom:
+            for j in range(right - 1, left - 1, -1):
+                order[bottom][j] = num
+                num += 1
+        if left < right:
+            for i in range(bottom - 1, top, -1):
+                order[i][left] = num
+                num += 1
+        top, bottom, left, right = top + 1, bottom - 1, left + 1, right - 1
+    return order
+
+
+class GridLayout:
+    """Square numbering, hint squares and scoring derived from the grid size.
+
+    Squares are numbered in a clockwise spiral. The central block (2x2 for an
+    even dimension, 1 wide for an odd one) holds the medium questions with
+    hints, worth 15 points; every other square is worth 10. Teams get enough
+    turns between them to open every square, and the Obstacle scale runs
+    from 90 points down to 10 once the whole image is shown.
+    """
+
+    def __init__(self, rows=4, cols=4):
+        if rows < 1 or cols < 1:
+            raise ValueError(f"Grid must be at least 1x1, got {rows}x{cols}")
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.order = spiral_order(rows, cols)
+        self.positions = {self.order[i][j]: (i, j) for i in range(rows) for j in range(cols)}
+
+        center_rows = range((rows - 1) // 2, rows // 2 + 1)
+        center_cols = range((cols - 1) // 2, cols // 2 + 1)
+        self.center_squares = tuple(sorted(self.order[i][j] for i in center_rows for j in center_cols))
+        self.turns_per_team = -(-self.size // NUM_TEAMS)
+
+    def __eq__(self, other):
+        return isinstance(other, GridLayout) and (self.rows, self.cols) == (other.rows, other.cols)
+
+    def __hash__(self):
+        return hash((self.rows, self.cols))
+
+    def __repr__(self):
+        return f"GridLayout({self.rows}, {self.cols})"
+
+    def square_points(self, square):
+        """Points for a correct answer on the given square."""
+        return 15 if square in self.center_squares else 10
+
+    def thinking_time(self, square):
+        """Seconds a team has to answer the given square."""
+        return MEDIUM_THINKING_TIME if square in self.center_squares else EASY_THINKING_TIME
+
+    def obstacle_points(self, revealed_correct_count):
+        """Points for guessing the Obstacle with this many image parts shown."""
+        # 90, then 5 fewer per part on a 4x4 board, down to a minimum of 10
+        return max(10, 90 - round(revealed_correct_count * 80 / self.size))
+
+
+DEFAULT_LAYOUT = GridLayout(4, 4)
+
+# Grid arrangement as per the rules
+GRID_ORDER = DEFAULT_LAYOUT.order
+HINT_SQUARES = DEFAULT_LAYOUT.center_squares
+TURNS_PER_TEAM = DEFAULT_LAYOUT.turns_per_team
+
+
+class ObstacleGame:
+    """Scores, turns and reveals for one round, with no GUI attached."""
+
+    def __init__(self, layout=DEFAULT_LAYOUT):
+        self.layout = layout
+        self.grid_order = layout.order
+        self.revealed = [[False for _ in range(layout.cols)] for _ in range(layout.rows)]
+        self.correct_answers = [[False for _ in range(layout.cols)] for _ in range(layout.rows)]  # Track correct vs incorrect
+        self.current_team = 0  # 0 = Team 1, 1 = Team 2, 2 = Team 3, 3 = Team 4
+        self.turns_taken = [0] * NUM_TEAMS  # Turns per team
+        self.scores = [0] * NUM_TEAMS  # Scores per team
+        self.revealed_correct_count = 0
+        self.unlocked_hints = []  # Hint squares answered correctly, in order
+        self.obstacle_found = False
+        self.phase = PLAYING
+        self.unrevealed = [(i, j) for i in range(layout.rows) for j in range(layout.cols)]
+
+    def has_turns_left(self):
+        """Return True if the current team may still act."""
+        return (self.phase == PLAYING
+                and self.turns_taken[self.current_team] < self.layout.turns_per_team)
+
+    def can_choose(self, i, j):
+        """Return True if the current team may pick square (i, j)."""
+        return not self.revealed[i][j] and self.has_turns_left()
+
+    def answer_square(self, i, j, correct):
+        """Record the current team's answer for square (i, j) and end the turn.
+
+        Returns the points earned (0 for an incorrect answer).
+        """
+        # Mark square as revealed regardless of answer correctness
+        self.revealed[i][j] = True
+        self.unrevealed.remove((i, j))
+        points = 0
+        if correct:
+            self.correct_answers[i][j] = True
+            self.revealed_correct_count += 1
+            num = self.grid_order[i][j]
+            points = self.layout.square_points(num)
+            self.scores[self.current_team] += points
+            if num in self.layout.center_squares:
+                self.unlocked_hints.append(num)
+        self.next_turn()
+        return points
+
+    def guess_obstacle(self, correct, team=None):
+        """Record an Obstacle guess by `team` (default: the current team).
+
+        A correct guess ends the game. An incorrect one ends the turn if it
+        was the current team's; another team buzzing in out of turn loses
+        nothing. Returns the points earned.
+        """
+        if team is None:
+            team = self.current_team
+        if correct:
+            # Count only correctly revealed squares for points calculation
+            points = self.layout.obstacle_points(self.revealed_correct_count)
+            self.scores[team] += points
+            self.obstacle_found = True
+            self.phase = GAME_OVER
+            return points
+        if team == self.current_team:
+            self.next_turn()
+        return 0
+
+    def next_turn(self):
+        """Switch to the next team's turn and update the game phase."""
+        self.turns_taken[self.current_team] += 1
+        self.current_team = (self.current_team + 1) % NUM_TEAMS  # Cycle through 4 teams
+
+        # Check if game should end or trigger final hint
+        if not self.unrevealed:
+            self.phase = FINAL_GUESS
+        elif all(t >= self.layout.turns_per_team for t in self.turns_taken):
+            self.phase = GAME_OVER
+
+    def final_guess(self, correct):
+        """Record the current team's guess after the final hint and end the game."""
+        points = FINAL_GUESS_POINTS if correct else 0
+        self.scores[self.current_team] += points
+        self.obstacle_found = correct
+        self.phase = GAME_OVER
+        return points
+
+    def to_dict(self):
+        """Return the full game state as JSON-ready data."""
+        return {
+            "grid": [self.layout.rows, self.layout.cols],
+            "revealed": [[int(v) for v in row] for row in self.revealed],
+            "correct": [[int(v) for v in row] for row in self.correct_answers],
+            "team": self.current_team,
+            "turns": list(self.turns_taken),
+            "scores": list(self.scores),
+            "hints": list(self.unlocked_hints),
+            "found": self.obstacle_found,
+            "phase": self.phase,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a game from to_dict() data."""
+        game = cls(GridLayout(*data["grid"]))
+        game.revealed = [[bool(v) for v in row] for row in data["revealed"]]
+        game.correct_answers = [[bool(v) for v in row] for row in data["correct"]]
+        game.current_team = data["team"]
+        game.turns_taken = list(data["turns"])
+        game.scores = list(data["scores"])
+        game.revealed_correct_count = sum(map(sum, game.correct_answers))
+        game.unlocked_hints = list(data["hints"])
+        game.obstacle_found = data["found"]
+        game.phase = data["phase"]
+        game.unrevealed = [(i, j) for i in range(game.layout.rows)
+                           for j in range(game.layout.cols) if not game.revealed[i][j]]
+        return game
+
+
+class AnswerModel:
+    """How a simulated team plays: which square it picks and how well it answers.
+
+    The default plays uniformly at random, never guesses the Obstacle early
+    and answers nothing correctly; subclass it to model a real team.
+    """
+
+    def choose_square(self, game, rng):
+        return rng.choice(game.unrevealed)
+
+    def answers_correctly(self, game, square, rng):
+        return False
+
+    def wants_to_guess(self, game, rng):
+        return False
+
+    def guesses_correctly(self, game, rng):
+        return False
+
+    def final_guess_correct(self, game, rng):
+        return False
+
+
+class SkillModel(AnswerModel):
+    """Answer model driven by per-square success probabilities.
+
+    `square_probs` maps square number to the chance of a correct answer;
+    squares not listed fall back to `p_medium` for the central hint squares
+    and `p_easy` for the rest.
+    The chance of naming the Obstacle grows with every image part shown and
+    every hint unlocked, and the team only tries once it reaches
+    `guess_threshold`.
+    """
+
+    def __init__(self, p_easy=0.7, p_medium=0.5, square_probs=None,
+                 guess_base=0.0, guess_per_tile=0.05, guess_per_hint=0.1,
+                 guess_threshold=0.5, p_final=0.6):
+        self.p_easy = p_easy
+        self.p_medium = p_medium
+        self.square_probs = dict(square_probs or {})
+        self.guess_base = guess_base
+        self.guess_per_tile = guess_per_tile
+        self.guess_per_hint = guess_per_hint
+        self.guess_threshold = guess_threshold
+        self.p_final = p_final
+
+    def guess_probability(self, game):
+        """Chance of naming the Obstacle given what is on the board."""
+        p = (self.guess_base + self.guess_per_tile * game.revealed_correct_count
+             + self.guess_per_hint * len(game.unlocked_hints))
+        return min(1.0, p)
+
+    def answers_correctly(self, game, square, rng):
+        p = self.square_probs.get(square)
+        if p is None:
+            p = self.p_medium if square in game.layout.center_squares else self.p_easy
+        return rng.random() < p
+
+    def wants_to_guess(self, game, rng):
+        return self.guess_probability(game) >= self.guess_threshold
+
+    def guesses_correctly(self, game, rng):
+        return rng.random() < self.guess_probability(game)
+
+    def final_guess_correct(self, game, rng):
+        return rng.random() < self.p_final
+
+
+def play_game(models, rng, layout=DEFAULT_LAYOUT, log=None):
+    """Play one full round with one answer model per team and return the game.
+
+    Every move is also passed to `log` (a history.GameLog) if one is given.
+    """
+    game = ObstacleGame(layout)
+    grid_order = game.grid_order
+    while game.phase == PLAYING:
+        model = models[game.current_team]
+        if model.wants_to_guess(game, rng):
+            correct = model.guesses_correctly(game, rng)
+            if log is not None:
+                log.guess(game, correct)
+            game.guess_obstacle(correct)
+            continue
+        i, j = model.choose_square(game, rng)
+        correct = model.answers_correctly(game, grid_order[i][j], rng)
+        if log is not None:
+            log.square(game, i, j, correct)
+        game.answer_square(i, j, correct)
+    if game.phase == FINAL_GUESS:
+        model = models[game.current_team]
+        correct = model.final_guess_correct(game, rng)
+        if log is not None:
+            log.final(game, correct)
+        game.final_guess(correct)
+    return game
+
+
+class SimulationResult:
+    """Aggregate statistics over many simulated rounds."""
+
+    def __init__(self):
+        self.games = 0
+        self.total_scores = [0] * NUM_TEAMS
+        self.wins = [0] * NUM_TEAMS  # Shared first place counts for every tied team
+        self.obstacle_guessed = 0
+        self.final_hints = 0
+        self.reveals_at_guess = 0
+
+    def add(self, game):
+        """Count one finished game."""
+        self.games += 1
+        best = max(game.scores)
+        for team, score in enumerate(game.scores):
+            self.total_scores[team] += score
+            if score == best:
+                self.wins[team] += 1
+        if not game.unrevealed:
+            self.final_hints += 1
+        elif game.obstacle_found:
+            self.obstacle_guessed += 1
+            self.reveals_at_guess += game.revealed_correct_count
+
+    def merge(self, other):
+        """Fold another result (e.g. from a worker process) into this one."""
+        self.games += other.games
+        for team in range(NUM_TEAMS):
+            self.total_scores[team] += other.total_scores[team]
+            self.wins[team] += other.wins[team]
+        self.obstacle_guessed += other.obstacle_guessed
+        self.final_hints += other.final_hints
+        self.reveals_at_guess += other.reveals_at_guess
+        return self
+
+    def mean_scores(self):
+        return [total / self.games if self.games else 0.0 for total in self.total_scores]
+
+    def summary(self):
+        """Return the aggregate statistics as a plain dict."""
+        return {
+            "games": self.games,
+            "mean_scores": self.mean_scores(),
+            "win_rates": [w / self.games if self.games else 0.0 for w in self.wins],
+            "obstacle_guess_rate": self.obstacle_guessed / self.games if self.games else 0.0,
+            "final_hint_rate": self.final_hints / self.games if self.games else 0.0,
+            "mean_reveals_at_guess": (self.reveals_at_guess / self.obstacle_guessed
+                                      if self.obstacle_guessed else 0.0),
+        }
+
+
+def simulate(models, games, seed=None, layout=DEFAULT_LAYOUT):
+    """Play `games` rounds in this process and return a SimulationResult."""
+    if len(models) != NUM_TEAMS:
+        raise ValueError(f"Expected {NUM_TEAMS} answer models, got {len(models)}")
+    rng = random.Random(seed)
+    result = SimulationResult()
+    for _ in range(games):
+        game = play_game(models, rng, layout)
+        result.add(game)
+    return result
+
+
+def simulate_parallel(models, games, processes=None, seed=0, chunk_size=10000,
+                      layout=DEFAULT_LAYOUT):
+    """Play `games` rounds across a process pool and return the merged result.
+
+    Each chunk gets its own seed derived from `seed`, so a run is
+    reproducible for a fixed chunk size. The answer models must be picklable.
+    """
+    # Imported here so that the game does not load multiprocessing at startup
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = []
+    remaining = games
+    while remaining > 0:
+        chunks.append(min(chunk_size, remaining))
+        remaining -= chunk_size
+    result = SimulationResult()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(simulate, models, n, seed * 1000003 + k, layout)
+                   for k, n in enumerate(chunks)]
+        for future in futures:
+            result.merge(future.result())
+    return result
@@ -0,0 +1,401 @@
+"""Columnar history of played and simulated rounds, with NumPy analytics over it.
+
+Each table is a set of append-only column files in history/, one
+fixed-width binary value per row, so a column is read back as a NumPy
+array in one call and aggregated without a Python loop:
+
+    games.<column>     one row per round: source, set, grid, scores, ...
+    squares.<column>   one row per square answered: game, team, square, correct, answer_ms, ...
+    guesses.<column>   one row per Obstacle guess, the final guess included
+
+A row's `game` is the row number of its round in games. Squares and
+guesses are written before the round's games row, and rows after the
+last whole round are cut off when the store is opened, so a crash while
+writing never leaves half a round.
+
+challenge.py records every round it plays; simulated rounds can be
+added in bulk, and the stats command summarizes either:
+
+    python history.py simulate --games 300000 --p-easy 0.7 --p-medium 0.5
+    python history.py stats --source played --grid 4x4
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from array import array
+
+from engine import DEFAULT_LAYOUT, NUM_TEAMS, GridLayout, SkillModel, play_game
+
+HISTORY_DIR = "history"
+PLAYED = 0
+SIMULATED = 1
+SOURCES = {"played": PLAYED, "simulated": SIMULATED}
+FLUSH_EVERY = 10000  # Simulated rounds buffered between writes
+HARD_BELOW = 0.3  # Success rates flagged as too hard or too easy in the report
+EASY_ABOVE = 0.9
+
+# (column, array typecode); NumPy reads each file with the same typecode
+GAME_COLUMNS = (("source", "B"), ("set", "I"), ("rows", "B"), ("cols", "B"), ("found", "B"),
+                ("final_hint", "B"), ("moves", "H"), ("ms", "I"),
+                *((f"score{team}", "h") for team in range(NUM_TEAMS)))
+SQUARE_COLUMNS = (("game", "I"), ("move", "H"), ("team", "B"), ("square", "H"),
+                  ("correct", "B"), ("points", "B"), ("answer_ms", "I"), ("ms", "I"))
+GUESS_COLUMNS = (("game", "I"), ("move", "H"), ("team", "B"), ("correct", "B"),
+                 ("final", "B"), ("out_of_turn", "B"), ("revealed", "H"),
+                 ("revealed_correct", "H"), ("ms", "I"))
+
+
+class Table:
+    """Append-only column files sharing a row count."""
+
+    def __init__(self, directory, name, columns):
+        self.name = name
+        self.columns = columns
+        self.paths = [os.path.join(directory, f"{name}.{column}") for column, _ in columns]
+        self.buffers = [array(typecode) for _, typecode in columns]
+
+    def rows(self):
+        """Whole rows on disk: the shortest column decides."""
+        return min((os.path.getsize(path) if os.path.exists(path) else 0) // buffer.itemsize
+                   for path, buffer in zip(self.paths, self.buffers))
+
+    def convert(self, rows):
+        """Return `rows` as one array per column; ValueError if a value does not fit its column."""
+        arrays = []
+        for (column, typecode), values in zip(self.columns, zip(*rows)):
+            try:
+                arrays.append(array(typecode, values))
+            except (OverflowError, TypeError) as e:
+                raise ValueError(f"{self.name}.{column}: {e}") from e
+        return arrays
+
+    def extend(self, arrays):
+        for buffer, values in zip(self.buffers, arrays):
+            buffer.extend(values)
+
+    def append(self, values):
+        # Converted first, so a value that does not fit leaves the columns even
+        self.extend(self.convert([values]))
+
+    def flush(self):
+        for path, buffer in zip(self.paths, self.buffers):
+            with open(path, "ab") as f:
+                buffer.tofile(f)
+            del buffer[:]
+
+    def truncate(self, rows):
+        for path, buffer in zip(self.paths, self.buffers):
+            if os.path.exists(path) and os.path.getsize(path) > rows * buffer.itemsize:
+                os.truncate(path, rows * buffer.itemsize)
+
+    def read(self, rows=None):
+        """Return {column: NumPy array} for the first `rows` rows (default: all)."""
+        import numpy as np
+
+        if rows is None:
+            rows = self.rows()
+        data = {}
+        for (column, typecode), path in zip(self.columns, self.paths):
+            if rows and os.path.exists(path):
+                data[column] = np.fromfile(path, dtype=typecode, count=rows)
+            else:
+                data[column] = np.zeros(0, dtype=typecode)
+        return data
+
+
+class GameLog:
+    """The moves of one round, collected for HistoryStore.add().
+
+    Each method is called with the game as it is *before* the move is
+    applied to it. A move's `ms` is the time since the round started; a
+    square's `answer_ms` runs from chose() to its answer. Without a clock
+    every move is timed at 0 ms.
+    """
+
+    def __init__(self, layout, question_id=None, elapsed_ms=0, clock=time.monotonic):
+        self.layout = layout
+        self.set_id = int(question_id) if question_id else 0
+        self.squares = []
+        self.guesses = []
+        self.moves = 0
+        self.ms = elapsed_ms
+        self._clock = clock
+        self._started = clock() - elapsed_ms / 1000 if clock is not None else None
+        self._chosen = None
+
+    def chose(self, ms=None):
+        """Start timing the answer to the square just chosen."""
+        self._chosen = self._now(ms)
+
+    def square(self, game, i, j, correct, ms=None):
+        num = self.layout.order[i][j]
+        points = self.layout.square_points(num) if correct else 0
+        ms = self._now(ms)
+        answer_ms = 0 if self._chosen is None else max(ms - self._chosen, 0)
+        self._chosen = None
+        self.squares.append((self.moves, game.current_team, num, int(correct), points,
+                             answer_ms, ms))
+        self.moves += 1
+
+    def guess(self, game, correct, team=None, ms=None):
+        out_of_turn = team is not None and team != game.current_team
+        self._guess(game, game.current_team if team is None else team, correct, 0,
+                    out_of_turn, ms)
+
+    def final(self, game, correct, ms=None):
+        self._guess(game, game.current_team, correct, 1, False, ms)
+
+    def _guess(self, game, team, correct, final, out_of_turn, ms):
+        revealed = self.layout.rows * self.layout.cols - len(game.unrevealed)
+        self.guesses.append((self.moves, team, int(correct), final, int(out_of_turn), revealed,
+                             game.revealed_correct_count, self._now(ms)))
+        self.moves += 1
+
+    def _now(self, ms):
+        if ms is None:
+            ms = 0 if self._clock is None else int((self._clock() - self._started) * 1000)
+        self.ms = max(self.ms, ms)
+        return ms
+
+    @classmethod
+    def from_journal(cls, records):
+        """Rebuild the log of a round from its journal records (see journal.py)."""
+        from journal import apply_record
+        from engine import ObstacleGame
+
+        _, _, question_id, rows, cols = records[0][:5]
+        layout = GridLayout(rows, cols)
+        game = ObstacleGame(layout)
+        log = cls(layout, question_id, records[-1][1])
+        for record in records:
+            kind = record[0]
+            if kind == "C":
+                log.chose(record[1])
+            elif kind == "A":
+                log.square(game, record[2], record[3], record[4], record[1])
+            elif kind == "G":
+                log.guess(game, record[2], record[3] if len(record) > 3 else None, record[1])
+            elif kind == "F":
+                log.final(game, record[2], record[1])
+            apply_record(game, record)
+        return log
+
+
+class HistoryStore:
+    """The games, squares and guesses tables in one folder."""
+
+    def __init__(self, directory=HISTORY_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.games = Table(directory, "games", GAME_COLUMNS)
+        self.squares = Table(directory, "squares", SQUARE_COLUMNS)
+        self.guesses = Table(directory, "guesses", GUESS_COLUMNS)
+        self.next_game = self._repair()
+
+    def _repair(self):
+        """Cut every table back to the last whole round and return the round count."""
+        import numpy as np
+
+        games = self.games.rows()
+        self.games.truncate(games)
+        for table in (self.squares, self.guesses):
+            rows = table.rows()
+            if rows:
+                ids = np.fromfile(table.paths[0], dtype=table.columns[0][1], count=rows)
+                rows = int(np.searchsorted(ids, games))
+            table.truncate(rows)
+        return games
+
+    def add(self, log, game, source=PLAYED):
+        """Buffer a finished round; call flush() to write it."""
+        number = self.next_game
+        # Every row is converted before any is buffered, so a bad one leaves no partial round
+        squares = self.squares.convert([(number, *row) for row in log.squares])
+        guesses = self.guesses.convert([(number, *row) for row in log.guesses])
+        games = self.games.convert([(source, log.set_id, log.layout.rows, log.layout.cols,
+                                     int(game.obstacle_found), int(not game.unrevealed),
+                                     log.moves, log.ms, *game.scores)])
+        self.squares.extend(squares)
+        self.guesses.extend(guesses)
+        self.games.extend(games)
+        self.next_game += 1
+
+    def flush(self):
+        # The games row goes last; see _repair()
+        self.squares.flush()
+        self.guesses.flush()
+        self.games.flush()
+
+    def record(self, log, game, source=PLAYED):
+        """Add one finished round and write it at once."""
+        self.add(log, game, source)
+        self.flush()
+
+    def load(self):
+        """Return (games, squares, guesses) as {column: NumPy array} dicts."""
+        games = self.next_game
+        return self.games.read(games), self.squares.read(), self.guesses.read()
+
+
+def simulate(store, models, games, seed=None, layout=DEFAULT_LAYOUT):
+    """Play `games` rounds with engine.play_game and add each one's moves to the store."""
+    rng = random.Random(seed)
+    for number in range(games):
+        log = GameLog(layout, clock=None)
+        game = play_game(models, rng, layout, log=log)
+        store.add(log, game, SIMULATED)
+        if (number + 1) % FLUSH_EVERY == 0:
+            store.flush()
+    store.flush()
+
+
+def analyze(games, squares, guesses, layout=DEFAULT_LAYOUT, source=None, question_id=None):
+    """Aggregate the rounds played on `layout` into a JSON-ready dict.
+
+    Returns per-square attempts and success rates, the distribution of
+    final team scores, and how many squares were open when Obstacles were
+    named correctly before the final hint.
+    """
+    import numpy as np
+
+    keep = (games["rows"] == layout.rows) & (games["cols"] == layout.cols)
+    if source is not None:
+        keep &= games["source"] == source
+    if question_id is not None:
+        keep &= games["set"] == int(question_id)
+    count = int(keep.sum())
+    squares_total = layout.rows * layout.cols
+
+    # Squares: attempts and correct answers by square number
+    answered = keep[squares["game"]]
+    numbers = squares["square"][answered]
+    attempts = np.bincount(numbers, minlength=squares_total + 1)[1:]
+    correct = np.bincount(numbers, weights=squares["correct"][answered],
+                          minlength=squares_total + 1)[1:]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        success = correct / attempts
+    ms = squares["answer_ms"][answered]
+    answer_ms = [float(np.median(ms[numbers == square])) if attempts[square - 1] else None
+                 for square in range(1, squares_total + 1)]
+
+    # Points: every team's final score in every round
+    scores = np.stack([games[f"score{team}"][keep] for team in range(NUM_TEAMS)], axis=1)
+    values, counts = np.unique(scores, return_counts=True)
+    winning = scores.max(axis=1) if count else np.zeros(0)
+
+    # Obstacle guesses made before the final hint
+    guessed = keep[guesses["game"]] & (guesses["final"] == 0)
+    right = guessed & (guesses["correct"] == 1)
+    open_at_right = guesses["revealed"][right]
+    shown_at_right = guesses["revealed_correct"][right]
+    finals = keep[guesses["game"]] & (guesses["final"] == 1)
+
+    def percentiles(values):
+        if not len(values):
+            return None
+        return dict(zip(("p10", "p50", "p90"),
+                        (float(v) for v in np.percentile(values, (10, 50, 90)))))
+
+    return {
+        "grid": [layout.rows, layout.cols],
+        "games": count,
+        "squares": [{"square": square, "attempts": int(attempts[square - 1]),
+                     "success_rate": None if not attempts[square - 1]
+                     else round(float(success[square - 1]), 4),
+                     "median_ms": answer_ms[square - 1],
+                     "center": square in layout.center_squares}
+                    for square in range(1, squares_total + 1)],
+        "points": {
+            "distribution": {int(v): int(c) for v, c in zip(values, counts)},
+            "mean_by_team": [round(float(v), 3) for v in scores.mean(axis=0)] if count
+            else [0.0] * NUM_TEAMS,
+            "team_score": percentiles(scores.ravel()),
+            "winning_score": percentiles(winning),
+        },
+        "obstacle": {
+            "early_guesses": int(guessed.sum()),
+            "early_correct": int(right.sum()),
+            "found_early_rate": round(float(right.sum()) / count, 4) if count else 0.0,
+            "final_hints": int(finals.sum()),
+            "final_correct": int((finals & (guesses["correct"] == 1)).sum()),
+            "open_at_correct_guess": {int(n): int(c) for n, c in
+                                      enumerate(np.bincount(open_at_right,
+                                                            minlength=squares_total + 1)) if c},
+            "shown_at_correct_guess": percentiles(shown_at_right),
+            "ms_at_correct_guess": percentiles(guesses["ms"][right]),
+        },
+    }
+
+
+def print_report(report):
+    print(f"{report['games']} rounds on a {report['grid'][0]}x{report['grid'][1]} board")
+    print("square  attempts  success  median answer")
+    for row in report["squares"]:
+        rate = row["success_rate"]
+        flag = ""
+        if rate is not None and rate < HARD_BELOW:
+            flag = "  too hard?"
+        elif rate is not None and rate > EASY_ABOVE:
+            flag = "  too easy?"
+        rate_text = "     -" if rate is None else f"{rate:6.1%}"
+        ms_text = "      -" if row["median_ms"] is None else f"{row['median_ms'] / 1000:6.1f}s"
+        kind = "*" if row["center"] else " "
+        print(f"{row['square']:>5}{kind} {row['attempts']:>9} {rate_text:>8} {ms_text:>14}{flag}")
+    points = report["points"]
+    print(f"mean score by team: {points['mean_by_team']}")
+    print(f"team score percentiles: {points['team_score']}")
+    print(f"winning score percentiles: {points['winning_score']}")
+    obstacle = report["obstacle"]
+    print(f"Obstacle named before the final hint in {obstacle['found_early_rate']:.1%} of rounds "
+          f"({obstacle['early_correct']} of {obstacle['early_guesses']} early guesses right); "
+          f"final hint {obstacle['final_correct']}/{obstacle['final_hints']} right")
+    print(f"squares open at a correct guess: {obstacle['open_at_correct_guess']}")
+    print(f"image parts shown at a correct guess: {obstacle['shown_at_correct_guess']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record round history and analyze it.")
+    parser.add_argument("--store", default=HISTORY_DIR, help=f"history folder (default: {HISTORY_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    simulate_cmd = commands.add_parser("simulate", help="add simulated rounds")
+    simulate_cmd.add_argument("--games", type=int, default=100000)
+    simulate_cmd.add_argument("--p-easy", type=float, default=0.7)
+    simulate_cmd.add_argument("--p-medium", type=float, default=0.5)
+    simulate_cmd.add_argument("--guess-threshold", type=float, default=0.5)
+    simulate_cmd.add_argument("--grid", default="4x4", help="rows x columns (default 4x4)")
+    simulate_cmd.add_argument("--seed", type=int, default=None)
+
+    stats_cmd = commands.add_parser("stats", help="success per square, points and guess timing")
+    stats_cmd.add_argument("--grid", default="4x4", help="rows x columns (default 4x4)")
+    stats_cmd.add_argument("--source", choices=sorted(SOURCES), default=None,
+                           help="only played or only simulated rounds (default: both)")
+    stats_cmd.add_argument("--set", dest="question_id", help="only rounds of this question set")
+    stats_cmd.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    rows, _, cols = args.grid.partition("x")
+    layout = GridLayout(int(rows), int(cols or rows))
+    store = HistoryStore(args.store)
+    start = time.perf_counter()
+    if args.command == "simulate":
+        model = SkillModel(args.p_easy, args.p_medium, guess_threshold=args.guess_threshold)
+        simulate(store, [model] * NUM_TEAMS, args.games, args.seed, layout)
+        print(f"added {args.games} rounds in {time.perf_counter() - start:.1f} s "
+              f"({store.next_game} in {args.store})", file=sys.stderr)
+        return 0
+
+    report = analyze(*store.load(), layout, SOURCES.get(args.source), args.question_id)
+    if args.format == "json":
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    print(f"analyzed in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
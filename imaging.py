@@ -0,0 +1,284 @@
+"""Decoding board images at a fraction of their size within a memory ceiling.
+
+A 10000x10000 photo decodes to hundreds of MB, but the board only needs a
+few hundred pixels. `load_board_image` keeps the decode small where the
+format allows it:
+
+    JPEG     the decoder scales by 1/2, 1/4 or 1/8 itself (draft mode)
+    PNG      8-bit, non-interlaced files are decoded a band of rows at a time
+    TIFF     uncompressed strips and tiles are decoded a band of rows at a time
+
+Banded images are box-reduced by an integer factor as each band arrives,
+then resampled once to the board size. Anything else is decoded whole if
+that fits under the ceiling, and refused with ImageTooLargeError if not.
+
+The ceiling defaults to 256 MB and can be changed with the
+MOBIUS_IMAGE_MEMORY_MB environment variable.
+"""
+import io
+import os
+import struct
+import warnings
+import zlib
+
+from PIL import Image
+
+import tracing
+
+MEMORY_LIMIT_ENV = "MOBIUS_IMAGE_MEMORY_MB"
+DEFAULT_MEMORY_LIMIT_MB = 256
+REDUCING_GAP = 2.0
+BAND_BYTES = 4 << 20
+READ_BLOCK = 1 << 16
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_COLOR_BANDS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}  # colour type -> bytes per pixel at 8 bits
+
+
+class ImageTooLargeError(OSError):
+    """An image cannot be decoded within the memory ceiling."""
+
+
+def memory_limit():
+    """The memory ceiling in bytes, from MOBIUS_IMAGE_MEMORY_MB or the default."""
+    try:
+        megabytes = float(os.environ.get(MEMORY_LIMIT_ENV, DEFAULT_MEMORY_LIMIT_MB))
+    except ValueError:
+        megabytes = DEFAULT_MEMORY_LIMIT_MB
+    return int(megabytes * 1024 * 1024)
+
+
+def tile_mode(img):
+    """The mode tiles are kept in: RGBA if the image has transparency, else RGB."""
+    if "A" in img.getbands() or "transparency" in img.info:
+        return "RGBA"
+    return "RGB"
+
+
+def open_image(path):
+    """Image.open without the decompression-bomb warning; our decodes are bounded."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+        try:
+            return Image.open(path)
+        except Image.DecompressionBombError as e:
+            raise ImageTooLargeError(str(e)) from None
+
+
+def load_board_image(path, size, limit=None):
+    """Decode an image file straight to `size`, in RGB or RGBA.
+
+    Peak memory stays under `limit` bytes (default: memory_limit()) for
+    JPEGs, 8-bit PNGs and uncompressed TIFFs of any size; other images
+    raise ImageTooLargeError if decoding them whole would not fit.
+    """
+    if limit is None:
+        limit = memory_limit()
+    with tracing.span("open_image"):
+        img = open_image(path)
+    try:
+        mode = tile_mode(img)
+        if img.format == "JPEG":
+            img.draft(img.mode, (int(size[0] * REDUCING_GAP), int(size[1] * REDUCING_GAP)))
+            if not _fits(img, mode, limit):
+                # Give up the resampling headroom before giving up
+                img.close()
+                img = open_image(path)
+                img.draft(img.mode, size)
+
+        if _fits(img, mode, limit):
+            with tracing.span("decode"):
+                img.load()
+                if img.mode != mode:
+                    img = img.convert(mode)
+            with tracing.span("resize"):
+                return img.resize(size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+
+        width, height = img.size
+        factor = max(1, int(min(width / size[0], height / size[1]) / REDUCING_GAP))
+        if -(-width // factor) * (height // factor) * Image.getmodebands(mode) * 2 > limit:
+            raise ImageTooLargeError(
+                f"{width}x{height} image does not fit in {limit >> 20} MB even reduced.")
+        band_rows = max(factor, BAND_BYTES // (width * 4) // factor * factor)
+        if img.format == "PNG":
+            parts = _png_bands(path, band_rows)
+        else:
+            tiles = _split_tiles(img, band_rows)
+            if tiles is None:
+                raise ImageTooLargeError(
+                    f"{width}x{height} {img.format} image needs more than {limit >> 20} MB "
+                    "to decode and cannot be decoded in parts.")
+            parts = _tile_bands(img, tiles)
+
+        # Reduce with premultiplied alpha, as resize() does, so that colour
+        # under transparent pixels does not bleed into the edges
+        working = "RGBa" if mode == "RGBA" else mode
+        with tracing.span("decode_bands", factor=factor):
+            reduced = _reduce_bands(parts, width, height, working, factor)
+        with tracing.span("resize"):
+            return reduced.convert(mode).resize(size, Image.LANCZOS)
+    finally:
+        img.close()
+
+
+def _fits(img, mode, limit):
+    """Whether decoding `img` whole, plus its copy converted to `mode`, fits in `limit`."""
+    width, height = img.size
+    return width * height * (len(img.getbands()) + Image.getmodebands(mode)) <= limit
+
+
+def _reduce_bands(parts, width, height, mode, factor):
+    """Box-reduce full-width bands of rows, in order, into one image."""
+    out = Image.new(mode, (-(-width // factor), height // factor))
+    carry = None
+    y = 0
+    for band in parts:
+        if band.mode != mode:
+            if mode == "RGBa" and band.mode != "RGBA":
+                band = band.convert("RGBA")
+            band = band.convert(mode)
+        if carry is not None:
+            joined = Image.new(mode, (width, carry.height + band.height))
+            joined.paste(carry, (0, 0))
+            joined.paste(band, (0, carry.height))
+            band = joined
+            carry = None
+        usable = band.height - band.height % factor
+        if usable:
+            out.paste(band.crop((0, 0, width, usable)).reduce(factor), (0, y))
+            y += usable // factor
+        if usable < band.height:
+            carry = band.crop((0, usable, width, band.height))
+    # Any carry left is under one output row
+    return out
+
+
+def _png_chunks(f):
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise OSError("Truncated PNG file.")
+        length, chunk_type = struct.unpack(">I4s", header)
+        data = f.read(length)
+        f.read(4)  # CRC
+        yield chunk_type, data
+        if chunk_type == b"IEND":
+            return
+
+
+def _png_chunk(chunk_type, data):
+    return (struct.pack(">I", len(data)) + chunk_type + data
+            + struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+
+def _png_bands(path, band_rows):
+    """Yield a PNG's rows as images of `band_rows` rows each.
+
+    The compressed stream is inflated incrementally. Each band's filtered
+    scanlines are rewrapped as a small stand-alone PNG, led by the previous
+    band's last row stored unfiltered so that Up, Average and Paeth filters
+    see the right neighbours, and handed to Pillow to unfilter.
+    """
+    with open(path, "rb") as f:
+        if f.read(8) != PNG_SIGNATURE:
+            raise OSError(f"'{path}' is not a PNG file.")
+        chunks = _png_chunks(f)
+        chunk_type, ihdr = next(chunks)
+        width, height, depth, color, _, _, interlace = struct.unpack(">IIBBBBB", ihdr)
+        if depth != 8 or interlace or color not in PNG_COLOR_BANDS:
+            raise ImageTooLargeError(
+                f"{width}x{height} PNG is interlaced or not 8-bit and cannot be decoded in parts.")
+        stride = width * PNG_COLOR_BANDS[color] + 1
+        band_size = band_rows * stride
+        extra = b""  # palette and transparency chunks, copied into each band
+        inflater = zlib.decompressobj()
+        rows = bytearray()
+        previous = None
+        for chunk_type, data in chunks:
+            if chunk_type in (b"PLTE", b"tRNS"):
+                extra += _png_chunk(chunk_type, data)
+            elif chunk_type == b"IDAT":
+                while data:
+                    rows += inflater.decompress(data, band_size)
+                    data = inflater.unconsumed_tail
+                    while len(rows) >= band_size:
+                        band, previous = _png_band(ihdr, extra, previous, rows[:band_size], stride)
+                        del rows[:band_size]
+                        yield band
+        rows += inflater.flush()
+        if len(rows) >= stride:
+            yield _png_band(ihdr, extra, previous, rows[:len(rows) // stride * stride], stride)[0]
+
+
+def _png_band(ihdr, extra, previous, rows, stride):
+    """Decode filtered scanlines; return (band image, its last row unfiltered)."""
+    count = len(rows) // stride
+    if previous is not None:
+        rows = b"\0" + previous + rows
+        count += 1
+    header = ihdr[:4] + struct.pack(">I", count) + ihdr[8:]
+    data = (PNG_SIGNATURE + _png_chunk(b"IHDR", header) + extra
+            + _png_chunk(b"IDAT", zlib.compress(bytes(rows), 0)) + _png_chunk(b"IEND", b""))
+    band = Image.open(io.BytesIO(data))
+    band.load()
+    if previous is not None:
+        band = band.crop((0, 1, band.width, count))
+    last = band.crop((0, band.height - 1, band.width, band.height)).tobytes()
+    return band, last
+
+
+def _split_tiles(img, band_rows):
+    """Return the image's tiles with uncompressed ones cut into bands of rows.
+
+    Returns None if some tile can only be decoded together with the rest,
+    as with compressed TIFFs read through libtiff.
+    """
+    tiles = []
+    for codec, extents, offset, args in img.tile:
+        if codec != "raw":
+            if codec == "libtiff":
+                return None
+            tiles.append((codec, extents, offset, args))
+            continue
+        rawmode, stride, orientation = (args, 0, 1) if isinstance(args, str) else args
+        left, top, right, bottom = extents
+        if orientation != 1:
+            return None
+        if not stride:
+            try:
+                stride = len(Image.new(img.mode, (right - left, 1)).tobytes("raw", rawmode))
+            except (ValueError, SystemError):
+                return None
+        for y in range(top, bottom, band_rows):
+            tiles.append((codec, (left, y, right, min(y + band_rows, bottom)),
+                          offset + (y - top) * stride, (rawmode, stride, 1)))
+    return tiles if len(tiles) > 1 else None
+
+
+def _tile_bands(img, tiles):
+    """Yield full-width bands of an image by decoding its tiles one row at a time."""
+    width = img.width
+    rows = {}
+    for tile in tiles:
+        rows.setdefault((tile[1][1], tile[1][3]), []).append(tile)
+    with open(img.filename, "rb") as f:
+        for (top, bottom), row in sorted(rows.items()):
+            band = Image.new(img.mode, (width, bottom - top))
+            for codec, extents, offset, args in row:
+                decoder = Image._getdecoder(img.mode, codec, args, img.decoderconfig)
+                decoder.setimage(band.im, (extents[0], 0, extents[2], bottom - top))
+                f.seek(offset)
+                buffer = b""
+                try:
+                    while True:
+                        block = f.read(READ_BLOCK)
+                        buffer += block
+                        consumed, _ = decoder.decode(buffer)
+                        if consumed < 0:
+                            break
+                        if not block:
+                            raise OSError("Image file is truncated.")
+                        buffer = buffer[consumed:]
+                finally:
+                    decoder.cleanup()
+            yield band
@@ -0,0 +1,321 @@
+"""Append-only journals of game events, for resuming rounds and auditing scores.
+
+Each round gets one file in journals/, one compact JSON array per line:
+
+    ["L", ms, "001", rows, cols]     set loaded, round started
+    ["R", ms]                        round resumed after a restart
+    ["C", ms, square]                square chosen
+    ["A", ms, i, j, correct]         square answered (correct is 1 or 0)
+    ["G", ms, correct(, team)]       Obstacle guessed; team only if out of turn
+    ["H", ms]                        final hint shown
+    ["F", ms, correct]               final guess
+    ["S", ms, {state}]               snapshot, ObstacleGame.to_dict()
+    ["E", ms, [scores], completed]   round over; completed is 0 if abandoned
+
+`ms` counts milliseconds since the round started. Every line is handed
+to the OS as soon as it is written, so a crash of the app loses nothing;
+the fsync that also covers a power cut is batched, running once
+SYNC_EVERY lines are pending or SYNC_INTERVAL seconds have passed. A
+snapshot follows every SNAPSHOT_EVERY moves, so resuming reads the last
+snapshot and replays only the lines after it. A torn last line is
+ignored.
+
+Replaying whole journals re-scores every round from its moves and checks
+the result against the snapshots and the recorded final scores:
+
+    python journal.py replay journals/ --jobs 4
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from engine import GAME_OVER, GridLayout, ObstacleGame
+
+JOURNAL_DIR = "journals"
+JOURNAL_SUFFIX = ".journal"
+SNAPSHOT_EVERY = 8  # Moves between snapshots
+SYNC_EVERY = 8  # Lines written before an fsync is forced
+SYNC_INTERVAL = 1.0  # Seconds a written line may wait for its fsync
+
+MOVES = ("A", "G", "F")
+
+
+class JournalError(Exception):
+    """A journal is unreadable or does not start with a loaded set."""
+
+
+class RoundJournal:
+    """Writer for one round's journal file.
+
+    Use create() for a new round and reopen() to carry on after a resume.
+    """
+
+    def __init__(self, path, game, elapsed_ms=0):
+        self.path = path
+        self.game = game
+        self._file = open(path, "ab")
+        self._started = time.monotonic() - elapsed_ms / 1000
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._moves_since_snapshot = 0
+
+    @classmethod
+    def create(cls, question_id, game, journal_dir=JOURNAL_DIR):
+        """Start a journal for a new round of set `question_id`."""
+        os.makedirs(journal_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{question_id}-{os.getpid()}{JOURNAL_SUFFIX}"
+        journal = cls(os.path.join(journal_dir, name), game)
+        journal.record("L", question_id, game.layout.rows, game.layout.cols)
+        journal.sync()
+        return journal
+
+    @classmethod
+    def reopen(cls, recovered):
+        """Continue writing the journal a round was recovered from."""
+        os.truncate(recovered.path, recovered.valid_size)
+        journal = cls(recovered.path, recovered.game, recovered.elapsed_ms)
+        journal.record("R")
+        journal.sync()
+        return journal
+
+    def record(self, kind, *fields):
+        """Append one line, snapshotting and syncing when due."""
+        self._write([kind, self._now(), *fields])
+        if kind in MOVES:
+            self._moves_since_snapshot += 1
+            if self._moves_since_snapshot >= SNAPSHOT_EVERY:
+                self._write(["S", self._now(), self.game.to_dict()])
+                self._moves_since_snapshot = 0
+        if self._pending >= SYNC_EVERY:
+            self.sync()
+        else:
+            self.sync_if_due()
+
+    def chose(self, square):
+        self.record("C", square)
+
+    def answered(self, i, j, correct):
+        self.record("A", i, j, int(correct))
+
+    def guessed(self, correct, team=None):
+        if team is None:
+            self.record("G", int(correct))
+        else:
+            self.record("G", int(correct), team)
+
+    def final_hint(self):
+        self.record("H")
+
+    def final_guessed(self, correct):
+        self.record("F", int(correct))
+
+    def finish(self, completed=True):
+        """Record the final scores and close; a finished round is not offered for resuming."""
+        self.record("E", list(self.game.scores), int(completed))
+        self.close()
+
+    def sync_if_due(self):
+        """fsync if a written line has waited SYNC_INTERVAL seconds."""
+        if self._pending and time.monotonic() - self._last_sync >= SYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        """Force everything written so far onto the disk."""
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def _now(self):
+        return int((time.monotonic() - self._started) * 1000)
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+        self._file.flush()
+        self._pending += 1
+
+
+class Recovered:
+    """A round rebuilt from its journal.
+
+    `valid_size` is the length of the file up to its last whole line;
+    anything after it is cut off before the journal is written to again.
+    """
+
+    def __init__(self, path, question_id, game, finished, elapsed_ms, valid_size):
+        self.path = path
+        self.question_id = question_id
+        self.game = game
+        self.finished = finished
+        self.elapsed_ms = elapsed_ms
+        self.valid_size = valid_size
+
+
+def read_journal(path, with_size=False):
+    """Return a journal's records, stopping at a torn or corrupt line.
+
+    With `with_size`, return (records, bytes up to the last good line).
+    """
+    records = []
+    size = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if not isinstance(record, list) or not record or not isinstance(record[0], str):
+                break
+            records.append(record)
+            size += len(line)
+    if not records or records[0][0] != "L":
+        raise JournalError(f"'{path}' does not start with a loaded set.")
+    return (records, size) if with_size else records
+
+
+def apply_record(game, record):
+    """Apply one move record to a game; other records are ignored."""
+    kind = record[0]
+    if kind == "A":
+        game.answer_square(record[2], record[3], bool(record[4]))
+    elif kind == "G":
+        game.guess_obstacle(bool(record[2]), record[3] if len(record) > 3 else None)
+    elif kind == "F":
+        game.final_guess(bool(record[2]))
+
+
+def recover(path):
+    """Rebuild a round from its last snapshot and the moves after it."""
+    records, valid_size = read_journal(path, with_size=True)
+    _, _, question_id, rows, cols = records[0][:5]
+    start = 0
+    game = ObstacleGame(GridLayout(rows, cols))
+    for index in range(len(records) - 1, 0, -1):
+        if records[index][0] == "S":
+            game = ObstacleGame.from_dict(records[index][2])
+            start = index + 1
+            break
+    for record in records[start:]:
+        apply_record(game, record)
+    finished = records[-1][0] == "E"
+    return Recovered(path, question_id, game, finished, records[-1][1], valid_size)
+
+
+def find_unfinished(journal_dir=JOURNAL_DIR):
+    """Return the newest journal's Recovered round if it was interrupted, else None."""
+    paths = glob.glob(os.path.join(journal_dir, f"*{JOURNAL_SUFFIX}"))
+    if not paths:
+        return None
+    newest = max(paths, key=os.path.getmtime)
+    try:
+        recovered = recover(newest)
+    except (OSError, JournalError, LookupError, TypeError, ValueError):
+        return None
+    return None if recovered.finished else recovered
+
+
+def abandon(recovered, completed=False):
+    """Close an interrupted round's journal without resuming it."""
+    os.truncate(recovered.path, recovered.valid_size)
+    RoundJournal(recovered.path, recovered.game, recovered.elapsed_ms).finish(completed)
+
+
+def replay(path):
+    """Re-score a journal from its first move and check it against what it recorded.
+
+    Returns a dict with the set ID, replayed scores, whether the round
+    finished, and any mismatches found.
+    """
+    result = {"path": path, "id": None, "scores": None, "finished": False, "errors": []}
+    try:
+        records = read_journal(path)
+        _, _, question_id, rows, cols = records[0][:5]
+        result["id"] = question_id
+        game = ObstacleGame(GridLayout(rows, cols))
+        for number, record in enumerate(records, 1):
+            kind = record[0]
+            if kind in MOVES:
+                if game.phase == GAME_OVER:
+                    result["errors"].append(f"line {number}: move after the game ended")
+                    continue
+                apply_record(game, record)
+            elif kind == "S" and record[2] != game.to_dict():
+                result["errors"].append(f"line {number}: snapshot does not match the moves")
+            elif kind == "E":
+                result["finished"] = True
+                if record[2] != game.scores:
+                    result["errors"].append(
+                        f"line {number}: recorded scores {record[2]} != replayed {game.scores}")
+        result["scores"] = game.scores
+    except (OSError, JournalError, LookupError, TypeError, ValueError) as e:
+        result["errors"].append(str(e))
+    return result
+
+
+def replay_all(paths, jobs=None):
+    """Replay many journals across a process pool, returning results in input order."""
+    if len(paths) < 64 or jobs == 1:
+        return [replay(path) for path in paths]
+    # Imported here so that the game does not load multiprocessing at startup
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(replay, paths, chunksize=64))
+
+
+def find_journals(targets):
+    """Expand directories into the journal files inside them."""
+    paths = []
+    for target in targets:
+        if os.path.isdir(target):
+            paths.extend(sorted(glob.glob(os.path.join(target, f"*{JOURNAL_SUFFIX}"))))
+        else:
+            paths.append(target)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay and audit round journals.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay_cmd = commands.add_parser("replay", help="re-score journals and check them")
+    replay_cmd.add_argument("targets", nargs="*", default=[JOURNAL_DIR],
+                            help="journal files or folders (default: journals/)")
+    replay_cmd.add_argument("--format", choices=("text", "jsonl"), default="text")
+    replay_cmd.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    paths = find_journals(args.targets)
+    start = time.perf_counter()
+    results = replay_all(paths, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for result in results:
+        failed += bool(result["errors"])
+        if args.format == "jsonl":
+            print(json.dumps(result, ensure_ascii=False))
+            continue
+        status = "ok" if not result["errors"] else "MISMATCH"
+        state = "finished" if result["finished"] else "unfinished"
+        print(f"{result['path']}: {status} set {result['id']} {state} scores {result['scores']}")
+        for error in result["errors"]:
+            print(f"    error: {error}")
+    print(f"{len(results)} journals replayed in {elapsed:.2f} s, {failed} with errors",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
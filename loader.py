@@ -0,0 +1,158 @@
+"""Background loading and prefetching of question sets."""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from question_set import PROBLEMS_DIR, QuestionSetError, load_question_set, question_set_paths
+
+# Load stages and the progress fraction shown once each is reached
+QUEUED = ("Waiting...", 0.0)
+READING = ("Reading questions...", 0.1)
+DECODING = ("Decoding image...", 0.4)
+BUILDING = ("Building tiles...", 0.9)
+
+
+class LoadedSet:
+    """A validated question set with its resized image and tile grid.
+
+    `tiles` is a (rows, cols, height, width, bands) array of views (see
+    tile_cache.slice_image). `image` is None for sets read from a packed
+    archive, which only stores tiles. `levels` is the tile pyramid: an
+    (image, tiles) pair per size, smallest first, the base size included.
+    """
+
+    def __init__(self, question_set, image, tiles, levels=None):
+        self.question_set = question_set
+        self.image = image
+        self.tiles = tiles
+        self.levels = levels or [(image, tiles)]
+
+
+class LoadJob:
+    """A question set being loaded on the worker pool.
+
+    `stage` is written by the worker and polled from the Tk main loop.
+    """
+
+    def __init__(self, question_id):
+        self.question_id = question_id
+        self.stage = QUEUED
+        self.future = None
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        """Return the LoadedSet, re-raising any error from the worker."""
+        return self.future.result()
+
+
+class QuestionSetLoader:
+    """Runs JSON parsing, validation and image decode/resize/slicing off the UI thread.
+
+    Everything except `ImageTk.PhotoImage` creation happens here; the caller
+    polls the returned LoadJob with `after()` and builds the PhotoImages on
+    the main thread. Prefetched jobs are kept until they are asked for.
+    Sets present in `archive` (a PackedArchive) are read from it instead of
+    the problems folder. With `pyramid`, a sequence of scale factors for
+    `image_size`, every set also gets tiles at each of those scales.
+    `tile_cache` may also be a function returning the cache; it is called
+    on a worker thread by the first load, so making a loader does not
+    import the image stack.
+    """
+
+    def __init__(self, tile_cache, problems_dir=PROBLEMS_DIR, max_workers=2,
+                 image_size=(400, 400), archive=None, pyramid=None):
+        self._tile_cache = tile_cache
+        self._cache_lock = threading.Lock()
+        self.archive = archive
+        self.problems_dir = problems_dir
+        self.image_size = image_size
+        scales = sorted(set(pyramid or ()) | {1.0})
+        self.level_sizes = [(round(image_size[0] * scale), round(image_size[1] * scale))
+                            for scale in scales]
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix="question-set-loader")
+        self._jobs = {}
+
+    def load(self, question_id):
+        """Start (or reuse a prefetched) load of a question set and return its LoadJob."""
+        job = self._jobs.pop(question_id, None)
+        if job is None or (job.done() and job.future.exception() is not None):
+            job = self._submit(question_id)
+        return job
+
+    def prefetch(self, question_id):
+        """Speculatively load a set in the background if its files exist."""
+        if question_id in self._jobs:
+            return
+        if self.archive is not None and question_id in self.archive:
+            self._jobs[question_id] = self._submit(question_id)
+            return
+        questions_file, image_file = question_set_paths(question_id, self.problems_dir)
+        if os.path.exists(questions_file) and os.path.exists(image_file):
+            self._jobs[question_id] = self._submit(question_id)
+
+    def run(self, func, *args):
+        """Run other file work on the worker pool and return its Future."""
+        return self._pool.submit(func, *args)
+
+    @property
+    def tile_cache(self):
+        with self._cache_lock:
+            if callable(self._tile_cache):
+                self._tile_cache = self._tile_cache()
+            return self._tile_cache
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, question_id):
+        job = LoadJob(question_id)
+        job.future = self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        with tracing.span("load_set", id=job.question_id):
+            return self._load(job)
+
+    def _load(self, job):
+        if self.archive is not None and job.question_id in self.archive:
+            job.stage = READING
+            question_set = self.archive.question_set(job.question_id)
+            tiles = self.archive.tiles(job.question_id)
+            job.stage = DECODING
+            return LoadedSet(question_set, None, tiles, self._scale_packed(tiles))
+
+        job.stage = READING
+        question_set = load_question_set(job.question_id, self.problems_dir)
+        job.stage = DECODING
+        layout = question_set.layout
+        try:
+            levels = self.tile_cache.get_pyramid(question_set.image_file, self.level_sizes,
+                                                 (layout.rows, layout.cols))
+        except Exception as e:
+            raise QuestionSetError(f"Failed to load image: {str(e)}") from e
+        job.stage = BUILDING
+        image, tiles = levels[self.level_sizes.index(tuple(self.image_size))]
+        return LoadedSet(question_set, image, tiles, levels)
+
+    def _scale_packed(self, tiles):
+        """Build the pyramid for a packed set from the only tiles the archive stores."""
+        if len(self.level_sizes) == 1:
+            return None
+        from PIL import Image
+        from tile_cache import assemble_tiles, slice_image
+
+        rows, cols = tiles.shape[:2]
+        base = Image.fromarray(assemble_tiles(tiles))
+        levels = []
+        for size in self.level_sizes:
+            if size == tuple(self.image_size):
+                levels.append((None, tiles))
+                continue
+            with tracing.span("resize", source=base.size):
+                image = base.resize(size, Image.LANCZOS)
+            levels.append((image, slice_image(image, (rows, cols))))
+        return levels
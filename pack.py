@@ -0,0 +1,217 @@
+"""Single-file packed question-set archives with pre-sliced tiles.
+
+Layout of a .mobpack file:
+
+    header   MAGIC, then index offset and index length (little-endian u64)
+    data     for each set: its questions JSON, then its tiles as raw RGBA
+             pixels, tile after tile in row-major grid order, each block
+             16-byte aligned
+    index    UTF-8 JSON mapping set ID -> offsets, lengths and tile geometry
+
+Readers load only the header and the index, then memory-map the file and
+hand out the tile grid as a zero-copy array view into the mapping. NumPy
+and Pillow are imported only once tiles are needed, so opening an archive
+to list its sets stays cheap at startup.
+
+Usage:
+
+    python pack.py pack problems problems/sets.mobpack
+    python pack.py unpack problems/sets.mobpack unpacked/
+    python pack.py list problems/sets.mobpack
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+
+from question_set import (PROBLEMS_DIR, QuestionSetError, find_question_ids, load_question_set,
+                          parse_question_data)
+
+MAGIC = b"MOBPACK1"
+HEADER = struct.Struct("<8sQQ")
+ALIGNMENT = 16
+TILE_MODE = "RGBA"
+PACK_FILE = os.path.join(PROBLEMS_DIR, "sets.mobpack")
+
+
+class PackedArchive:
+    """Read-only, memory-mapped view of a .mobpack file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            magic, index_offset, index_length = HEADER.unpack(self._file.read(HEADER.size))
+            if magic != MAGIC:
+                raise QuestionSetError(f"'{path}' is not a question-set archive.")
+            self._file.seek(index_offset)
+            self.index = json.loads(self._file.read(index_length).decode("utf-8"))
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._map)
+
+    def ids(self):
+        """Return the set IDs in the archive, sorted."""
+        return sorted(self.index)
+
+    def __contains__(self, question_id):
+        return question_id in self.index
+
+    def question_set(self, question_id):
+        """Return the QuestionSet stored under an ID."""
+        entry = self._entry(question_id)
+        offset, length = entry["questions"]
+        data = json.loads(bytes(self._view[offset:offset + length]).decode("utf-8"))
+        return parse_question_data(data, question_id, f"{self.path}#{question_id}")
+
+    def tiles(self, question_id):
+        """Return the set's (rows, cols, height, width, 4) tile grid, sharing the mapped memory."""
+        import numpy as np
+
+        entry = self._entry(question_id)
+        rows, cols = entry["grid_size"]
+        width, height = entry["tile_size"]
+        offset, length = entry["tiles"]
+        return np.frombuffer(self._map, dtype=np.uint8, count=length, offset=offset).reshape(
+            rows, cols, height, width, len(TILE_MODE))
+
+    def close(self):
+        # Tiles handed out still reference the mapping; let them keep it alive
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+    def _entry(self, question_id):
+        try:
+            return self.index[question_id]
+        except KeyError:
+            raise QuestionSetError(f"Set '{question_id}' is not in '{self.path}'.") from None
+
+
+def pack(problems_dir, out_path, image_size=(400, 400)):
+    """Pack every valid set in `problems_dir` into `out_path`.
+
+    Returns (packed IDs, {skipped ID: reason}).
+    """
+    import numpy as np
+
+    from imaging import load_board_image
+    from tile_cache import slice_image
+
+    index = {}
+    skipped = {}
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+        for question_id in find_question_ids(problems_dir):
+            try:
+                question_set = load_question_set(question_id, problems_dir)
+                img = load_board_image(question_set.image_file, image_size).convert(TILE_MODE)
+            except (QuestionSetError, OSError) as e:
+                skipped[question_id] = str(e)
+                continue
+            layout = question_set.layout
+            tiles = slice_image(img, (layout.rows, layout.cols))
+
+            questions_file = os.path.join(problems_dir, f"questions_{question_id}.json")
+            with open(questions_file, "rb") as qf:
+                questions_offset = _write_block(f, qf.read())
+            questions_length = f.tell() - questions_offset
+
+            tiles_offset = _write_block(f, np.ascontiguousarray(tiles).tobytes())
+            index[question_id] = {
+                "questions": [questions_offset, questions_length],
+                "tiles": [tiles_offset, f.tell() - tiles_offset],
+                "tile_size": [tiles.shape[3], tiles.shape[2]],
+                "grid_size": [layout.rows, layout.cols],
+                "obstacle_answer": question_set.obstacle_answer,
+            }
+
+        index_offset = f.tell()
+        index_bytes = json.dumps(index, ensure_ascii=False).encode("utf-8")
+        f.write(index_bytes)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, index_offset, len(index_bytes)))
+    os.replace(tmp_path, out_path)
+    return sorted(index), skipped
+
+
+def unpack(archive_path, out_dir):
+    """Write each set back out as questions_NNN.json and image_NNN.png.
+
+    The image is reassembled from the stored tiles, so it comes back at the
+    packed board size rather than the original resolution.
+    """
+    import numpy as np
+    from PIL import Image
+
+    from tile_cache import assemble_tiles
+
+    os.makedirs(out_dir, exist_ok=True)
+    archive = PackedArchive(archive_path)
+    try:
+        for question_id in archive.ids():
+            entry = archive.index[question_id]
+            offset, length = entry["questions"]
+            with open(os.path.join(out_dir, f"questions_{question_id}.json"), "wb") as f:
+                f.write(archive._view[offset:offset + length])
+
+            tiles = archive.tiles(question_id)
+            board = Image.fromarray(np.ascontiguousarray(assemble_tiles(tiles)))
+            board.save(os.path.join(out_dir, f"image_{question_id}.png"))
+            del tiles, board
+        return archive.ids()
+    finally:
+        archive.close()
+
+
+def _write_block(f, data):
+    """Write `data` at the next aligned offset and return that offset."""
+    padding = -f.tell() % ALIGNMENT
+    f.write(b"\0" * padding)
+    offset = f.tell()
+    f.write(data)
+    return offset
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack or unpack question-set archives.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack_cmd = commands.add_parser("pack", help="pack a problems folder into one archive")
+    pack_cmd.add_argument("problems_dir", nargs="?", default=PROBLEMS_DIR)
+    pack_cmd.add_argument("archive", nargs="?", default=PACK_FILE)
+
+    unpack_cmd = commands.add_parser("unpack", help="write an archive back out as loose files")
+    unpack_cmd.add_argument("archive")
+    unpack_cmd.add_argument("out_dir")
+
+    list_cmd = commands.add_parser("list", help="list the sets in an archive")
+    list_cmd.add_argument("archive", nargs="?", default=PACK_FILE)
+
+    args = parser.parse_args(argv)
+    if args.command == "pack":
+        packed, skipped = pack(args.problems_dir, args.archive)
+        for question_id, reason in sorted(skipped.items()):
+            print(f"skipped {question_id}: {reason}", file=sys.stderr)
+        print(f"packed {len(packed)} sets into {args.archive}")
+    elif args.command == "unpack":
+        ids = unpack(args.archive, args.out_dir)
+        print(f"unpacked {len(ids)} sets into {args.out_dir}")
+    else:
+        archive = PackedArchive(args.archive)
+        for question_id in archive.ids():
+            print(f"{question_id}\t{archive.index[question_id]['obstacle_answer']}")
+        archive.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
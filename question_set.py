@@ -0,0 +1,147 @@
+"""Reading and validating question sets from the problems folder."""
+import glob
+import json
+import os
+import re
+
+import tracing
+from answers import AnswerKey
+from engine import DEFAULT_LAYOUT, GridLayout
+
+PROBLEMS_DIR = "problems"
+
+
+class QuestionSetError(Exception):
+    """A question set is missing or malformed."""
+
+
+class QuestionSet:
+    """Questions, answers, hints and Obstacle for one round.
+
+    `answer_keys` and `obstacle_key` are the answers compiled for checking
+    submissions (see answers.AnswerKey), built once here.
+    """
+
+    def __init__(self, question_id, questions, answers, hints, obstacle_answer,
+                 final_hint, image_file, layout=DEFAULT_LAYOUT, aliases=None,
+                 obstacle_aliases=()):
+        self.question_id = question_id
+        self.questions = questions
+        self.answers = answers
+        self.hints = hints
+        self.obstacle_answer = obstacle_answer
+        self.final_hint = final_hint
+        self.image_file = image_file
+        self.layout = layout
+        self.aliases = aliases or {}
+        self.obstacle_aliases = list(obstacle_aliases)
+        self.answer_keys = {square: AnswerKey(answer, self.aliases.get(square, ()))
+                            for square, answer in answers.items()}
+        self.obstacle_key = AnswerKey(obstacle_answer, self.obstacle_aliases)
+
+
+def question_set_paths(question_id, problems_dir=PROBLEMS_DIR):
+    """Return the (questions file, image file) paths for a set ID."""
+    questions_file = os.path.join(problems_dir, f"questions_{question_id}.json")
+    image_file = os.path.join(problems_dir, f"image_{question_id}.png")
+    return questions_file, image_file
+
+
+def parse_layout(data):
+    """Return the GridLayout for questions JSON; sets without a "grid" are 4x4."""
+    grid = data.get('grid')
+    if grid is None:
+        return DEFAULT_LAYOUT
+    try:
+        rows, cols = grid
+        return GridLayout(int(rows), int(cols))
+    except (TypeError, ValueError):
+        raise QuestionSetError("'grid' must be [rows, columns] with both at least 1.")
+
+
+def parse_question_data(data, question_id, image_file):
+    """Build a QuestionSet from already-decoded questions JSON."""
+    try:
+        layout = parse_layout(data)
+        questions_data = data['questions']
+        obstacle_answer = data['obstacle_answer']
+        final_hint = data['final_hint']
+        obstacle_aliases = _aliases(data.get('obstacle_aliases', []))
+
+        # Populate questions, answers, hints and alternative answers from the loaded data
+        questions = {}
+        answers = {}
+        hints = {}
+        aliases = {}
+        for q in questions_data:
+            square = q['square']
+            questions[square] = q['question']
+            answers[square] = q['answer']
+            if 'hint' in q:
+                hints[square] = q['hint']
+            if 'aliases' in q:
+                aliases[square] = _aliases(q['aliases'])
+    except (KeyError, TypeError, AttributeError):
+        raise QuestionSetError("Invalid format in questions file.")
+
+    # Ensure every square of the grid is present
+    if set(questions.keys()) != set(range(1, layout.size + 1)):
+        raise QuestionSetError(
+            f"Questions file must contain exactly squares 1 to {layout.size}.")
+
+    try:
+        return QuestionSet(question_id, questions, answers, hints, obstacle_answer,
+                           final_hint, image_file, layout, aliases, obstacle_aliases)
+    except (TypeError, AttributeError):
+        raise QuestionSetError("Invalid format in questions file.")
+
+
+def _aliases(value):
+    if not isinstance(value, list) or not all(isinstance(alias, str) for alias in value):
+        raise TypeError("aliases must be a list of strings")
+    return value
+
+
+def find_question_ids(problems_dir=PROBLEMS_DIR):
+    """Return the IDs of all questions_NNN.json files in a folder, sorted."""
+    ids = []
+    for path in glob.glob(os.path.join(problems_dir, "questions_*.json")):
+        match = re.fullmatch(r"questions_(\d+)\.json", os.path.basename(path))
+        if match:
+            ids.append(match.group(1))
+    return sorted(ids)
+
+
+def load_question_set(question_id, problems_dir=PROBLEMS_DIR):
+    """Read and validate the question set with the given ID.
+
+    Raises QuestionSetError with a user-facing message if a file is missing
+    or the questions file is malformed.
+    """
+    with tracing.span("load_question_set", id=question_id):
+        return _load_question_set(question_id, problems_dir)
+
+
+def _load_question_set(question_id, problems_dir):
+    questions_file, image_file = question_set_paths(question_id, problems_dir)
+
+    # Check if files exist
+    if not os.path.exists(questions_file):
+        raise QuestionSetError(f"Questions file '{questions_file}' not found.")
+    if not os.path.exists(image_file):
+        raise QuestionSetError(f"Image file '{image_file}' not found.")
+
+    # Load questions, answers, hints, obstacle answer, and final hint from JSON
+    try:
+        with tracing.span("read_json"), open(questions_file, encoding='utf-8') as f:
+            data = json.load(f)
+    except ValueError:
+        raise QuestionSetError("Invalid format in questions file.")
+
+    with tracing.span("validate"):
+        return parse_question_data(data, question_id, image_file)
+
+
+def next_question_id(question_id):
+    """Return the numerically next set ID with the same zero padding (001 -> 002)."""
+    return f"{int(question_id) + 1:0{len(question_id)}d}"
@@ -0,0 +1,338 @@
+"""Asyncio server hosting many Obstacle Course rounds at once over line-based TCP.
+
+Clients send one JSON object per line and get one JSON object back per
+request, echoing the request's "id" if it had one:
+
+    {"op": "sets"}                                  -> {"ok": true, "sets": ["001", ...]}
+    {"op": "join", "room": "7a", "set": "001"}      -> {"ok": true, "state": {...}, ...}
+    {"op": "question", "square": 5}                 -> {"ok": true, "question": "..."}
+    {"op": "answer", "square": 5, "answer": "12"}   -> {"ok": true, "correct": true, "points": 10, ...}
+    {"op": "guess", "answer": "..."}                -> Obstacle guess, same reply shape
+    {"op": "final", "answer": "..."}                -> guess after the final hint
+    {"op": "tile", "square": 5}                     -> {"ok": true, "png": "<base64>"}
+    {"op": "state"} / {"op": "leave"}
+
+Errors come back as {"ok": false, "error": "..."}. Every move is also sent
+to the room's other clients as {"event": "move", ...}. The first client to
+join a room picks its set; a room is dropped when its last client leaves.
+Scores, turns and reveals follow engine.ObstacleGame. A set is loaded once,
+through the same QuestionSetLoader as the desktop app, and its tiles are
+shared read-only by every room playing it; a tile is PNG-encoded at most
+once per set.
+
+    python server.py --port 8765
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+
+from engine import FINAL_GUESS, GAME_OVER, ObstacleGame
+from loader import QuestionSetLoader
+from pack import PACK_FILE, PackedArchive
+from question_set import PROBLEMS_DIR, QuestionSetError, find_question_ids
+
+DEFAULT_PORT = 8765
+IMAGE_SIZE = (400, 400)
+
+
+class ProtocolError(Exception):
+    """A request that cannot be carried out; the message goes back to the client."""
+
+
+class SharedSet:
+    """A loaded question set and its tiles, shared read-only by every room playing it."""
+
+    def __init__(self, loaded):
+        self.question_set = loaded.question_set
+        self.layout = loaded.question_set.layout
+        self.tiles = loaded.tiles.view()
+        self.tiles.flags.writeable = False
+        self._png = {}
+
+    def tile_png(self, i, j):
+        """Return tile (i, j) as base64 PNG, encoding it the first time it is asked for."""
+        png = self._png.get((i, j))
+        if png is None:
+            import io
+            from PIL import Image
+
+            out = io.BytesIO()
+            Image.fromarray(self.tiles[i, j]).save(out, "PNG")
+            png = self._png[(i, j)] = base64.b64encode(out.getvalue()).decode("ascii")
+        return png
+
+
+class SetLibrary:
+    """Loads each set once and hands the same SharedSet to every room that asks."""
+
+    def __init__(self, problems_dir=PROBLEMS_DIR, archive=None, tile_cache=None):
+        if tile_cache is None:
+            from tile_cache import TileCache
+            tile_cache = TileCache()
+        self.problems_dir = problems_dir
+        self.archive = archive
+        self.loader = QuestionSetLoader(tile_cache, problems_dir, image_size=IMAGE_SIZE,
+                                        archive=archive)
+        self._sets = {}
+
+    def ids(self):
+        ids = set(find_question_ids(self.problems_dir))
+        if self.archive is not None:
+            ids.update(self.archive.ids())
+        return sorted(ids)
+
+    async def get(self, question_id):
+        """Return the SharedSet for an ID; concurrent callers share one load."""
+        future = self._sets.get(question_id)
+        if future is None:
+            future = asyncio.ensure_future(self._load(question_id))
+            self._sets[question_id] = future
+        try:
+            return await asyncio.shield(future)
+        except QuestionSetError:
+            if self._sets.get(question_id) is future:
+                del self._sets[question_id]
+            raise
+
+    def loaded(self):
+        return sum(1 for future in self._sets.values() if future.done())
+
+    def shutdown(self):
+        self.loader.shutdown()
+
+    async def _load(self, question_id):
+        loaded = await asyncio.wrap_future(self.loader.load(question_id).future)
+        return SharedSet(loaded)
+
+
+class Room:
+    """One round in progress and the clients watching it."""
+
+    def __init__(self, name, shared):
+        self.name = name
+        self.shared = shared
+        self.game = ObstacleGame(shared.layout)
+        self.clients = set()
+
+    def position(self, square):
+        try:
+            return self.shared.layout.positions[square]
+        except (KeyError, TypeError):
+            raise ProtocolError(f"No square {square!r} on this board.") from None
+
+    def state(self):
+        return self.game.to_dict()
+
+    def question(self, square):
+        i, j = self.position(square)
+        if self.game.revealed[i][j]:
+            raise ProtocolError(f"Square {square} is already revealed.")
+        return self.shared.question_set.questions[square]
+
+    def answer(self, square, answer):
+        i, j = self.position(square)
+        if not self.game.can_choose(i, j):
+            raise ProtocolError(f"Square {square} cannot be chosen now.")
+        correct = self.shared.question_set.answer_keys[square].matches(answer)
+        points = self.game.answer_square(i, j, correct)
+        result = {"square": square, "correct": correct, "points": points}
+        if correct and square in self.shared.question_set.hints:
+            result["hint"] = self.shared.question_set.hints[square]
+        return result
+
+    def guess(self, answer):
+        if not self.game.has_turns_left():
+            raise ProtocolError("The current team has no turns left.")
+        correct = self.shared.question_set.obstacle_key.matches(answer)
+        return {"correct": correct, "points": self.game.guess_obstacle(correct)}
+
+    def final(self, answer):
+        if self.game.phase != FINAL_GUESS:
+            raise ProtocolError("The final guess comes after every square is revealed.")
+        correct = self.shared.question_set.obstacle_key.matches(answer)
+        return {"correct": correct, "points": self.game.final_guess(correct)}
+
+    def tile_position(self, square):
+        """Position of a tile the room may see: a correct square, or any once the round is over."""
+        i, j = self.position(square)
+        if self.game.phase != GAME_OVER and not self.game.correct_answers[i][j]:
+            raise ProtocolError(f"Square {square} has not been revealed.")
+        return i, j
+
+
+class Session:
+    """One connected client."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.room = None
+
+    def send(self, message):
+        self.writer.write(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+
+
+class GameServer:
+    """Routes requests from many connections to their rooms."""
+
+    MOVES = ("answer", "guess", "final")
+
+    def __init__(self, library):
+        self.library = library
+        self.rooms = {}
+        self.sessions = 0
+
+    async def handle_client(self, reader, writer):
+        session = Session(writer)
+        self.sessions += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                session.send(await self.respond(session, line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            self.leave(session)
+            writer.close()
+
+    async def respond(self, session, line):
+        """Return the reply to one request line."""
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+                op = request["op"]
+            except (ValueError, AttributeError, KeyError):
+                raise ProtocolError("Each line must be a JSON object with an \"op\".") from None
+            reply = await self.dispatch(session, op, request)
+            reply["ok"] = True
+        except (ProtocolError, QuestionSetError) as e:
+            reply = {"ok": False, "error": str(e)}
+        if request_id is not None:
+            reply["id"] = request_id
+        return reply
+
+    async def dispatch(self, session, op, request):
+        if op == "sets":
+            return {"sets": self.library.ids()}
+        if op == "join":
+            return await self.join(session, str(request.get("room", "")), str(request.get("set", "")))
+        if op == "leave":
+            self.leave(session)
+            return {}
+
+        room = session.room
+        if room is None:
+            raise ProtocolError("Join a room first.")
+        if op == "state":
+            return {"state": room.state()}
+        if op == "question":
+            return {"question": room.question(request.get("square"))}
+        if op == "tile":
+            i, j = room.tile_position(request.get("square"))
+            loop = asyncio.get_running_loop()
+            png = await loop.run_in_executor(None, room.shared.tile_png, i, j)
+            return {"png": png}
+        if op in self.MOVES:
+            if op == "answer":
+                result = room.answer(request.get("square"), request.get("answer"))
+            elif op == "guess":
+                result = room.guess(request.get("answer"))
+            else:
+                result = room.final(request.get("answer"))
+            return self.moved(session, room, op, result)
+        raise ProtocolError(f"Unknown op {op!r}.")
+
+    async def join(self, session, name, question_id):
+        if not name:
+            raise ProtocolError("A room name is needed to join.")
+        self.leave(session)
+        room = self.rooms.get(name)
+        if room is None:
+            if not question_id:
+                raise ProtocolError(f"Room {name!r} does not exist; give a set to create it.")
+            shared = await self.library.get(question_id)
+            # Another client may have created the room while the set loaded
+            room = self.rooms.get(name)
+            if room is None:
+                room = self.rooms[name] = Room(name, shared)
+        if question_id and question_id != room.shared.question_set.question_id:
+            raise ProtocolError(f"Room {name!r} is playing set "
+                                f"{room.shared.question_set.question_id}.")
+        room.clients.add(session)
+        session.room = room
+        layout = room.shared.layout
+        return {"room": name, "set": room.shared.question_set.question_id,
+                "grid": [layout.rows, layout.cols], "order": layout.order,
+                "state": room.state()}
+
+    def leave(self, session):
+        room = session.room
+        if room is None:
+            return
+        room.clients.discard(session)
+        session.room = None
+        if not room.clients and self.rooms.get(room.name) is room:
+            del self.rooms[room.name]
+
+    def moved(self, session, room, op, result):
+        """Finish a move's reply and tell the rest of the room about it."""
+        result["state"] = room.state()
+        if room.game.phase == FINAL_GUESS:
+            result["final_hint"] = room.shared.question_set.final_hint
+        elif room.game.phase == GAME_OVER:
+            result["obstacle"] = room.shared.question_set.obstacle_answer
+        event = dict(result, event="move", op=op)
+        for other in room.clients:
+            if other is not session:
+                other.send(event)
+        return result
+
+
+async def serve(host, port, library, ready=None):
+    """Run the server until cancelled; `ready` is called with the bound (host, port)."""
+    game_server = GameServer(library)
+    server = await asyncio.start_server(game_server.handle_client, host, port)
+    if ready is not None:
+        ready(server.sockets[0].getsockname()[:2])
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host many Obstacle Course rounds over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--problems", default=PROBLEMS_DIR)
+    args = parser.parse_args(argv)
+
+    pack_file = os.path.join(args.problems, os.path.basename(PACK_FILE))
+    archive = PackedArchive(pack_file) if os.path.exists(pack_file) else None
+    library = SetLibrary(args.problems, archive)
+
+    def ready(address):
+        print(f"listening on {address[0]}:{address[1]}", flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, library, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        library.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
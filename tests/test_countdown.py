@@ -0,0 +1,105 @@
+"""Countdown stays drift-free when its after() callbacks run late.
+
+Runs on a simulated clock, so the checks are exact and do not depend on
+how busy the machine running them is. benchmarks/bench_timers.py checks
+the same thing on a real event loop.
+"""
+import heapq
+import itertools
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from countdown import Countdown  # noqa: E402
+
+TICK = 0.1
+MAX_LATE = 0.040  # Longest a callback is held up past its due time
+
+
+class SimulatedLoop:
+    """after()/after_cancel() on a simulated clock, running each callback up to `late` s late."""
+
+    def __init__(self, late=0.0, seed=0):
+        self.now = 0.0
+        self.late = late
+        self.rng = random.Random(seed)
+        self.jobs = []
+        self.order = itertools.count()
+        self.cancelled = set()
+
+    def clock(self):
+        return self.now
+
+    def after(self, ms, func):
+        job = next(self.order)
+        due = self.now + ms / 1000 + self.rng.uniform(0, self.late)
+        heapq.heappush(self.jobs, (due, job, func))
+        return job
+
+    def after_cancel(self, job):
+        self.cancelled.add(job)
+
+    def run(self):
+        while self.jobs:
+            due, job, func = heapq.heappop(self.jobs)
+            if job not in self.cancelled:
+                self.now = due
+                func()
+
+
+def countdown(loop, seconds, ticks=None):
+    expired = []
+    timer = Countdown(loop, seconds, None if ticks is None else ticks.append,
+                      lambda: expired.append(loop.now), tick=TICK, clock=loop.clock)
+    return timer.start(), expired
+
+
+def test_expires_on_time_without_load():
+    loop = SimulatedLoop()
+    timer, expired = countdown(loop, 5.0)
+    loop.run()
+    assert len(expired) == 1
+    assert 0 <= expired[0] - timer.deadline <= 0.001
+
+
+def test_late_ticks_do_not_accumulate():
+    # 50 ticks each up to 40 ms late would add up to seconds if counted
+    for seed in range(20):
+        loop = SimulatedLoop(late=MAX_LATE, seed=seed)
+        timer, expired = countdown(loop, 5.0)
+        loop.run()
+        assert len(expired) == 1
+        assert 0 <= expired[0] - timer.deadline <= MAX_LATE + 0.001
+
+
+def test_ticks_report_time_left_on_the_clock():
+    loop = SimulatedLoop(late=MAX_LATE, seed=1)
+    ticks = []
+    timer, _ = countdown(loop, 3.0, ticks)
+    # on_tick is called as each callback runs, so check it against the clock then
+    seen = []
+    timer.on_tick = lambda left: seen.append((left, timer.deadline - loop.now))
+    loop.run()
+    assert ticks == [3.0]
+    assert seen and all(abs(left - actual) < 1e-9 for left, actual in seen)
+    assert all(left > 0 for left, _ in seen)
+
+
+def test_never_expires_early():
+    loop = SimulatedLoop()
+    for seconds in (0.05, 0.1, 0.25, 1.0, 1.37):
+        timer, expired = countdown(loop, seconds)
+        loop.run()
+        assert expired[0] >= timer.deadline
+
+
+def test_cancel_stops_expiry():
+    loop = SimulatedLoop()
+    timer, expired = countdown(loop, 1.0)
+    loop.now = 0.5
+    timer.cancel()
+    loop.run()
+    assert expired == []
+    assert not timer.running
@@ -0,0 +1,209 @@
+"""Cache of resized board images and their tiles, keyed by image content."""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+import tracing
+from imaging import REDUCING_GAP, load_board_image, tile_mode
+
+CACHE_DIR = ".tile_cache"
+CACHE_FORMAT = 2
+
+
+def tile_view(pixels, grid_size):
+    """View a (height, width, bands) pixel array as a grid of tiles without copying.
+
+    Returns a (rows, cols, tile_height, tile_width, bands) array; pixels
+    beyond the last whole tile on the right and bottom edges are left out.
+    """
+    rows, cols = grid_size
+    height, width, bands = pixels.shape
+    part_height = height // rows
+    part_width = width // cols
+    grid = pixels[:rows * part_height, :cols * part_width]
+    return grid.reshape(rows, part_height, cols, part_width, bands).swapaxes(1, 2)
+
+
+def slice_image(img, grid_size):
+    """Split an image into a rows x cols grid of tiles.
+
+    The image is converted to a single array once and every tile is a view
+    into it, so slicing costs the same for a 4x4 or a 16x16 board.
+    """
+    mode = tile_mode(img)
+    if img.mode != mode:
+        img = img.convert(mode)
+    return tile_view(np.asarray(img), grid_size)
+
+
+def assemble_tiles(tiles):
+    """Stitch a tile grid from tile_view() back into one (height, width, bands) array."""
+    rows, cols, part_height, part_width, bands = tiles.shape
+    return tiles.swapaxes(1, 2).reshape(rows * part_height, cols * part_width, bands)
+
+
+class TileCache:
+    """Resized images and tiles kept in a bounded in-memory LRU backed by disk.
+
+    Entries are keyed on the SHA-256 of the image file, the target size and
+    the grid size, so an edited image never serves stale tiles while a
+    renamed or re-copied one still hits. Hit and miss counters are kept in
+    `memory_hits`, `disk_hits` and `misses`. Safe to share between loader
+    threads; decoding happens outside the lock. Misses decode through
+    imaging.load_board_image, so no decode takes more than `memory_limit`
+    bytes (default: the MOBIUS_IMAGE_MEMORY_MB ceiling).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=8, memory_limit=None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.memory_limit = memory_limit
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._hashes = {}  # (path, mtime, size) -> content hash
+        self._lock = threading.Lock()
+
+    def content_hash(self, path):
+        """Return the SHA-256 hex digest of a file, memoized on its mtime and size."""
+        st = os.stat(path)
+        signature = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._hashes.get(signature)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            with self._lock:
+                self._hashes[signature] = digest
+        return digest
+
+    def key(self, path, size, grid_size):
+        """Cache key for an image file at a target size and grid size."""
+        return (f"{self.content_hash(path)}-{size[0]}x{size[1]}"
+                f"-{grid_size[0]}x{grid_size[1]}")
+
+    def get(self, path, size=(400, 400), grid_size=(4, 4), source=None):
+        """Return (resized image, tiles) for an image file, decoding only on a miss.
+
+        `tiles` is the slice_image() grid of array views over the resized image.
+        On a miss the image is resized from `source`, an already decoded copy
+        of the file, when one is given, instead of being decoded again.
+        """
+        key = self.key(path, size, grid_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.memory_hits += 1
+                self._entries.move_to_end(key)
+                return entry
+
+        with tracing.span("read_tile_cache"):
+            entry = self._read(key)
+        if entry is not None:
+            hit = True
+        else:
+            hit = False
+            if source is not None:
+                with tracing.span("resize", source=source.size):
+                    img = source.resize(size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+            else:
+                img = load_board_image(path, size, self.memory_limit)
+            with tracing.span("slice_tiles"):
+                entry = (img, slice_image(img, grid_size))
+            with tracing.span("write_tile_cache"):
+                self._write(key, entry)
+
+        with self._lock:
+            if hit:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+            self._entries[key] = entry
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_pyramid(self, path, sizes, grid_size=(4, 4)):
+        """Return get()'s (image, tiles) for each of `sizes`, in the same order.
+
+        The file is decoded once, for the largest size; a smaller level that
+        misses is resized from the level above it instead of from the file.
+        """
+        levels = {}
+        larger = None
+        for size in sorted(set(sizes), key=lambda s: s[0] * s[1], reverse=True):
+            levels[size] = self.get(path, size, grid_size, larger)
+            larger = levels[size][0]
+        return [levels[size] for size in sizes]
+
+    def stats(self):
+        """Return the hit/miss counters as a dict."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def clear(self):
+        """Drop the in-memory entries and delete the on-disk cache files."""
+        with self._lock:
+            self._entries.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".tiles"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.tiles")
+
+    def _read(self, key):
+        # File layout: one JSON header line, then the resized image's raw
+        # pixels; the tiles are views into them, so they need no bytes of their own.
+        try:
+            with open(self._path(key), "rb") as f:
+                header = json.loads(f.readline())
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+
+        if header.get("format") != CACHE_FORMAT:
+            return None  # Written by an older version; rebuild it
+        mode = header["mode"]
+        width, height = header["size"]
+        bands = Image.getmodebands(mode)
+        if len(data) != width * height * bands:
+            return None  # Truncated or foreign file; rebuild it
+
+        pixels = np.frombuffer(data, dtype=np.uint8).reshape(height, width, bands)
+        img = Image.fromarray(pixels)
+        return img, tile_view(pixels, header["grid_size"])
+
+    def _write(self, key, entry):
+        img, tiles = entry
+        header = {
+            "format": CACHE_FORMAT,
+            "mode": img.mode,
+            "size": list(img.size),
+            "grid_size": list(tiles.shape[:2]),
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                f.write(img.tobytes())
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            pass  # A read-only cache directory only costs us the disk tier
@@ -0,0 +1,241 @@
+"""Tournament scoreboard: cumulative team scores over chained rounds, in SQLite.
+
+Every finished round adds one row per team to round_scores and folds the
+points into a standings table, keyed by tournament and team and indexed
+by (tournament, total), so the leaderboard and any team's rank are read
+from the index instead of summing every round again:
+
+    python tournament.py leaderboard spring-2025 --limit 20
+    python tournament.py rank spring-2025 "Team Euler"
+    python tournament.py rounds spring-2025
+
+challenge.py records rounds here when MOBIUS_TOURNAMENT names a
+tournament (see the README).
+"""
+import argparse
+import sqlite3
+import sys
+import time
+
+SCOREBOARD_FILE = "scoreboard.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tournaments (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    tournament INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (tournament, name)
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    tournament INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    question_id TEXT NOT NULL,
+    completed INTEGER NOT NULL,
+    played_at REAL NOT NULL,
+    UNIQUE (tournament, number)
+);
+CREATE TABLE IF NOT EXISTS round_scores (
+    round INTEGER NOT NULL,
+    team INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (round, team)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS round_scores_by_team ON round_scores (team, round);
+CREATE TABLE IF NOT EXISTS standings (
+    tournament INTEGER NOT NULL,
+    team INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    rounds INTEGER NOT NULL,
+    PRIMARY KEY (tournament, team)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS standings_by_total ON standings (tournament, total DESC, team, rounds);
+"""
+
+
+class ScoreboardError(Exception):
+    """The tournament or team is not on the scoreboard."""
+
+
+class Standing:
+    """One team's place on a leaderboard; tied totals share a rank."""
+
+    def __init__(self, rank, team, total, rounds):
+        self.rank = rank
+        self.team = team
+        self.total = total
+        self.rounds = rounds
+
+    def __repr__(self):
+        return f"Standing({self.rank}, {self.team!r}, {self.total}, {self.rounds})"
+
+
+class Scoreboard:
+    """Cumulative tournament scores stored in one SQLite file."""
+
+    def __init__(self, path=SCOREBOARD_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def record_round(self, tournament, question_id, scores, completed=True):
+        """Add a finished round's {team name: points} and return its round number.
+
+        The round, its scores and the updated standings are written in one
+        transaction, so a crash never leaves a half-counted round.
+        """
+        with self.db:
+            tournament_id = self._tournament_id(tournament, create=True)
+            number = self.db.execute(
+                "SELECT COALESCE(MAX(number), 0) + 1 FROM rounds WHERE tournament = ?",
+                (tournament_id,)).fetchone()[0]
+            round_id = self.db.execute(
+                "INSERT INTO rounds (tournament, number, question_id, completed, played_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (tournament_id, number, question_id, int(completed), time.time())).lastrowid
+            for name, score in scores.items():
+                team_id = self._team_id(tournament_id, name, create=True)
+                self.db.execute("INSERT INTO round_scores (round, team, score) VALUES (?, ?, ?)",
+                                (round_id, team_id, score))
+                self.db.execute(
+                    "INSERT INTO standings (tournament, team, total, rounds) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT (tournament, team) DO UPDATE "
+                    "SET total = total + excluded.total, rounds = rounds + 1",
+                    (tournament_id, team_id, score))
+        return number
+
+    def leaderboard(self, tournament, limit=10, offset=0):
+        """Return a page of Standings, highest total first."""
+        tournament_id = self._tournament_id(tournament)
+        if tournament_id is None:
+            return []
+        # The page is cut from the covering index before team names are joined in
+        rows = self.db.execute(
+            "SELECT teams.name, page.total, page.rounds FROM "
+            "(SELECT team, total, rounds FROM standings WHERE tournament = ? "
+            "ORDER BY total DESC, team LIMIT ? OFFSET ?) AS page "
+            "JOIN teams ON teams.id = page.team ORDER BY page.total DESC, page.team",
+            (tournament_id, limit, offset)).fetchall()
+        standings = []
+        for index, (name, total, rounds) in enumerate(rows):
+            if index == 0 or total != standings[-1].total:
+                rank = offset + index + 1 if index else self._rank(tournament_id, total)
+            standings.append(Standing(rank, name, total, rounds))
+        return standings
+
+    def standing(self, tournament, team):
+        """Return one team's Standing."""
+        tournament_id = self._tournament_id(tournament)
+        team_id = None if tournament_id is None else self._team_id(tournament_id, team)
+        row = None if team_id is None else self.db.execute(
+            "SELECT total, rounds FROM standings WHERE tournament = ? AND team = ?",
+            (tournament_id, team_id)).fetchone()
+        if row is None:
+            raise ScoreboardError(f"{team!r} has not played in {tournament!r}.")
+        total, rounds = row
+        return Standing(self._rank(tournament_id, total), team, total, rounds)
+
+    def rounds(self, tournament):
+        """Return (number, question_id, completed, {team: score}) for every round, in order."""
+        tournament_id = self._tournament_id(tournament)
+        if tournament_id is None:
+            return []
+        played = {}
+        for number, question_id, completed, name, score in self.db.execute(
+                "SELECT rounds.number, rounds.question_id, rounds.completed, teams.name, "
+                "round_scores.score FROM rounds "
+                "JOIN round_scores ON round_scores.round = rounds.id "
+                "JOIN teams ON teams.id = round_scores.team "
+                "WHERE rounds.tournament = ? ORDER BY rounds.number", (tournament_id,)):
+            played.setdefault(number, (number, question_id, bool(completed), {}))[3][name] = score
+        return list(played.values())
+
+    def played_sets(self, tournament):
+        """Return the IDs of the question sets already played in a tournament."""
+        tournament_id = self._tournament_id(tournament)
+        if tournament_id is None:
+            return set()
+        return {row[0] for row in self.db.execute(
+            "SELECT question_id FROM rounds WHERE tournament = ?", (tournament_id,))}
+
+    def _rank(self, tournament_id, total):
+        # Counts index entries above `total`, so the cost grows with the rank, not the field
+        return 1 + self.db.execute(
+            "SELECT COUNT(*) FROM standings WHERE tournament = ? AND total > ?",
+            (tournament_id, total)).fetchone()[0]
+
+    def _tournament_id(self, name, create=False):
+        row = self.db.execute("SELECT id FROM tournaments WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            return row[0]
+        if not create:
+            return None
+        return self.db.execute("INSERT INTO tournaments (name) VALUES (?)", (name,)).lastrowid
+
+    def _team_id(self, tournament_id, name, create=False):
+        row = self.db.execute("SELECT id FROM teams WHERE tournament = ? AND name = ?",
+                              (tournament_id, name)).fetchone()
+        if row is not None:
+            return row[0]
+        if not create:
+            return None
+        return self.db.execute("INSERT INTO teams (tournament, name) VALUES (?, ?)",
+                               (tournament_id, name)).lastrowid
+
+
+def format_standings(standings):
+    """Lines of a leaderboard table."""
+    return [f"{s.rank:>4}. {s.team[:24]:<24} {s.total:>6} pts {s.rounds:>4} rds" for s in standings]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show tournament standings and round history.")
+    parser.add_argument("--scoreboard", default=SCOREBOARD_FILE,
+                        help=f"scoreboard file (default: {SCOREBOARD_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    leaderboard_cmd = commands.add_parser("leaderboard", help="ranked cumulative scores")
+    leaderboard_cmd.add_argument("tournament")
+    leaderboard_cmd.add_argument("--limit", type=int, default=20)
+    leaderboard_cmd.add_argument("--offset", type=int, default=0)
+
+    rank_cmd = commands.add_parser("rank", help="one team's rank and total")
+    rank_cmd.add_argument("tournament")
+    rank_cmd.add_argument("team")
+
+    rounds_cmd = commands.add_parser("rounds", help="every round's scores")
+    rounds_cmd.add_argument("tournament")
+    args = parser.parse_args(argv)
+
+    scoreboard = Scoreboard(args.scoreboard)
+    try:
+        if args.command == "leaderboard":
+            for line in format_standings(scoreboard.leaderboard(args.tournament, args.limit,
+                                                                args.offset)):
+                print(line)
+        elif args.command == "rank":
+            print(format_standings([scoreboard.standing(args.tournament, args.team)])[0])
+        else:
+            for number, question_id, completed, scores in scoreboard.rounds(args.tournament):
+                results = ", ".join(f"{team} {score}" for team, score in scores.items())
+                note = "" if completed else " (abandoned)"
+                print(f"round {number}: set {question_id}{note}: {results}")
+    except ScoreboardError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        scoreboard.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
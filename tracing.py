@@ -0,0 +1,203 @@
+"""Timing spans for the game's hot paths, exportable as a Chrome trace.
+
+Tracing is off unless the MOBIUS_TRACE environment variable names an
+output file (or enable() is called). While off, span() hands back one
+shared no-op context manager, so instrumented code pays for little more
+than a function call.
+
+    MOBIUS_TRACE=round.json python challenge.py
+
+On exit the spans are written to round.json in Chrome's trace-event
+format (open it in chrome://tracing or https://ui.perfetto.dev) and a
+per-span summary is printed to stderr. A saved trace can be summarized
+again later:
+
+    python tracing.py round.json
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+TRACE_ENV = "MOBIUS_TRACE"
+
+_NO_SPAN = nullcontext()
+_recorder = None
+
+
+class Recorder:
+    """Collects finished spans from any thread."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.origin = time.perf_counter_ns()
+        self.events = []
+        self._threads = set()
+        self._lock = threading.Lock()
+
+    def add(self, name, start, end, args):
+        tid = threading.get_ident()
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.origin) / 1000,
+            "dur": (end - start) / 1000,
+            "pid": self.pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            if tid not in self._threads:
+                # Label the thread's track, e.g. MainThread or a loader worker
+                self._threads.add(tid)
+                self.events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                                    "args": {"name": threading.current_thread().name}})
+            self.events.append(event)
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "args", "start")
+
+    def __init__(self, recorder, name, args):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+def enable():
+    """Start recording spans (a no-op if already recording). Returns the recorder."""
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder()
+    return _recorder
+
+
+def disable():
+    """Stop recording and return the recorder with what was collected, or None."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def enabled():
+    """Whether spans are being recorded."""
+    return _recorder is not None
+
+
+def span(name, **args):
+    """Context manager timing the enclosed block as a span called `name`."""
+    recorder = _recorder
+    if recorder is None:
+        return _NO_SPAN
+    return _Span(recorder, name, args)
+
+
+def traced(name=None):
+    """Decorator timing every call of a function as a span."""
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return fn(*args, **kwargs)
+            with _Span(recorder, span_name, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def chrome_trace(events):
+    """Wrap trace events in Chrome's JSON object format."""
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path, recorder=None):
+    """Write the recorded spans to `path` as Chrome trace-event JSON."""
+    recorder = recorder or _recorder
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(list(recorder.events)), f)
+
+
+def summarize(events):
+    """Return [(name, count, total, p50, p95, max)] in ms, slowest total first."""
+    durations = {}
+    for event in events:
+        if event.get("ph") == "X":
+            durations.setdefault(event["name"], []).append(event["dur"] / 1000)
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append((name, len(values), sum(values), _percentile(values, 50),
+                     _percentile(values, 95), values[-1]))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows
+
+
+def format_summary(events):
+    """The summarize() table as text."""
+    lines = [f"{'span':<32} {'count':>6} {'total ms':>10} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    for name, count, total, p50, p95, longest in summarize(events):
+        lines.append(f"{name:<32} {count:>6} {total:>10.2f} {p50:>9.3f} {p95:>9.3f} {longest:>9.3f}")
+    return "\n".join(lines)
+
+
+def _percentile(values, percent):
+    # Nearest rank on already sorted values
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+def _write_on_exit(path):
+    recorder = disable()
+    if recorder is None:
+        return
+    try:
+        export_chrome_trace(path, recorder)
+    except OSError as e:
+        print(f"Could not write trace to {path}: {e}", file=sys.stderr)
+    else:
+        print(f"Trace written to {path}", file=sys.stderr)
+    print(format_summary(recorder.events), file=sys.stderr)
+
+
+def _enable_from_environment():
+    path = os.environ.get(TRACE_ENV)
+    if path:
+        enable()
+        atexit.register(_write_on_exit, path)
+
+
+_enable_from_environment()
+
+
+def main(argv=None):
+    paths = sys.argv[1:] if argv is None else argv
+    if not paths:
+        print("usage: python tracing.py TRACE.json [TRACE.json ...]", file=sys.stderr)
+        return 2
+    events = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        events.extend(data["traceEvents"] if isinstance(data, dict) else data)
+    print(format_summary(events))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Validate every question set in a problems folder in parallel.
+
+Usage:
+
+    python validate.py [problems_dir] [--format text|json|jsonl] [--jobs N]
+
+Each questions_NNN.json / image_NNN.png pair is checked for JSON schema,
+one question per grid square (1-16 on the default 4x4 grid), hints on the
+central squares (13-16 on 4x4), a non-empty Obstacle answer and final
+hint, well-formed answer aliases, and an image that fully decodes with an
+acceptable size and aspect ratio. Results are cached next to the sets, so unchanged pairs are not
+checked again. The exit status is 1 if any set has errors.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from imaging import load_board_image, open_image
+from question_set import (PROBLEMS_DIR, QuestionSetError, find_question_ids, parse_layout,
+                          question_set_paths)
+
+CACHE_FILE = ".validate_cache.json"
+MIN_IMAGE_SIZE = 400  # The board is drawn at 400x400
+MAX_ASPECT_RATIO = 2.0  # Longer side over shorter side
+
+
+def check_question_data(data):
+    """Return (errors, warnings) for decoded questions JSON."""
+    errors = []
+    warnings = []
+    if not isinstance(data, dict):
+        return ["Top level must be a JSON object."], warnings
+
+    for key in ("obstacle_answer", "final_hint"):
+        value = data.get(key)
+        if not isinstance(value, str):
+            errors.append(f"'{key}' must be a string.")
+        elif not value.strip():
+            errors.append(f"'{key}' must not be empty.")
+
+    try:
+        layout = parse_layout(data)
+    except QuestionSetError as e:
+        errors.append(str(e))
+        return errors, warnings
+    if "obstacle_aliases" in data and not _is_alias_list(data["obstacle_aliases"]):
+        errors.append("'obstacle_aliases' must be a list of non-empty strings.")
+    center = layout.center_squares
+    center_text = ", ".join(map(str, center))
+
+    questions = data.get("questions")
+    if not isinstance(questions, list):
+        errors.append("'questions' must be a list.")
+        return errors, warnings
+
+    squares = []
+    hinted = set()
+    for n, q in enumerate(questions):
+        if not isinstance(q, dict):
+            errors.append(f"Question #{n + 1} must be an object.")
+            continue
+        square = q.get("square")
+        if not isinstance(square, int) or isinstance(square, bool):
+            errors.append(f"Question #{n + 1}: 'square' must be an integer.")
+            continue
+        squares.append(square)
+        for key in ("question", "answer"):
+            if not isinstance(q.get(key), str) or not q[key].strip():
+                errors.append(f"Square {square}: '{key}' must be a non-empty string.")
+        if "aliases" in q and not _is_alias_list(q["aliases"]):
+            errors.append(f"Square {square}: 'aliases' must be a list of non-empty strings.")
+        if "hint" in q:
+            if not isinstance(q["hint"], str) or not q["hint"].strip():
+                errors.append(f"Square {square}: 'hint' must be a non-empty string.")
+            elif square not in center:
+                warnings.append(f"Square {square} has a hint, but only squares "
+                                f"{center_text} show hints.")
+            else:
+                hinted.add(square)
+
+    duplicates = sorted({s for s in squares if squares.count(s) > 1})
+    if duplicates:
+        errors.append(f"Duplicate squares: {', '.join(map(str, duplicates))}.")
+    expected = set(range(1, layout.size + 1))
+    missing = sorted(expected - set(squares))
+    if missing:
+        errors.append(f"Missing squares: {', '.join(map(str, missing))}.")
+    extra = sorted(set(squares) - expected)
+    if extra:
+        errors.append(f"Squares outside 1-{layout.size}: {', '.join(map(str, extra))}.")
+    for square in center:
+        if square in squares and square not in hinted:
+            errors.append(f"Square {square} has no hint.")
+    return errors, warnings
+
+
+def _is_alias_list(value):
+    return isinstance(value, list) and all(isinstance(v, str) and v.strip() for v in value)
+
+
+def check_image(path, min_size=MIN_IMAGE_SIZE, max_aspect=MAX_ASPECT_RATIO):
+    """Return (errors, warnings, size) for an image file, decoding it fully.
+
+    The decode goes through the same memory-bounded pipeline as the game,
+    so an image too large for the memory ceiling is an error here too.
+    """
+    errors = []
+    warnings = []
+    try:
+        with open_image(path) as img:
+            size = img.size
+        load_board_image(path, (min_size, min_size))
+    except Exception as e:
+        return [f"Image does not decode: {str(e)}"], warnings, None
+
+    width, height = size
+    if min(width, height) < min_size:
+        warnings.append(f"Image is {width}x{height}; it will be upscaled to the board size.")
+    if max(width, height) > max_aspect * min(width, height):
+        errors.append(f"Image aspect ratio {width}x{height} is more than {max_aspect}:1.")
+    return errors, warnings, list(size)
+
+
+def validate_set(question_id, problems_dir, min_size=MIN_IMAGE_SIZE, max_aspect=MAX_ASPECT_RATIO):
+    """Check one questions/image pair and return its result dict."""
+    questions_file, image_file = question_set_paths(question_id, problems_dir)
+    result = {"id": question_id, "ok": False, "errors": [], "warnings": [], "image_size": None}
+
+    try:
+        with open(questions_file, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        result["errors"].append(f"Questions file does not parse: {str(e)}")
+    else:
+        errors, warnings = check_question_data(data)
+        result["errors"].extend(errors)
+        result["warnings"].extend(warnings)
+
+    if not os.path.exists(image_file):
+        result["errors"].append(f"Image file '{image_file}' not found.")
+    else:
+        errors, warnings, size = check_image(image_file, min_size, max_aspect)
+        result["errors"].extend(errors)
+        result["warnings"].extend(warnings)
+        result["image_size"] = size
+
+    result["ok"] = not result["errors"]
+    return result
+
+
+def _signature(question_id, problems_dir, options):
+    signature = list(options)
+    for path in question_set_paths(question_id, problems_dir):
+        try:
+            st = os.stat(path)
+            signature.extend([st.st_mtime_ns, st.st_size])
+        except OSError:
+            signature.extend([None, None])
+    return signature
+
+
+def validate_folder(problems_dir=PROBLEMS_DIR, jobs=None, use_cache=True,
+                    min_size=MIN_IMAGE_SIZE, max_aspect=MAX_ASPECT_RATIO):
+    """Validate every set in a folder, re-checking only changed pairs.
+
+    Returns the results sorted by ID; each has a "cached" flag.
+    """
+    cache_path = os.path.join(problems_dir, CACHE_FILE)
+    cache = {}
+    if use_cache:
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+    options = [min_size, max_aspect]
+    results = {}
+    pending = []
+    signatures = {}
+    for question_id in find_question_ids(problems_dir):
+        signature = _signature(question_id, problems_dir, options)
+        signatures[question_id] = signature
+        cached = cache.get(question_id)
+        if cached is not None and cached["signature"] == signature:
+            results[question_id] = dict(cached["result"], cached=True)
+        else:
+            pending.append(question_id)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            chunksize = max(1, len(pending) // (4 * (jobs or os.cpu_count() or 1)))
+            checked = pool.map(validate_set, pending, [problems_dir] * len(pending),
+                               [min_size] * len(pending), [max_aspect] * len(pending),
+                               chunksize=chunksize)
+            for result in checked:
+                results[result["id"]] = dict(result, cached=False)
+
+    if use_cache and (pending or set(cache) != set(results)):
+        new_cache = {}
+        for question_id, result in results.items():
+            stored = {key: value for key, value in result.items() if key != "cached"}
+            new_cache[question_id] = {"signature": signatures[question_id], "result": stored}
+        try:
+            with open(f"{cache_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(new_cache, f, ensure_ascii=False)
+            os.replace(f"{cache_path}.tmp", cache_path)
+        except OSError:
+            pass  # Read-only folder: everything is re-checked next run
+
+    return [results[question_id] for question_id in sorted(results)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate question sets in a problems folder.")
+    parser.add_argument("problems_dir", nargs="?", default=PROBLEMS_DIR)
+    parser.add_argument("--format", choices=("text", "json", "jsonl"), default="text")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPUs)")
+    parser.add_argument("--no-cache", action="store_true", help="re-check every set")
+    parser.add_argument("--min-size", type=int, default=MIN_IMAGE_SIZE)
+    parser.add_argument("--max-aspect", type=float, default=MAX_ASPECT_RATIO)
+    args = parser.parse_args(argv)
+
+    results = validate_folder(args.problems_dir, args.jobs, not args.no_cache,
+                              args.min_size, args.max_aspect)
+    if args.format == "json":
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    elif args.format == "jsonl":
+        for result in results:
+            print(json.dumps(result, ensure_ascii=False))
+    else:
+        for result in results:
+            status = "ok" if result["ok"] else "FAIL"
+            print(f"{result['id']}: {status}{' (cached)' if result['cached'] else ''}")
+            for error in result["errors"]:
+                print(f"    error: {error}")
+            for warning in result["warnings"]:
+                print(f"    warning: {warning}")
+        failed = sum(1 for result in results if not result["ok"])
+        print(f"{len(results)} sets checked, {failed} with errors")
+    return 1 if any(not result["ok"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())